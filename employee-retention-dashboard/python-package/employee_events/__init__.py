@@ -1,4 +1,7 @@
 from .employee import Employee
 from .team import Team
 from .query_base import QueryBase
-from .sql_execution import *
\ No newline at end of file
+from .sql_execution import *
+from .cache import LRUCache, ResultCache, enable_result_cache, disable_result_cache
+from .directory import EntityDirectory, directory
+from .singleflight import SingleFlight
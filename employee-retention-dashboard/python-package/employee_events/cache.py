@@ -0,0 +1,200 @@
+import sys
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import NamedTuple
+import pandas as pd
+
+from .sql_execution import QueryMixin, connections
+from .singleflight import query_flights
+
+
+class CacheInfo(NamedTuple):
+    """
+    Statistics reported by `LRUCache.info()`.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def sizeof(value) -> int:
+    """
+    Returns the approximate memory footprint of a cached value in bytes.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    A thread-safe mapping bounded by entry count and/or bytes,
+    evicting the least recently used entries first.
+
+    Attributes:
+    -----------
+    max_entries(int) : Maximum number of entries, or `None` for no limit.
+    max_bytes(int) : Maximum total size in bytes, or `None` for no limit.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, sizeof=sizeof):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self._hits = self._misses = self._evictions = 0
+
+    def get(self, key, default=None):
+        """
+        Returns the value stored under `key` and marks it as recently used.
+        """
+        with self._lock:
+            try:
+                value, _ = self._data[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Stores `value` under `key`, evicting old entries to stay in bounds.
+        Values larger than `max_bytes` on their own are not stored.
+        """
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._nbytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self._nbytes += size
+            while self._data and self._over_limit():
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._nbytes -= evicted
+                self._evictions += 1
+
+    def _over_limit(self) -> bool:
+        if self.max_entries is not None and len(self._data) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._nbytes > self.max_bytes
+
+    def clear(self):
+        """
+        Drops every entry but keeps the statistics.
+        """
+        with self._lock:
+            self._data.clear()
+            self._nbytes = 0
+
+    def info(self) -> CacheInfo:
+        """
+        Returns hit, miss and eviction counts and the current size.
+        """
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, self._evictions,
+                len(self._data), self._nbytes,
+            )
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+class ResultCache(LRUCache):
+    """
+    An `LRUCache` of query results that empties itself
+    whenever the database's data version changes.
+
+    Cached DataFrames are shared between callers and
+    must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, versions=connections):
+        super().__init__(max_entries, max_bytes)
+        self.versions = versions
+        self.version = None
+
+    def validate(self) -> tuple:
+        """
+        Clears the cache if the database changed since it was filled
+        and returns the current data version.
+        """
+        version = self.versions.data_version()
+        if version != self.version:
+            self.clear()
+            self.version = version
+        return version
+
+
+def cached(method):
+    """
+    Decorator that memoizes a query method in the instance's
+    `result_cache`, keyed by (entity type, method, arguments).
+    Methods run uncached while `result_cache` is `None`.
+
+    Either way, concurrent calls with the same key are coalesced
+    into one query whose result every caller shares.
+    """
+
+    @wraps(method)
+    def run_cached(self, *args, **kwargs):
+        cache = self.result_cache
+
+        # The data version is part of the key so a result computed
+        # while the database changed is never served afterwards
+        version = self.data_version() if cache is None else cache.validate()
+        key = (self.name, method.__name__, args, tuple(sorted(kwargs.items())), version)
+        if cache is None:
+            return query_flights.do(key, method, self, *args, **kwargs)
+
+        result = cache.get(key, _missing)
+        if result is _missing:
+            result = query_flights.do(key, _load, cache, key, method, self, *args, **kwargs)
+        return result
+
+    return run_cached
+
+
+_missing = object()
+
+
+def _load(cache, key, method, self, *args, **kwargs):
+    result = method(self, *args, **kwargs)
+    cache.put(key, result)
+    return result
+
+
+def enable_result_cache(max_entries=1024, max_bytes=None) -> ResultCache:
+    """
+    Turns on result caching for every `QueryMixin` subclass
+    and returns the shared cache.
+    """
+    QueryMixin.result_cache = ResultCache(max_entries, max_bytes)
+    return QueryMixin.result_cache
+
+
+def disable_result_cache():
+    """
+    Turns result caching off again.
+    """
+    QueryMixin.result_cache = None
@@ -0,0 +1,175 @@
+import re
+import threading
+from bisect import bisect_left
+from typing import NamedTuple
+
+from .sql_execution import connections
+
+
+class Entities(NamedTuple):
+    """
+    The employees or teams in the database.
+
+    Attributes:
+    -----------
+    names(dict[int, str]) : Name of each id.
+    options(list[tuple]) : (name, id) pairs in dropdown order.
+    index(list[tuple]) : Sorted (word, rank, id) triples, one per
+        lowercased word of each name, for prefix search.
+    """
+    names: dict
+    options: list
+    index: list
+
+
+def name_words(name: str) -> list:
+    """
+    Returns the lowercased words of a name, e.g. "Mary-Jane Doe" -> ["mary", "jane", "doe"].
+    """
+    return re.findall(r"\w+", name.casefold())
+
+
+class EntityDirectory:
+    """
+    In-memory id -> name maps and sorted name lists for every
+    entity type, loaded with one query per type and reloaded
+    only when the database's data version changes.
+
+    Checking that an id exists is a dict lookup,
+    so the routes can validate ids without any SQL.
+
+    Attributes:
+    -----------
+    versions(ConnectionManager) : Source of the data version and the queries.
+    """
+
+    def __init__(self, versions=connections):
+        self.versions = versions
+        self._snapshot = (None, {})
+        self._lock = threading.Lock()
+
+    def _entities(self) -> dict:
+        version = self.versions.data_version()
+        loaded, entities = self._snapshot
+        if loaded == version:
+            return entities
+
+        with self._lock:
+            # Another thread may have reloaded while we waited
+            loaded, entities = self._snapshot
+            if loaded != version:
+                entities = self._load()
+                self._snapshot = (version, entities)
+            return entities
+
+    def _load(self) -> dict:
+        # Imported here: the query classes read from the directory
+        from .employee import Employee
+        from .team import Team
+
+        entities = {}
+        for model in (Employee, Team):
+            options = self.versions.execute(model.names_sql.sql()).fetchall()
+            index = [
+                (word, rank, entity_id)
+                for rank, (name, entity_id) in enumerate(options)
+                for word in name_words(name)
+            ]
+            index.sort()
+            entities[model.name] = Entities(
+                names={entity_id: name for name, entity_id in options},
+                options=options,
+                index=index,
+            )
+        return entities
+
+    def exists(self, entity: str, entity_id) -> bool:
+        """
+        Returns whether `entity_id` is an id of the `entity` type.
+        """
+        return self.name(entity, entity_id) is not None
+
+    def name(self, entity: str, entity_id):
+        """
+        Returns the name of an employee or team, or `None` if there is none.
+        """
+        try:
+            entity_id = int(entity_id)
+        except (TypeError, ValueError):
+            return None
+        entities = self._entities().get(entity)
+        return entities.names.get(entity_id) if entities else None
+
+    def options(self, entity: str) -> list:
+        """
+        Returns the (name, id) pairs of an entity type in dropdown order.
+        The list is shared between callers and must not be modified.
+        """
+        entities = self._entities().get(entity)
+        return entities.options if entities else []
+
+    def search(self, entity: str, text: str, limit: int = 10) -> list:
+        """
+        Returns up to `limit` (name, id) pairs whose names have a word
+        starting with each word of `text`, ignoring case.
+
+        Each word's range of the sorted word index is found by
+        bisection, and only the narrowest range is scanned. A one-word
+        search costs O(log n + limit). With more words, every entry of
+        that range may be checked against the other words, so a search
+        whose words are all common prefixes, e.g. "a e", can scan a
+        large part of the index.
+
+        Parameters:
+        -----------
+        entity(str) : The entity type, "employee" or "team".
+        text(str) : What the user typed, e.g. "cal ch".
+        limit(int) : The most matches to return.
+
+        Returns:
+        --------
+        list[tuple] : Matching (name, id) pairs, ordered by the word
+            matching the scanned word of `text`.
+        """
+        entities = self._entities().get(entity)
+        if entities is None:
+            return []
+        terms = name_words(text)
+        if not terms:
+            return entities.options[:limit]
+
+        # The words starting with a term sort between the term and
+        # the term followed by the largest character
+        index = entities.index
+        ranges = []
+        for term in terms:
+            start = bisect_left(index, (term,))
+            end = bisect_left(index, (term + "\U0010ffff",), start)
+            ranges.append((end - start, start, end, term))
+        _, position, end, scanned = min(ranges)
+        rest = [term for term in terms if term != scanned]
+
+        matches, seen = [], set()
+        while position < end and len(matches) < limit:
+            _, _, entity_id = index[position]
+            position += 1
+            if entity_id in seen:
+                continue
+            seen.add(entity_id)
+
+            name = entities.names[entity_id]
+            words = name_words(name)
+            if all(any(w.startswith(term) for w in words) for term in rest):
+                matches.append((name, entity_id))
+        return matches
+
+    def clear(self):
+        """
+        Forgets the loaded names, so the next lookup reloads them.
+        """
+        with self._lock:
+            self._snapshot = (None, {})
+
+
+# The directory of the dashboard's database
+directory = EntityDirectory()
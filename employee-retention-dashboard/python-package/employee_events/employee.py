@@ -2,7 +2,9 @@
 from .query_base import QueryBase
 
 # Import dependencies needed for sql execution
-from .sql_execution import QueryMixin
+from .sql_execution import QueryMixin, Statement
+from .cache import cached
+from .directory import directory
 
 # Define a subclass of QueryBase
 class Employee(QueryBase, QueryMixin):
@@ -16,10 +18,56 @@ class Employee(QueryBase, QueryMixin):
 
     name = "employee"
 
+    names_sql = Statement("""
+        SELECT (first_name || ' ' || last_name) AS full_name,
+            employee_id
+        FROM employee
+        ORDER BY last_name, first_name;
+        """)
+
+    model_data_sql = Statement("""
+        SELECT SUM(positive_events) positive_events,
+            SUM(negative_events) negative_events
+        FROM {name}
+        JOIN employee_events
+            USING({name}_id)
+        WHERE {name}.{name}_id = :id
+        """)
+
+    # Model features read from the lifetime totals rollup
+    model_data_rollup_sql = Statement("""
+        SELECT SUM(positive_events) positive_events,
+            SUM(negative_events) negative_events
+        FROM employee_totals
+        WHERE employee_id = :id
+        """)
+
+    model_data_many_sql = Statement("""
+        SELECT {name}_id,
+            SUM(positive_events) positive_events,
+            SUM(negative_events) negative_events
+        FROM {name}
+        JOIN employee_events
+            USING({name}_id)
+        WHERE {name}.{name}_id IN ({ids})
+        GROUP BY {name}_id
+        ORDER BY {name}_id
+        """)
+
+    model_data_many_rollup_sql = Statement("""
+        SELECT employee_id,
+            SUM(positive_events) positive_events,
+            SUM(negative_events) negative_events
+        FROM employee_totals
+        WHERE employee_id IN ({ids})
+        GROUP BY employee_id
+        ORDER BY employee_id
+        """)
 
     def names(self):
         """
-        Returns a list of all employees with their full names and IDs.
+        Returns a list of all employees with their full names and IDs,
+        from the in-memory entity directory.
         
         Returns:
         -------
@@ -27,13 +75,23 @@ class Employee(QueryBase, QueryMixin):
             - full name(srt)
             - employee ID (int)
         """
-        sql = """
-            SELECT (first_name || ' ' || last_name) AS full_name,
-                employee_id
-            FROM employee
-            ORDER BY last_name, first_name;
+        return directory.options(self.name)
+
+
+    def search(self, text: str, limit: int = 10):
         """
-        return self.query(sql)
+        Returns the employees with a name word starting with each word of `text`.
+
+        Parameters:
+        ----------
+        text(str) : What the user typed, matched case-insensitively.
+        limit(int) : The most matches to return.
+
+        Returns:
+        -------
+        list[tuple] : Up to `limit` (name, id) tuples.
+        """
+        return directory.search(self.name, text, limit)
     
 
     def user_name(self, id: int):
@@ -42,24 +100,30 @@ class Employee(QueryBase, QueryMixin):
         --------
         list[tuple] : A list containing a single tuple with the full name of the employee.
         """
-        sql = """
-            SELECT (first_name || ' ' || last_name) AS full_name
-            FROM employee
-            WHERE employee_id = {id};
-        """
-        return self.query(sql)
+        name = directory.name(self.name, id)
+        return [] if name is None else [(name,)]
 
 
+    @cached
     def model_data(self, id):
         """
         Returns aggregated event data for a specific employee.
         """
-        sql =f"""
-                SELECT SUM(positive_events) positive_events, 
-                    SUM(negative_events) negative_events
-                FROM {self.name}
-                JOIN employee_events
-                    USING({self.name}_id)
-                WHERE {self.name}.{self.name}_id = {id}
-            """
-        return self.pandas_query(sql)
\ No newline at end of file
+        statement = self.model_data_rollup_sql if self.has_rollups() else self.model_data_sql
+        return self.pandas_query(statement.sql(self.name), {"id": id})
+
+
+    def model_data_many(self, ids):
+        """
+        Returns aggregated event data for many employees from one batched query.
+
+        Returns:
+        --------
+        pandas.DataFrame: A DataFrame with one row per employee containing
+            - Employee ID
+            - Positive events count
+            - Negative events count
+        """
+        if self.has_rollups():
+            return self.pandas_query_many(self.model_data_many_rollup_sql, ids)
+        return self.pandas_query_many(self.model_data_many_sql, ids)
@@ -0,0 +1,188 @@
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+from typing import NamedTuple
+import pandas as pd
+
+from .sql_execution import db_path
+from .schema import COLUMNS
+from .rollups import rollup_watermark, update_rollups
+
+
+# PRAGMAs for the writer connection. WAL lets the dashboard's
+# read-only connections keep reading while a load is committed.
+WRITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 30_000,
+}
+
+# Upserts keyed on each table's primary key, and for notes on
+# the employee, date and text. Re-sending a row replaces it, so
+# a failed load can simply be run again.
+UPSERT_SQL = {
+    "team": """
+        INSERT INTO team (team_id, team_name, shift, manager_name)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (team_id) DO UPDATE SET
+            team_name = excluded.team_name,
+            shift = excluded.shift,
+            manager_name = excluded.manager_name
+        """,
+    "employee": """
+        INSERT INTO employee (employee_id, first_name, last_name, team_id)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (employee_id) DO UPDATE SET
+            first_name = excluded.first_name,
+            last_name = excluded.last_name,
+            team_id = excluded.team_id
+        """,
+    "employee_events": """
+        INSERT INTO employee_events (event_date, employee_id, team_id, positive_events, negative_events)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (employee_id, event_date) DO UPDATE SET
+            team_id = excluded.team_id,
+            positive_events = excluded.positive_events,
+            negative_events = excluded.negative_events
+        """,
+    "notes": """
+        INSERT INTO notes (employee_id, team_id, note, note_date)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (employee_id, note_date, note) DO UPDATE SET
+            team_id = excluded.team_id
+        """,
+}
+
+
+class IngestReport(NamedTuple):
+    """
+    Row counts and timing for one `ingest` call.
+    """
+    teams: int
+    employees: int
+    events: int
+    notes: int
+    seconds: float
+    full_rollup: bool
+
+    @property
+    def rows(self) -> int:
+        return self.teams + self.employees + self.events + self.notes
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def connect_writer(path=db_path) -> sqlite3.Connection:
+    """
+    Opens a writable connection in WAL mode.
+    """
+    connection = sqlite3.connect(path)
+    for pragma, value in WRITE_PRAGMAS.items():
+        connection.execute(f"PRAGMA {pragma} = {value}")
+    return connection
+
+
+def _rows(table: str, data) -> list:
+    # DataFrames are reduced to the table's columns; anything
+    # else is taken as rows already in `COLUMNS` order
+    if isinstance(data, pd.DataFrame):
+        return data[COLUMNS[table]].to_numpy(dtype=object).tolist()
+    return [tuple(row) for row in data]
+
+
+def ingest(events=(), notes=(), employees=(), teams=(), path=db_path) -> IngestReport:
+    """
+    Upserts a batch of events and notes and the employee and team
+    rows they refer to, all in one transaction.
+
+    The database is switched to WAL mode, so the dashboard keeps
+    serving the previous data until the batch commits. The rollup
+    tables are brought up to date in the same transaction; a batch
+    holding dates already rolled up triggers a full rollup rebuild.
+
+    Parameters:
+    -----------
+    events, notes, employees, teams(pandas.DataFrame | iterable) :
+        Rows for each table, as DataFrames or as tuples in the column
+        order of `employee_events.schema.COLUMNS`.
+    path(Path) : Path to the SQLite database.
+
+    Returns:
+    --------
+    IngestReport : Rows written per table, elapsed time and rows/sec.
+    """
+    batches = {
+        "team": _rows("team", teams),
+        "employee": _rows("employee", employees),
+        "employee_events": _rows("employee_events", events),
+        "notes": _rows("notes", notes),
+    }
+
+    start = time.perf_counter()
+    connection = connect_writer(path)
+    try:
+        # Take the write lock up front so the batch
+        # cannot fail halfway on a competing writer
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for table, rows in batches.items():
+                if rows:
+                    connection.executemany(UPSERT_SQL[table], rows)
+
+            watermark = rollup_watermark(connection)
+            full = False
+            if watermark is not None and batches["employee_events"]:
+                # event_date is the first column of an event row
+                full = min(row[0] for row in batches["employee_events"]) <= watermark
+                update_rollups(connection, full=full)
+
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.execute("PRAGMA optimize")
+    finally:
+        connection.close()
+
+    return IngestReport(
+        teams=len(batches["team"]),
+        employees=len(batches["employee"]),
+        events=len(batches["employee_events"]),
+        notes=len(batches["notes"]),
+        seconds=time.perf_counter() - start,
+        full_rollup=full,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Append a batch of CSV files to the employee_events database."
+    )
+    parser.add_argument("--events", type=Path, help="CSV of employee_events rows")
+    parser.add_argument("--notes", type=Path, help="CSV of notes rows")
+    parser.add_argument("--employees", type=Path, help="CSV of employee rows")
+    parser.add_argument("--teams", type=Path, help="CSV of team rows")
+    parser.add_argument("--db", type=Path, default=db_path, help="database to load into")
+    args = parser.parse_args(argv)
+
+    def read(path):
+        return pd.read_csv(path) if path else ()
+
+    report = ingest(
+        events=read(args.events),
+        notes=read(args.notes),
+        employees=read(args.employees),
+        teams=read(args.teams),
+        path=args.db,
+    )
+    print(
+        f"Loaded {report.rows} rows in {report.seconds:.2f}s "
+        f"({report.rows_per_second:,.0f} rows/sec)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # Import any dependencies needed to execute sql queries
 import pandas as pd
-from .sql_execution import QueryMixin
+from .sql_execution import QueryMixin, Statement
+from .cache import cached
 
 # Define a class called QueryBase
 class QueryBase(QueryMixin):
@@ -15,6 +16,88 @@ class QueryBase(QueryMixin):
 
     name: str = ""
 
+    # Statement templates shared by every subclass.
+    # `{name}` is the entity table; ids are bound as `:id`.
+    event_counts_sql = Statement("""
+        SELECT ee.event_date,
+            SUM(ee.positive_events) AS positive_events,
+            SUM(ee.negative_events) AS negative_events
+        FROM employee_events AS ee
+        JOIN {name} AS t
+        ON ee.{name}_id = t.{name}_id
+        WHERE t.{name}_id = :id
+        GROUP BY ee.event_date
+        ORDER BY ee.event_date;
+        """)
+
+    cumulative_event_counts_sql = Statement("""
+        SELECT ee.event_date,
+            SUM(SUM(ee.positive_events)) OVER (ORDER BY ee.event_date) AS positive_events,
+            SUM(SUM(ee.negative_events)) OVER (ORDER BY ee.event_date) AS negative_events
+        FROM employee_events AS ee
+        JOIN {name} AS t
+        ON ee.{name}_id = t.{name}_id
+        WHERE t.{name}_id = :id
+        GROUP BY ee.event_date
+        ORDER BY ee.event_date;
+        """)
+
+    # The same results read from the rollup tables, whose
+    # size grows with chart points rather than raw events
+    event_counts_rollup_sql = Statement("""
+        SELECT event_date, positive_events, negative_events
+        FROM {name}_daily_events
+        WHERE {name}_id = :id
+        ORDER BY event_date;
+        """)
+
+    cumulative_event_counts_rollup_sql = Statement("""
+        SELECT event_date,
+            cumulative_positive_events AS positive_events,
+            cumulative_negative_events AS negative_events
+        FROM {name}_daily_events
+        WHERE {name}_id = :id
+        ORDER BY event_date;
+        """)
+
+    notes_sql = Statement("""
+        SELECT n.note_date, n.note
+        FROM notes AS n
+        JOIN {name} AS t
+        ON n.{name}_id = t.{name}_id
+        WHERE t.{name}_id = :id
+        ORDER BY n.note_date;
+        """)
+
+    event_counts_many_sql = Statement("""
+        SELECT t.{name}_id,
+            ee.event_date,
+            SUM(ee.positive_events) AS positive_events,
+            SUM(ee.negative_events) AS negative_events
+        FROM employee_events AS ee
+        JOIN {name} AS t
+        ON ee.{name}_id = t.{name}_id
+        WHERE t.{name}_id IN ({ids})
+        GROUP BY t.{name}_id, ee.event_date
+        ORDER BY t.{name}_id, ee.event_date;
+        """)
+
+    event_counts_many_rollup_sql = Statement("""
+        SELECT {name}_id, event_date, positive_events, negative_events
+        FROM {name}_daily_events
+        WHERE {name}_id IN ({ids})
+        ORDER BY {name}_id, event_date;
+        """)
+
+    notes_many_sql = Statement("""
+        SELECT t.{name}_id, n.note_date, n.note
+        FROM notes AS n
+        JOIN {name} AS t
+        ON n.{name}_id = t.{name}_id
+        WHERE t.{name}_id IN ({ids})
+        ORDER BY t.{name}_id, n.note_date;
+        """)
+
     @staticmethod
     def names() -> list:
         """
@@ -27,6 +110,7 @@ class QueryBase(QueryMixin):
         return []
 
     # Define an `event_counts` method
+    @cached
     def event_counts(self, id: int) -> pd.DataFrame:
         """
         Returns the total positive and negative events grouped by date for a specific ID.
@@ -40,23 +124,34 @@ class QueryBase(QueryMixin):
         pandas.DataFrame : A DataFrame containing `event_date`, `total_positive_events`, and `total_negative_events`.
         """
 
-        id_col = f"{self.name}_id"
-        sql = f"""
-        SELECT ee.event_date,
-            SUM(ee.positive_events) AS positive_events,
-            SUM(ee.negative_events) AS negative_events
-        FROM employee_events AS ee
-        JOIN {self.name} AS t
-        ON ee.{id_col} = t.{id_col}
-        WHERE t.{id_col} = {id}
-        GROUP BY ee.event_date
-        ORDER BY ee.event_date;
+        statement = self.event_counts_rollup_sql if self.has_rollups() else self.event_counts_sql
+        return self.pandas_query(statement.sql(self.name), {"id": id})
+
+
+    @cached
+    def cumulative_event_counts(self, id: int) -> pd.DataFrame:
+        """
+        Returns the running totals of positive and negative events by date for a specific ID.
+
+        Parameters:
+        ----------
+        id(int) : The unique identifier for the employee or team.
+
+        Returns:
+        --------
+        pandas.DataFrame : A DataFrame containing `event_date` and the cumulative
+            `positive_events` and `negative_events` up to that date.
         """
-        return self.pandas_query(sql)
+        if self.has_rollups():
+            statement = self.cumulative_event_counts_rollup_sql
+        else:
+            statement = self.cumulative_event_counts_sql
+        return self.pandas_query(statement.sql(self.name), {"id": id})
             
     
 
     # Define a `notes` method that receives an id argument
+    @cached
     def notes(self, id: int) -> pd.DataFrame:
         """
         Returns notes associated with a specific ID, ordered by date.
@@ -69,13 +164,38 @@ class QueryBase(QueryMixin):
         -------
         pandas.DataFrame : A DataFrame containing `note_date` and `note`.
         """
-        id_col = f"{self.name}_id"
-        sql = f"""
-        SELECT n.note_date, n.note
-        FROM notes AS n
-        JOIN {self.name} AS t
-        ON n.{id_col} = t.{id_col}
-        WHERE t.{id_col} = {id}
-        ORDER BY n.note_date;
+        return self.pandas_query(self.notes_sql.sql(self.name), {"id": id})
+
+
+    def event_counts_many(self, ids) -> pd.DataFrame:
+        """
+        Returns the daily event totals for many IDs from one batched query.
+
+        Parameters:
+        ----------
+        ids(iterable[int]) : The unique identifiers for the employees or teams.
+
+        Returns:
+        --------
+        pandas.DataFrame : A long-format DataFrame containing `<name>_id`,
+            `event_date`, `positive_events` and `negative_events`.
+        """
+        if self.has_rollups():
+            return self.pandas_query_many(self.event_counts_many_rollup_sql, ids)
+        return self.pandas_query_many(self.event_counts_many_sql, ids)
+
+
+    def notes_many(self, ids) -> pd.DataFrame:
+        """
+        Returns the notes for many IDs from one batched query.
+
+        Parameters:
+        ----------
+        ids(iterable[int]) : The unique identifiers for the employees or teams.
+
+        Returns:
+        -------
+        pandas.DataFrame : A long-format DataFrame containing `<name>_id`,
+            `note_date` and `note`.
         """
-        return self.pandas_query(sql)
+        return self.pandas_query_many(self.notes_many_sql, ids)
@@ -0,0 +1,190 @@
+import sqlite3
+import threading
+
+from .sql_execution import connections
+
+
+# Entity types that get a daily rollup table, `<name>_daily_events`
+ENTITIES = ("employee", "team")
+
+TABLES = {
+    # Daily totals per entity with running cumulative totals,
+    # clustered on (<name>_id, event_date) for the line chart
+    **{
+        f"{name}_daily_events": f"""
+            CREATE TABLE IF NOT EXISTS {name}_daily_events (
+                {name}_id INTEGER NOT NULL,
+                event_date TEXT NOT NULL,
+                positive_events INTEGER NOT NULL,
+                negative_events INTEGER NOT NULL,
+                cumulative_positive_events INTEGER NOT NULL,
+                cumulative_negative_events INTEGER NOT NULL,
+                PRIMARY KEY ({name}_id, event_date)
+            ) WITHOUT ROWID
+            """
+        for name in ENTITIES
+    },
+    # Lifetime totals per employee and team, the model's features
+    "employee_totals": """
+        CREATE TABLE IF NOT EXISTS employee_totals (
+            employee_id INTEGER NOT NULL,
+            team_id INTEGER NOT NULL,
+            positive_events INTEGER NOT NULL,
+            negative_events INTEGER NOT NULL,
+            PRIMARY KEY (employee_id, team_id)
+        ) WITHOUT ROWID
+        """,
+    # The last event date folded into the rollups
+    "rollup_state": """
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            watermark TEXT NOT NULL
+        )
+        """,
+}
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_employee_totals_team ON employee_totals (team_id)",
+]
+
+# Appends the days after the watermark. The running totals continue
+# from each entity's last rollup row; SQLite fills the bare
+# cumulative columns from the row holding MAX(event_date).
+DAILY_REFRESH_SQL = """
+    INSERT INTO {name}_daily_events
+    SELECT d.{name}_id,
+        d.event_date,
+        d.positive_events,
+        d.negative_events,
+        COALESCE(p.cumulative_positive_events, 0)
+            + SUM(d.positive_events) OVER running,
+        COALESCE(p.cumulative_negative_events, 0)
+            + SUM(d.negative_events) OVER running
+    FROM (
+        SELECT {name}_id,
+            event_date,
+            SUM(positive_events) AS positive_events,
+            SUM(negative_events) AS negative_events
+        FROM employee_events
+        WHERE event_date > :watermark
+        GROUP BY {name}_id, event_date
+    ) AS d
+    LEFT JOIN (
+        SELECT {name}_id,
+            MAX(event_date),
+            cumulative_positive_events,
+            cumulative_negative_events
+        FROM {name}_daily_events
+        GROUP BY {name}_id
+    ) AS p
+    USING ({name}_id)
+    WINDOW running AS (PARTITION BY d.{name}_id ORDER BY d.event_date)
+    """
+
+TOTALS_REFRESH_SQL = """
+    INSERT INTO employee_totals
+    SELECT employee_id,
+        team_id,
+        SUM(positive_events),
+        SUM(negative_events)
+    FROM employee_events
+    WHERE event_date > :watermark
+    GROUP BY employee_id, team_id
+    ON CONFLICT (employee_id, team_id) DO UPDATE SET
+        positive_events = positive_events + excluded.positive_events,
+        negative_events = negative_events + excluded.negative_events
+    """
+
+
+def drop_rollups(connection: sqlite3.Connection):
+    """
+    Drops every rollup table.
+    """
+    for table in TABLES:
+        connection.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def refresh_rollups(connection: sqlite3.Connection, full: bool = False) -> int:
+    """
+    Folds events newer than the rollup watermark into the rollup tables.
+
+    Only dates after the watermark are read, so a refresh after a
+    nightly load costs as much as the new days. Events inserted for
+    dates at or before the watermark need a `full` rebuild.
+
+    Parameters:
+    -----------
+    connection(sqlite3.Connection) : Writable connection to the database.
+    full(bool) : Drop and rebuild the rollups from the whole history.
+
+    Returns:
+    --------
+    int : The number of daily rollup rows added.
+    """
+    with connection:
+        return update_rollups(connection, full)
+
+
+def rollup_watermark(connection: sqlite3.Connection):
+    """
+    Returns the last event date folded into the rollups,
+    or `None` if the database has no rollups.
+    """
+    try:
+        row = connection.execute("SELECT watermark FROM rollup_state").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def update_rollups(connection: sqlite3.Connection, full: bool = False) -> int:
+    """
+    Does the work of `refresh_rollups` inside the caller's transaction.
+    """
+    if full:
+        drop_rollups(connection)
+    for ddl in [*TABLES.values(), *INDEXES]:
+        connection.execute(ddl)
+
+    watermark = rollup_watermark(connection) or ""
+
+    added = 0
+    for name in ENTITIES:
+        cursor = connection.execute(
+            DAILY_REFRESH_SQL.format(name=name), {"watermark": watermark}
+        )
+        added += cursor.rowcount
+    connection.execute(TOTALS_REFRESH_SQL, {"watermark": watermark})
+
+    connection.execute(
+        """
+        INSERT INTO rollup_state (id, watermark)
+        SELECT 1, COALESCE(MAX(event_date), :watermark) FROM employee_events
+        WHERE true
+        ON CONFLICT (id) DO UPDATE SET watermark = excluded.watermark
+        """,
+        {"watermark": watermark},
+    )
+    return added
+
+
+_available = {}
+_available_lock = threading.Lock()
+
+
+def rollups_available() -> bool:
+    """
+    Returns whether the database has rollup tables,
+    checking again only when the data version changes.
+    """
+    version = connections.data_version()
+    available = _available.get(version)
+    if available is None:
+        row = connections.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'rollup_state'"
+        ).fetchone()
+        available = bool(row[0])
+        with _available_lock:
+            _available.clear()
+            _available[version] = available
+    return available
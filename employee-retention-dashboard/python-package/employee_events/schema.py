@@ -0,0 +1,212 @@
+import sqlite3
+import sys
+from pathlib import Path
+import pandas as pd
+
+from .sql_execution import db_path
+from .rollups import refresh_rollups
+
+
+# Table definitions, in dependency order.
+#
+# `employee_events` is a WITHOUT ROWID table clustered on
+# (employee_id, event_date), so the table itself is the covering
+# index for per-employee lookups and doubles as the upsert key.
+TABLES = {
+    "team": """
+        CREATE TABLE team (
+            team_id INTEGER PRIMARY KEY,
+            team_name TEXT NOT NULL,
+            shift TEXT,
+            manager_name TEXT
+        )
+        """,
+    "employee": """
+        CREATE TABLE employee (
+            employee_id INTEGER PRIMARY KEY,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            team_id INTEGER REFERENCES team (team_id)
+        )
+        """,
+    "employee_events": """
+        CREATE TABLE employee_events (
+            event_date TEXT NOT NULL,
+            employee_id INTEGER NOT NULL REFERENCES employee (employee_id),
+            team_id INTEGER NOT NULL REFERENCES team (team_id),
+            positive_events INTEGER NOT NULL DEFAULT 0,
+            negative_events INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (employee_id, event_date)
+        ) WITHOUT ROWID
+        """,
+    "notes": """
+        CREATE TABLE notes (
+            note_id INTEGER PRIMARY KEY,
+            employee_id INTEGER NOT NULL REFERENCES employee (employee_id),
+            team_id INTEGER NOT NULL REFERENCES team (team_id),
+            note TEXT NOT NULL,
+            note_date TEXT NOT NULL
+        )
+        """,
+    # Whether each employee was recruited away, the model's training label
+    "employee_labels": """
+        CREATE TABLE employee_labels (
+            employee_id INTEGER PRIMARY KEY REFERENCES employee (employee_id),
+            recruited INTEGER NOT NULL
+        )
+        """,
+}
+
+# Columns written for each table, in insert order
+COLUMNS = {
+    "team": ["team_id", "team_name", "shift", "manager_name"],
+    "employee": ["employee_id", "first_name", "last_name", "team_id"],
+    "employee_events": ["event_date", "employee_id", "team_id", "positive_events", "negative_events"],
+    "notes": ["employee_id", "team_id", "note", "note_date"],
+    "employee_labels": ["employee_id", "recruited"],
+}
+
+# The columns identifying a note
+NOTE_KEY = ["employee_id", "note_date", "note"]
+
+# Indexes serving the `WHERE <name>_id = ?` filters in QueryBase.
+# The event indexes carry the event counts so both entity types
+# are answered from the index without touching the table. The
+# per-employee notes index is unique: a note is keyed on its
+# employee, date and text, which is the upsert key for notes.
+INDEXES = {
+    "ix_employee_events_team_date": """
+        CREATE INDEX IF NOT EXISTS ix_employee_events_team_date
+        ON employee_events (team_id, event_date, employee_id, positive_events, negative_events)
+        """,
+    "ix_notes_employee_date": """
+        CREATE UNIQUE INDEX IF NOT EXISTS ix_notes_employee_date
+        ON notes (employee_id, note_date, note)
+        """,
+    "ix_notes_team_date": "CREATE INDEX IF NOT EXISTS ix_notes_team_date ON notes (team_id, note_date)",
+    "ix_employee_name": "CREATE INDEX IF NOT EXISTS ix_employee_name ON employee (last_name, first_name)",
+    "ix_team_name": "CREATE INDEX IF NOT EXISTS ix_team_name ON team (team_name)",
+}
+
+
+def create_tables(connection: sqlite3.Connection):
+    """
+    Drops and recreates every table in `TABLES`.
+    """
+    for table in reversed(list(TABLES)):
+        connection.execute(f"DROP TABLE IF EXISTS {table}")
+    for ddl in TABLES.values():
+        connection.execute(ddl)
+
+
+def create_indexes(connection: sqlite3.Connection):
+    """
+    Creates every index in `INDEXES` that does not exist yet.
+    """
+    for ddl in INDEXES.values():
+        connection.execute(ddl)
+
+
+def insert_frame(connection: sqlite3.Connection, table: str, frame: pd.DataFrame):
+    """
+    Appends the rows of `frame` to `table` with `executemany`.
+    """
+    columns = COLUMNS[table]
+    placeholders = ", ".join("?" * len(columns))
+    connection.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+        # object dtype turns numpy scalars into Python values sqlite3 can bind
+        frame[columns].to_numpy(dtype=object).tolist(),
+    )
+
+
+def insert_chunks(connection: sqlite3.Connection, table: str, frames) -> int:
+    """
+    Appends a DataFrame, or each DataFrame of an iterable, to `table`,
+    committing after every one, so a table can be loaded from a stream
+    of chunks without holding it in memory.
+
+    Returns:
+    --------
+    int : The number of rows inserted.
+    """
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    rows = 0
+    for frame in frames:
+        with connection:
+            insert_frame(connection, table, frame)
+        rows += len(frame)
+    return rows
+
+
+def build_database(connection: sqlite3.Connection, employee, team, notes, events, labels=None):
+    """
+    Writes the tables with keys and indexes, rebuilds
+    the rollup tables, then runs ANALYZE.
+
+    Parameters:
+    -----------
+    connection(sqlite3.Connection) : Writable connection to the database.
+    employee, team(pandas.DataFrame) : Table contents, with at
+        least the columns listed in `COLUMNS`.
+    notes, events(pandas.DataFrame or iterable) : Table contents, or an
+        iterable of DataFrame chunks committed one at a time.
+    labels(pandas.DataFrame) : Optional training labels; the
+        `employee_labels` table is left empty without them.
+    """
+    with connection:
+        create_tables(connection)
+        insert_frame(connection, "team", team)
+        insert_frame(connection, "employee", employee)
+        if labels is not None:
+            insert_frame(connection, "employee_labels", labels)
+
+    insert_chunks(connection, "employee_events", events)
+    insert_chunks(connection, "notes", notes)
+
+    # Indexes are built after loading, which is
+    # much faster than maintaining them row by row
+    with connection:
+        create_indexes(connection)
+
+    refresh_rollups(connection, full=True)
+
+    # Give the query planner row counts for the new indexes
+    connection.execute("ANALYZE")
+
+
+def migrate(path=db_path):
+    """
+    Rebuilds an existing database in place with the keyed,
+    indexed schema, keeping its rows.
+    """
+    connection = sqlite3.connect(path)
+    try:
+        # Databases built before a table was added are migrated without it
+        existing = {
+            name for (name,) in
+            connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+        tables = {
+            table: pd.read_sql_query(f"SELECT * FROM {table}", connection)
+            for table in TABLES
+            if table in existing
+        }
+        # Older databases may repeat a note, which its key now rejects
+        tables["notes"] = tables["notes"].drop_duplicates(NOTE_KEY)
+        build_database(
+            connection,
+            employee=tables["employee"],
+            team=tables["team"],
+            notes=tables["notes"],
+            events=tables["employee_events"],
+            labels=tables.get("employee_labels"),
+        )
+        connection.execute("VACUUM")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    migrate(Path(sys.argv[1]) if len(sys.argv) > 1 else db_path)
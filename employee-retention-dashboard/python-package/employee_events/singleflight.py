@@ -0,0 +1,156 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import NamedTuple
+
+
+class FlightStats(NamedTuple):
+    """
+    Statistics reported by `SingleFlight.stats()`.
+
+    Attributes:
+    -----------
+    calls(int) : Calls made, led or joined.
+    executions(int) : Calls that ran the function.
+    coalesced(int) : Calls that waited on another call's result.
+    in_flight(int) : Keys being computed right now.
+    peak_waiters(int) : Most calls that ever waited on one computation.
+    """
+    calls: int
+    executions: int
+    coalesced: int
+    in_flight: int
+    peak_waiters: int
+
+
+# Set as a flight's result when its leading call is cancelled, so
+# the waiting calls run the function themselves instead of failing
+_ABANDONED = object()
+
+
+class _Flight:
+    """
+    One in-flight computation and the number of calls waiting on it.
+    """
+
+    def __init__(self):
+        self.future = Future()
+        # A running future cannot be cancelled, so a waiter that is
+        # cancelled (e.g. its client disconnected) leaves it intact
+        self.future.set_running_or_notify_cancel()
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first call
+    runs the function, and calls made while it runs wait for its
+    result, or its exception, instead of running it again.
+
+    Nothing is kept once a call finishes, so a later call with
+    the same key runs the function again. Results are shared
+    between the callers and must be treated as read-only.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._calls = self._executions = self._coalesced = self._peak_waiters = 0
+
+    def _join(self, key):
+        """
+        Returns the flight for `key` and whether the caller leads it.
+        """
+        with self._lock:
+            self._calls += 1
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self._executions += 1
+                return flight, True
+
+            flight.waiters += 1
+            self._coalesced += 1
+            self._peak_waiters = max(self._peak_waiters, flight.waiters)
+            return flight, False
+
+    def _land(self, key, flight, result=None, error=None):
+        # Remove the flight before waking the waiters, so
+        # calls made from now on compute a fresh result
+        with self._lock:
+            del self._flights[key]
+        if error is None:
+            flight.future.set_result(result)
+        else:
+            flight.future.set_exception(error)
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Returns `fn(*args, **kwargs)`, sharing the result with
+        concurrent calls made with the same key.
+
+        Parameters:
+        -----------
+        key(hashable) : Identifies the computation, e.g. a query and its arguments.
+        fn(callable) : The computation.
+
+        Returns:
+        --------
+        The result of `fn`. Its exception is raised in every waiting call.
+        """
+        flight, leader = self._join(key)
+        while not leader:
+            result = flight.future.result()
+            if result is not _ABANDONED:
+                return result
+            flight, leader = self._join(key)
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as error:
+            self._land(key, flight, error=error)
+            raise
+        self._land(key, flight, result)
+        return result
+
+    async def ado(self, key, fn, *args, **kwargs):
+        """
+        Async `do`, for a coroutine function `fn`. Waiting calls
+        yield to the event loop instead of blocking it.
+
+        A cancelled waiting call does not affect the others. When the
+        leading call is cancelled, a waiting call takes over the lead.
+        """
+        flight, leader = self._join(key)
+        while not leader:
+            # Shielded, so cancelling this call leaves the shared future alone
+            result = await asyncio.shield(asyncio.wrap_future(flight.future))
+            if result is not _ABANDONED:
+                return result
+            flight, leader = self._join(key)
+
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            # The cancellation is this call's, not a result to share
+            self._land(key, flight, _ABANDONED)
+            raise
+        except BaseException as error:
+            self._land(key, flight, error=error)
+            raise
+        self._land(key, flight, result)
+        return result
+
+    def stats(self) -> FlightStats:
+        """
+        Returns the call, execution and coalescing counts.
+        """
+        with self._lock:
+            return FlightStats(
+                self._calls, self._executions, self._coalesced,
+                len(self._flights), self._peak_waiters,
+            )
+
+
+# Coalesces the query methods decorated with `cached`
+query_flights = SingleFlight()
@@ -1,65 +1,408 @@
-from sqlite3 import connect
+import os
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
 from pathlib import Path
 from functools import wraps
+from textwrap import dedent
+from typing import NamedTuple
 import pandas as pd
 
 db_path = Path(__file__).parent / "employee_events.db"
 
+# PRAGMAs applied to every read connection when it is opened.
+# The dashboard only ever reads, so the connection is locked to
+# `query_only` and given a large page cache and memory map so
+# hot pages stay resident between requests.
+READ_PRAGMAS = {
+    "query_only": "ON",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -16 * 1024,
+    "temp_store": "MEMORY",
+}
+
+# Number of prepared statements sqlite3 keeps per connection
+STATEMENT_CACHE_SIZE = 128
+
+# Ids bound per statement by the batched `*_many` queries. This stays
+# under the 999 host-parameter limit of older SQLite builds, and every
+# batch is padded to the same size so all batches share one statement.
+BATCH_SIZE = 500
+
+
+class StatementCacheInfo(NamedTuple):
+    """
+    Estimated hit/miss counters for the per-connection prepared-statement
+    cache, shaped like `functools.lru_cache`'s `cache_info()`.
+    """
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class Statement:
+    """
+    A parameterised SQL statement template.
+
+    Table and column identifiers (`{name}`) cannot be bound, so they are
+    formatted into the template once per entity type. Batched statements
+    also take an `{ids}` placeholder list. Values are always
+    passed as bound parameters, which keeps the SQL text identical across
+    ids and lets sqlite3 reuse the prepared statement.
+
+    Attributes:
+    -----------
+    template(str) : The SQL text with `{name}` identifier placeholders.
+    """
+
+    def __init__(self, template: str):
+        self.template = dedent(template).strip()
+        self._rendered = {}
+
+    def sql(self, name: str = "", ids: int = 0) -> str:
+        """
+        Returns the statement text for the given entity name,
+        with `ids` placeholders in its `{ids}` list.
+        """
+        sql = self._rendered.get((name, ids))
+        if sql is None:
+            placeholders = ", ".join("?" * ids)
+            sql = self.template.format(name=name, ids=placeholders)
+            self._rendered[(name, ids)] = sql
+        return sql
+
+
+class _StatementTracker:
+    """
+    One thread's mirror of its connection's statement cache. It is
+    only touched by its own thread, so counting needs no lock.
+    """
+
+    def __init__(self):
+        self.statements = OrderedDict()
+        self.hits = self.misses = 0
+
+    def track(self, sql: str):
+        # sqlite3's cache is an LRU keyed on the exact SQL text
+        if sql in self.statements:
+            self.statements.move_to_end(sql)
+            self.hits += 1
+        else:
+            self.statements[sql] = None
+            if len(self.statements) > STATEMENT_CACHE_SIZE:
+                self.statements.popitem(last=False)
+            self.misses += 1
+
+
+class _StatementCounts:
+    """
+    The trackers of the threads with an open connection, and
+    the counts of the trackers retired with their connection.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.trackers = set()
+        self.hits = self.misses = 0
+
+    def retire(self, tracker: _StatementTracker):
+        with self.lock:
+            self.trackers.discard(tracker)
+            self.hits += tracker.hits
+            self.misses += tracker.misses
+
+
+class _Holder:
+    """
+    One thread's connection, kept in the manager's thread-local
+    store. Its finalizer closes the connection once the store
+    drops it, e.g. when the thread exits.
+    """
+
+    def __init__(self, connection, generation, tracker, counts):
+        self.connection = connection
+        self.generation = generation
+        self.tracker = tracker
+        # The finalizer holds the connection, not the holder
+        self.close = weakref.finalize(self, _close, connection, tracker, counts)
+
+
+def _close(connection, tracker, counts):
+    connection.close()
+    counts.retire(tracker)
+
+
+class ConnectionManager:
+    """
+    Keeps one long-lived, read-only SQLite connection per thread.
+
+    Opening a connection and warming its page cache costs more than
+    the queries the dashboard runs, so connections are created once
+    per worker thread and reused for every later query on that thread.
+    A thread's connection is closed when the thread exits.
+
+    Attributes:
+    -----------
+    path(Path) : Path to the SQLite database.
+    pragmas(dict) : PRAGMAs applied when a connection is opened.
+    """
+
+    def __init__(self, path=db_path, pragmas=None):
+        self.path = Path(path)
+        self.pragmas = READ_PRAGMAS if pragmas is None else pragmas
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counts = _StatementCounts()
+        self._file_id = None
+        self._generation = 0
+
+    def _open(self) -> sqlite3.Connection:
+        # Read-only URI mode: the file is never created or written
+        uri = f"{self.path.resolve().as_uri()}?mode=ro"
+
+        # check_same_thread is disabled only so a connection can be
+        # closed by its finalizer, which may run on another thread
+        # once the thread that used it has exited.
+        con = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma, value in self.pragmas.items():
+            con.execute(f"PRAGMA {pragma} = {value}")
+        return con
+
+    def _holder(self) -> _Holder:
+        holder = getattr(self._local, "holder", None)
+        if holder is not None and holder.generation != self._generation:
+            # The database file was replaced, or `close_all` was
+            # called, since this connection was opened
+            holder.close()
+            holder = None
+        if holder is None:
+            # A new connection starts with an empty statement cache
+            tracker = _StatementTracker()
+            with self._counts.lock:
+                self._counts.trackers.add(tracker)
+            holder = _Holder(self._open(), self._generation, tracker, self._counts)
+            self._local.holder = holder
+        return holder
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Returns the connection owned by the calling thread,
+        opening it on first use.
+        """
+        return self._holder().connection
+
+    def close_all(self):
+        """
+        Retires every connection opened by this manager. The calling
+        thread's connection is closed now. Other threads may be in the
+        middle of a query, so each closes its own connection on its
+        next query, or when it exits, and transparently reconnects.
+        """
+        with self._lock:
+            self._generation += 1
+        holder = getattr(self._local, "holder", None)
+        if holder is not None:
+            del self._local.holder
+            holder.close()
+
+    def data_version(self) -> tuple:
+        """
+        Returns a token that changes whenever the database changes.
+
+        The token is built from the file's inode, size and modification
+        time plus those of its write-ahead log, so it changes on every
+        committed write and when the file is replaced outright. A new
+        inode also retires the open connections, which would otherwise
+        keep reading the old file.
+        """
+        stat = os.stat(self.path)
+        try:
+            wal = os.stat(f"{self.path}-wal")
+            wal_version = (wal.st_size, wal.st_mtime_ns)
+        except FileNotFoundError:
+            wal_version = ()
+
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id:
+            with self._lock:
+                if self._file_id is not None:
+                    self._generation += 1
+                self._file_id = file_id
+
+        return (*file_id, stat.st_size, stat.st_mtime_ns, *wal_version)
+
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        """
+        Executes `sql` with bound `params` on the calling thread's connection.
+        """
+        con = self.connection()
+        self.track(sql)
+        return con.execute(sql, params)
+
+    def track(self, sql: str):
+        """
+        Counts a statement about to run on the calling thread's
+        connection in `statement_cache_info`. `execute` calls this
+        itself; callers running SQL on `connection()` directly, such
+        as through pandas, call it before each statement.
+        """
+        self._holder().tracker.track(sql)
+
+    def statement_cache_info(self) -> StatementCacheInfo:
+        """
+        Returns estimated hit/miss counters for the prepared-statement cache.
+
+        sqlite3 does not expose its statement cache, so these come from
+        mirroring its LRU eviction for the statements passed to `track`.
+        Statements run without it are not counted. Hits and misses are
+        summed over all threads; `currsize` is the calling thread's cache.
+        """
+        counts = self._counts
+        with counts.lock:
+            trackers = list(counts.trackers)
+            hits, misses = counts.hits, counts.misses
+        holder = getattr(self._local, "holder", None)
+        return StatementCacheInfo(
+            hits + sum(t.hits for t in trackers),
+            misses + sum(t.misses for t in trackers),
+            STATEMENT_CACHE_SIZE,
+            0 if holder is None else len(holder.tracker.statements),
+        )
+
+    def statement_cache_clear(self):
+        """
+        Resets the hit/miss counters.
+        """
+        counts = self._counts
+        with counts.lock:
+            counts.hits = counts.misses = 0
+            for tracker in counts.trackers:
+                tracker.hits = tracker.misses = 0
+
+
+# The shared manager used by `Employee`, `Team` and the `query` decorator
+connections = ConnectionManager()
+
+
 # Define a class called `QueryMixin`
 class QueryMixin:
-    
+
     """
     A mixin class providing methods to execute SQL queries
     and returns results as pandas DataFrames or lists of tuples.
+
+    Attributes:
+    -----------
+    result_cache(ResultCache) : Opt-in cache for methods decorated
+        with `employee_events.cache.cached`. `None` disables caching.
     """
-    
-    def pandas_query(self, sql_query: str) -> pd.DataFrame:
+
+    result_cache = None
+
+    def data_version(self) -> tuple:
+        """
+        Returns a token that changes whenever the database changes.
+        """
+        return connections.data_version()
+
+    def has_rollups(self) -> bool:
+        """
+        Returns whether the precomputed rollup tables are available.
+        """
+        # Imported here because the rollups module depends on this one
+        from .rollups import rollups_available
+        return rollups_available()
+
+    def pandas_query(self, sql_query: str, params=()) -> pd.DataFrame:
         """
         Excutes a SQL query and returns the result as a pandas DataFrame.
-        
+
         Parameters:
         -----------
         sql_query(str) : The SQL query to be executed.
-        
+        params(tuple | dict) : Values bound to the query's placeholders.
+
         Returns:
         --------
         pandas.DataFrame : The query result as a DataFrame.
         """
-        with connect(db_path) as con:
-            return pd.read_sql_query(sql_query, con)
+        con = connections.connection()
+        connections.track(sql_query)
+        return pd.read_sql_query(sql_query, con, params=params)
 
-    def query(self, sql_query: str):
+    def pandas_query_many(self, statement: Statement, ids, batch_size: int = BATCH_SIZE) -> pd.DataFrame:
+        """
+        Runs a batched statement over a collection of ids and returns
+        the concatenated result as one long-format DataFrame ordered by id.
+
+        The ids are bound in batches of `batch_size`, so any number of
+        ids can be queried without hitting SQLite's variable limit.
+
+        Parameters:
+        -----------
+        statement(Statement) : A statement with an `IN ({ids})` filter.
+        ids(iterable) : The entity ids to query.
+        batch_size(int) : Number of ids bound per statement.
+
+        Returns:
+        --------
+        pandas.DataFrame : The rows for every id.
+        """
+        sql = statement.sql(self.name, batch_size)
+        # Sorted so the batches, each ordered by id, concatenate in order
+        ids = sorted(set(ids))
+
+        frames = []
+        # Always run at least once so an empty id list still
+        # returns a frame with the statement's columns
+        for start in range(0, max(len(ids), 1), batch_size):
+            batch = ids[start:start + batch_size]
+            # Pad short batches with NULLs, which never match
+            batch += [None] * (batch_size - len(batch))
+            frames.append(self.pandas_query(sql, batch))
+
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True)
+
+    def query(self, sql_query: str, params=()):
         """
         Executes a SQL query and returns the result as a list of tuples.
-        
+
         Parameters:
         ----------
         sql_query(str) : The SQL query to excute.
-        
+        params(tuple | dict) : Values bound to the query's placeholders.
+
         Returns:
         --------
         list[tuple] : The query result as list of tuples.
         """
-        print(f"Executing SQL Query: {sql_query}")
-        print(f"Using Database Path: {db_path}")
-        with connect(db_path) as con:
-            cur = con.cursor()
-            return cur.execute(sql_query).fetchall()
+        return connections.execute(sql_query, params).fetchall()
 
 
 def query(func):
     """
     Decorator that runs a standard sql execution
-    and returns a list of tuples
+    and returns a list of tuples.
+
+    The decorated function returns either the SQL text or
+    a `(sql, params)` tuple of SQL text and bound values.
     """
 
     @wraps(func)
     def run_query(*args, **kwargs):
         query_string = func(*args, **kwargs)
-        connection = connect(db_path)
-        cursor = connection.cursor()
-        result = cursor.execute(query_string).fetchall()
-        connection.close()
-        return result
-    
+        params = ()
+        if isinstance(query_string, tuple):
+            query_string, params = query_string
+        return connections.execute(query_string, params).fetchall()
+
     return run_query
@@ -2,7 +2,9 @@
 from .query_base import QueryBase
 
 # Import dependencies for sql execution
-from .sql_execution import QueryMixin
+from .sql_execution import QueryMixin, Statement
+from .cache import cached
+from .directory import directory
 
 # Create a subclass of QueryBase
 class Team(QueryBase, QueryMixin):
@@ -15,9 +17,58 @@ class Team(QueryBase, QueryMixin):
     """
     name = "team"
 
+    names_sql = Statement("""
+        SELECT team_name, team_id
+        FROM team
+        ORDER BY team_name;
+        """)
+
+    model_data_sql = Statement("""
+        SELECT positive_events, negative_events FROM (
+                SELECT employee_id
+                     , SUM(positive_events) positive_events
+                     , SUM(negative_events) negative_events
+                FROM {name}
+                JOIN employee_events
+                    USING({name}_id)
+                WHERE {name}.{name}_id = :id
+                GROUP BY employee_id
+               )
+        """)
+
+    # Model features read from the lifetime totals rollup
+    model_data_rollup_sql = Statement("""
+        SELECT positive_events, negative_events
+        FROM employee_totals
+        WHERE team_id = :id
+        """)
+
+    model_data_many_sql = Statement("""
+        SELECT {name}_id, positive_events, negative_events FROM (
+                SELECT {name}.{name}_id
+                     , employee_id
+                     , SUM(positive_events) positive_events
+                     , SUM(negative_events) negative_events
+                FROM {name}
+                JOIN employee_events
+                    USING({name}_id)
+                WHERE {name}.{name}_id IN ({ids})
+                GROUP BY {name}.{name}_id, employee_id
+               )
+        ORDER BY {name}_id
+        """)
+
+    model_data_many_rollup_sql = Statement("""
+        SELECT team_id, positive_events, negative_events
+        FROM employee_totals
+        WHERE team_id IN ({ids})
+        ORDER BY team_id
+        """)
+
     def names(self):
         """
-        Returns a list of all teams with thier names and IDs.
+        Returns a list of all teams with thier names and IDs,
+        from the in-memory entity directory.
         
         Returns:
         --------
@@ -25,12 +76,23 @@ class Team(QueryBase, QueryMixin):
             - Team name (str)
             - Team ID (int)
         """
-        sql = """
-            SELECT team_name, team_id
-            FROM team
-            ORDER BY team_name;
+        return directory.options(self.name)
+
+
+    def search(self, text: str, limit: int = 10):
+        """
+        Returns the teams with a name word starting with each word of `text`.
+
+        Parameters:
+        ----------
+        text(str) : What the user typed, matched case-insensitively.
+        limit(int) : The most matches to return.
+
+        Returns:
+        -------
+        list[tuple] : Up to `limit` (name, id) tuples.
         """
-        return self.query(sql)
+        return directory.search(self.name, text, limit)
     
 
     def username(self, id: int):
@@ -41,14 +103,11 @@ class Team(QueryBase, QueryMixin):
         --------
         list[tuple] : A list containing a single tuple with the team name.
         """
-        sql = f"""
-            SELECT team_name
-            FROM team
-            WHERE team_id = {id};
-        """
-        return self.query(sql)
+        name = directory.name(self.name, id)
+        return [] if name is None else [(name,)]
 
 
+    @cached
     def model_data(self, id):
         """
         Returns model data for a given team.
@@ -59,16 +118,21 @@ class Team(QueryBase, QueryMixin):
             - Positive events count
             - Negative events count
         """
-        sql = f"""
-            SELECT positive_events, negative_events FROM (
-                    SELECT employee_id
-                         , SUM(positive_events) positive_events
-                         , SUM(negative_events) negative_events
-                    FROM {self.name}
-                    JOIN employee_events
-                        USING({self.name}_id)
-                    WHERE {self.name}.{self.name}_id = {id}
-                    GROUP BY employee_id
-                   )
+        statement = self.model_data_rollup_sql if self.has_rollups() else self.model_data_sql
+        return self.pandas_query(statement.sql(self.name), {"id": id})
+
+
+    def model_data_many(self, ids):
+        """
+        Returns model data for many teams from one batched query.
+
+        Returns:
+        --------
+        pandas.DataFrame: A DataFrame with one row per team member containing
+            - Team ID
+            - Positive events count
+            - Negative events count
         """
-        return self.pandas_query(sql)
\ No newline at end of file
+        if self.has_rollups():
+            return self.pandas_query_many(self.model_data_many_rollup_sql, ids)
+        return self.pandas_query_many(self.model_data_many_sql, ids)
@@ -2,4 +2,8 @@ from .base_component import BaseComponent
 from .dropdown import Dropdown
 from .radio import Radio
 from .matplotlib_viz import MatplotlibViz
-from .data_table import DataTable
\ No newline at end of file
+from .data_table import DataTable
+from .chart_cache import ChartCache, RenderedChart
+from .render_pool import RenderPool
+from .figure_pool import FigurePool
+from .fragment_cache import FragmentCache, FragmentCaching
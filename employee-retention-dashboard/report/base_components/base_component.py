@@ -1,4 +1,9 @@
-class BaseComponent:
+import asyncio
+
+from .fragment_cache import FragmentCaching
+
+
+class BaseComponent(FragmentCaching):
 
     def build_component(self, entity_id, model):
         raise NotImplementedError
@@ -12,6 +17,17 @@ class BaseComponent:
 
     def __call__(self, entity_id, model):
 
+        # Served from the fragment cache when the subclass sets `fragment_key`
+        return self.cached_fragment(entity_id, model, self.call_component)
+
+    def call_component(self, entity_id, model):
+
         component = self.build_component(entity_id, model)
 
-        return self.outer_div(component)
\ No newline at end of file
+        return self.outer_div(component)
+
+    async def acall(self, entity_id, model):
+
+        # Build the component in a worker thread, so the event loop
+        # keeps serving and sibling components build concurrently
+        return await asyncio.to_thread(self, entity_id, model)
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from employee_events.cache import LRUCache
+
+
+class RenderedChart(NamedTuple):
+    """
+    An encoded chart image.
+
+    Attributes:
+        data: The encoded image bytes.
+        media_type: The image's MIME type.
+        etag: A stable hash of `data`, usable as an HTTP ETag.
+        created: When the image was rendered, as a Unix timestamp.
+    """
+    data: bytes
+    media_type: str
+    etag: str
+    created: float
+
+    @classmethod
+    def from_bytes(cls, data, media_type="image/png", created=None):
+        etag = hashlib.sha256(data).hexdigest()[:32]
+        return cls(data, media_type, etag, created or time.time())
+
+
+class ChartCache(LRUCache):
+    """
+    A memory-bounded LRU cache of rendered charts that can
+    optionally spill to a local directory.
+
+    Charts written to `directory` outlive evictions and restarts;
+    a memory miss falls back to the file before re-rendering.
+
+    Chart keys include the data version, so every ingest writes a
+    fresh set of files. Once they take more than `max_disk_bytes`,
+    the oldest files are removed until they fit in `prune_to` of it.
+
+    Attributes:
+        max_bytes: Memory bound for the cached image bytes.
+        directory: Optional directory the charts are also written to.
+        max_disk_bytes: Disk bound for the files in `directory`.
+    """
+
+    extensions = {"image/png": ".png", "image/svg+xml": ".svg"}
+
+    # Pruning goes below the bound so it does not rescan on every write
+    prune_to = 0.8
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=None, directory=None,
+                 max_disk_bytes=256 * 1024 * 1024):
+        super().__init__(max_entries, max_bytes, sizeof=lambda chart: len(chart.data))
+        self.directory = Path(directory) if directory else None
+        self.max_disk_bytes = max_disk_bytes
+        # Bytes on disk, counted on the first write
+        self._disk_bytes = None
+        self._disk_lock = threading.Lock()
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def digest(key) -> str:
+        """
+        Returns a file-name-safe digest of a cache key.
+        """
+        return hashlib.sha256(repr(key).encode()).hexdigest()
+
+    def get(self, key, default=None):
+        chart = super().get(key)
+        if chart is None and self.directory:
+            chart = self._read(key)
+            if chart is not None:
+                super().put(key, chart)
+        return default if chart is None else chart
+
+    def put(self, key, chart):
+        super().put(key, chart)
+        if self.directory:
+            self._write(key, chart)
+
+    def _read(self, key):
+        for media_type, extension in self.extensions.items():
+            path = self.directory / f"{self.digest(key)}{extension}"
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                continue
+            return RenderedChart.from_bytes(data, media_type, path.stat().st_mtime)
+        return None
+
+    def _write(self, key, chart):
+        extension = self.extensions.get(chart.media_type, "")
+        path = self.directory / f"{self.digest(key)}{extension}"
+        # Write to a temporary name and rename, so concurrent
+        # readers never see a partially written file
+        temp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        temp.write_bytes(chart.data)
+        os.replace(temp, path)
+
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._files())
+            else:
+                self._disk_bytes += len(chart.data)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._prune()
+
+    def _files(self):
+        """
+        Returns (modification time, size, path) for each chart file.
+        """
+        files = []
+        for extension in self.extensions.values():
+            for path in self.directory.glob(f"*{extension}"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _prune(self):
+        # Rescan, since other processes may share the directory
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_disk_bytes * self.prune_to:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._disk_bytes = total
@@ -0,0 +1,126 @@
+"""
+Matplotlib chart primitives for the dashboard's charts.
+
+These are the matplotlib counterparts of the functions in svg.py.
+They take plain values rather than a chart, so the render pool's
+workers can draw them importing only matplotlib and the theme.
+Each draws on the axes of a pooled figure, never through pyplot.
+"""
+from .figure_pool import FigurePool, style_axes
+from .theme import THEME
+
+
+def set_axis_styling(ax):
+    """Apply professional styling to chart axes."""
+
+    # Title, labels, ticks and spines in the theme colors
+    style_axes(ax)
+
+    # Keep solid lines (don't change to dashdot)
+    for line in ax.get_lines():
+        line.set_linewidth(2.5)
+
+
+def message_chart(ax, message):
+    """Draw `message` on empty axes in place of a chart."""
+    ax.text(0.5, 0.5, message,
+           transform=ax.transAxes, ha='center', va='center',
+           fontsize=14, color=THEME['text'])
+    ax.set_facecolor(THEME['axes'])
+    ax.set_xticks([])
+    ax.set_yticks([])
+
+
+def line_chart(ax, labels, series, title='', xlabel='', ylabel='',
+               max_xticks=6, error_message=''):
+    """
+    Draw a line chart over categorical x labels.
+
+    Args:
+        ax (Axes): The axes to draw on.
+        labels (list[str]): The x axis categories, e.g. dates.
+        series (list[tuple]): (name, values, color) for each line.
+        title, xlabel, ylabel (str): Chart and axis titles.
+        max_xticks (int): Roughly how many x labels to show.
+        error_message (str): Drawn instead if the data cannot be plotted.
+    """
+    try:
+        # Plot with custom styling
+        for name, values, color in series:
+            ax.plot(labels, values, color=color, linewidth=2.5,
+                   label=name, marker='', alpha=0.9)
+
+            # Add end point annotation (only if data exists)
+            if len(values) > 0:
+                ax.annotate(f'{int(values[-1])}',
+                           xy=(labels[-1], values[-1]),
+                           xytext=(5, 0), textcoords='offset points',
+                           fontsize=11, fontweight='bold', color=color)
+
+        # Apply axis styling
+        set_axis_styling(ax)
+
+        # Set title and labels with improved styling
+        ax.set_title(title, fontsize=18, fontweight='bold', pad=20)
+        ax.set_xlabel(xlabel, fontsize=13, fontweight='bold', labelpad=12)
+        ax.set_ylabel(ylabel, fontsize=13, fontweight='bold', labelpad=12)
+
+        # Format x-axis to show fewer date labels
+        if len(labels) > 0:
+            tick_positions = list(range(0, len(labels), max(1, len(labels) // max_xticks)))
+            ax.set_xticks([labels[i] for i in tick_positions])
+            ax.set_xticklabels([labels[i] for i in tick_positions], rotation=45, ha='right')
+
+        # Add grid for better readability
+        ax.grid(True, linestyle='--', alpha=0.4)
+
+        # Improve legend - positioned in upper left with styled box
+        legend = ax.legend(loc='upper left', fontsize=11, framealpha=0.95)
+        legend.get_frame().set_linewidth(1.5)
+
+        # Tight layout to prevent label cutoff
+        ax.figure.tight_layout()
+
+    except Exception:
+        # Draw the error message if any exception occurs
+        FigurePool.reset(ax.figure)
+        message_chart(ax, error_message)
+        ax.figure.tight_layout()
+
+
+def hbar_chart(ax, value, color, label='', title='', caption='', xlabel=''):
+    """
+    Draw one horizontal bar on a 0-100% axis.
+
+    Args:
+        ax (Axes): The axes to draw on.
+        value (float): The bar length as a fraction between 0 and 1.
+        color (str): The bar fill color.
+        label (str): The bar's category label on the y axis.
+        title, caption, xlabel (str): Chart title, a note under the axis and the x axis title.
+    """
+    # Create horizontal bar with custom styling
+    ax.barh([label], [value], color=color, height=0.5, edgecolor='white', linewidth=2)
+
+    # Add percentage text on the bar
+    ax.text(value + 0.02, 0, f'{value*100:.1f}%', va='center', fontsize=14, fontweight='bold', color='white')
+
+    # Add the caption under the axis
+    ax.text(0.5, -0.4, caption, transform=ax.transAxes,
+            ha='center', fontsize=11, color='white', style='italic')
+
+    ax.set_xlim(0, 1)
+    ax.set_title(title, fontsize=16, fontweight='bold', pad=15, color='white')
+
+    # Add x-axis labels as percentages
+    ax.set_xticks([0, 0.25, 0.5, 0.75, 1.0])
+    ax.set_xticklabels(['0%', '25%', '50%', '75%', '100%'])
+    ax.set_xlabel(xlabel, fontsize=12, labelpad=10)
+
+    # Add vertical grid lines
+    ax.grid(True, axis='x', linestyle='--', alpha=0.3, color='white')
+
+    set_axis_styling(ax)
+
+    # Tight layout
+    ax.figure.tight_layout()
@@ -1,42 +1,148 @@
+import json
+
 from .base_component import BaseComponent
-from fasthtml.common import Select, Label, Div, Option
+from fasthtml.common import Select, Label, Div, Option, Input
 
 class Dropdown(BaseComponent):
+    """
+    A labelled <select> of (text, value) options.
+
+    With more than `max_options` options, and a `search_url` to query,
+    the dropdown switches to typeahead mode: a search box whose matches
+    htmx swaps into the <select>, so the page never carries every option.
+
+    Attributes:
+        max_options: Most options rendered before switching to typeahead
+            mode, or None to always render every option.
+        search_url: The endpoint returning the <option>s matching `q`.
+        search_limit: Most matches shown per keystroke.
+    """
 
+    max_options = None
+    search_url = None
+    search_limit = 10
 
-    def __init__(self, id="selector", name="entity-selection", label=""):
+    def __init__(self, id="selector", name="entity-selection", label="",
+                 max_options=None, search_url=None):
         self.id = id
         self.name = name
         self.label = label
+        if max_options is not None:
+            self.max_options = max_options
+        if search_url is not None:
+            self.search_url = search_url
 
     def build_component(self, entity_id, model):
-        options = []
-        # Convert entity_id to string for comparison
-        entity_id_str = str(entity_id) if entity_id is not None else ""
-        for text, value in self.component_data(entity_id, model):
-            option = Option(text, value=value, selected="selected" if str(value) == entity_id_str else "")
-            options.append(option)
-
+        data = self.component_data(entity_id, model)
+        if self.is_typeahead(data):
+            return self.build_typeahead(entity_id, model, data)
 
         dropdown_settings = {
             'name': self.name
             }
-        
+
         # if model.name:
         #     dropdown_settings['disabled'] = 'disabled'
 
         selector = Select(
-            *options,
+            *self.build_options(data, entity_id),
             **dropdown_settings
             )
-        
+
         return selector
-    
-    def outer_div(self, child):
+
+    def build_options(self, data, entity_id=None):
+        options = []
+        # Convert entity_id to string for comparison
+        entity_id_str = str(entity_id) if entity_id is not None else ""
+        for text, value in data:
+            # A false `selected` leaves the attribute out entirely
+            option = Option(text, value=value, selected=str(value) == entity_id_str)
+            options.append(option)
+        return options
+
+    def is_typeahead(self, data):
+        return (
+            self.search_url is not None
+            and self.max_options is not None
+            and len(data) > self.max_options
+        )
+
+    def build_typeahead(self, entity_id, model, data):
+
+        # Only the selected option is rendered up front. When nothing
+        # is selected, the first page of options stands in for it
+        selected = self.selected_option(entity_id, model, data)
+        options = [selected] if selected else self.component_search('', model)
+
+        search = Input(
+            type='search',
+            name='q',
+            value=selected[0] if selected else '',
+            placeholder='Type a name...',
+            autocomplete='off',
+            hx_get=self.search_url,
+            hx_trigger='input changed delay:150ms, search',
+            hx_target=f'#{self.id}-options',
+            hx_vals=json.dumps({'entity': getattr(model, 'name', '')}),
+            )
+        selector = Select(
+            *self.build_options(options, entity_id),
+            name=self.name,
+            id=f'{self.id}-options',
+            )
+
+        return search, selector
+
+    def selected_option(self, entity_id, model, data):
+        """
+        Return the (text, value) option of `entity_id`, or None.
+        """
+        if entity_id is None:
+            return None
+        for text, value in data:
+            if str(value) == str(entity_id):
+                return text, value
+        return None
+
+    def component_search(self, text, model):
+        """
+        Return up to `search_limit` (text, value) options matching `text`.
+
+        The default scans `component_data` for options whose text
+        starts with `text`; subclasses can use a real index.
+        """
+        text = text.casefold()
+        data = self.component_data(None, model)
+        matches = [option for option in data if option[0].casefold().startswith(text)]
+        return matches[:self.search_limit]
+
+    def search_results(self, text, model):
+        """
+        Return the <option>s for a typeahead query.
+        """
+        matches = self.component_search(text, model)
+        if not matches:
+            return (Option('No matches', value='', disabled=True),)
+        # The first match is selected, so submitting picks it
+        return tuple(self.build_options(matches, matches[0][1]))
+
+    def component_label(self, entity_id, model):
+        return self.label
+
+    def call_component(self, entity_id, model):
+
+        # The label is passed along rather than stored on the
+        # instance, which every request shares
+        component = self.build_component(entity_id, model)
+        label = self.component_label(entity_id, model)
+
+        return self.outer_div(component, label)
+
+    def outer_div(self, child, label=None):
 
         return Div(
-            Label(self.label, _for=self.id),
+            Label(self.label if label is None else label, _for=self.id),
             child,
             id=self.id,
         )
-    
\ No newline at end of file
@@ -0,0 +1,106 @@
+import threading
+from contextlib import contextmanager
+
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .theme import THEME
+
+
+def style_axes(ax):
+    """Apply the dashboard theme to an axes' title, labels, ticks and spines."""
+    ax.set_facecolor(THEME['axes'])
+    ax.title.set_color(THEME['text'])
+    ax.title.set_fontweight('bold')
+    ax.xaxis.label.set_color(THEME['text'])
+    ax.yaxis.label.set_color(THEME['text'])
+    ax.tick_params(axis='both', colors=THEME['text'], labelsize=10)
+    for spine in ax.spines.values():
+        spine.set_edgecolor(THEME['border'])
+        spine.set_linewidth(1.5)
+
+
+class FigurePool:
+    """
+    A pool of themed single-axes figures, keyed by figure size.
+
+    Figures are built with the object-oriented `Figure` and
+    `FigureCanvasAgg` API, so they never touch pyplot's global figure
+    manager and several threads can draw at once. A figure is handed
+    to one caller at a time and reset before it is reused.
+
+    Attributes:
+        max_idle: Most idle figures kept per size.
+        created: Number of figures built.
+        reused: Number of times an idle figure was handed out.
+    """
+
+    def __init__(self, max_idle=8):
+        self.max_idle = max_idle
+        self.created = 0
+        self.reused = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def figure(self, figsize):
+        """
+        Borrow a figure of `figsize` inches and its axes.
+
+        Usage:
+            with pool.figure((8, 4)) as (fig, ax):
+                ax.plot(...)
+        """
+        figsize = tuple(figsize)
+        fig = self._acquire(figsize)
+        try:
+            yield fig, fig.axes[0]
+        finally:
+            self._release(figsize, fig)
+
+    def _acquire(self, figsize):
+        with self._lock:
+            idle = self._idle.get(figsize)
+            if idle:
+                self.reused += 1
+                return idle.pop()
+            self.created += 1
+
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        style_axes(fig.add_subplot())
+        return fig
+
+    def _release(self, figsize, fig):
+        self.reset(fig)
+        with self._lock:
+            idle = self._idle.setdefault(figsize, [])
+            if len(idle) < self.max_idle:
+                idle.append(fig)
+
+    @staticmethod
+    def reset(fig):
+        """Clear a figure's artists and layout back to its themed state."""
+        ax = fig.axes[0]
+        # Drop anything added besides the one axes, e.g. colorbars
+        for extra in fig.axes[1:]:
+            extra.remove()
+        fig.texts.clear()
+        fig.legends.clear()
+        ax.clear()
+        style_axes(ax)
+        # Undo tight_layout so the next chart lays out from scratch
+        fig.subplots_adjust(**{
+            side: matplotlib.rcParams[f'figure.subplot.{side}']
+            for side in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')
+        })
+
+    def clear(self):
+        """Drop every idle figure."""
+        with self._lock:
+            self._idle.clear()
+
+
+# The pool used by every MatplotlibViz in this process
+figures = FigurePool()
@@ -0,0 +1,174 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from fasthtml.common import NotStr, to_xml
+
+from employee_events.cache import LRUCache
+
+
+class Fragment(NamedTuple):
+    """
+    A component's rendered HTML.
+
+    Attributes:
+        html: The component serialized with `to_xml`.
+        seconds: How long the component took to build and serialize.
+    """
+    html: str
+    seconds: float
+
+
+@dataclass
+class FragmentStats:
+    """
+    Cache counters for one component class.
+
+    Attributes:
+        hits: Renders served from the cache.
+        misses: Renders that built the component.
+        build_seconds: Time spent building on misses.
+        saved_seconds: Build time the hits avoided.
+    """
+    hits: int = 0
+    misses: int = 0
+    build_seconds: float = 0.0
+    saved_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class FragmentCache(LRUCache):
+    """
+    A memory-bounded LRU cache of rendered component HTML,
+    with hit, miss and time-saved counters per component.
+
+    Attributes:
+        max_bytes: Memory bound for the cached HTML.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, max_entries=None):
+        super().__init__(max_entries, max_bytes, sizeof=lambda fragment: len(fragment.html))
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def lookup(self, key, name):
+        """
+        Return the cached HTML for `key` as a NotStr, or None.
+        """
+        fragment = self.get(key)
+        if fragment is None:
+            return None
+        with self._stats_lock:
+            stats = self._stats.setdefault(name, FragmentStats())
+            stats.hits += 1
+            stats.saved_seconds += fragment.seconds
+        return NotStr(fragment.html)
+
+    def store(self, key, name, component, seconds):
+        """
+        Serialize a freshly built component, cache it and return it as a NotStr.
+        """
+        start = time.perf_counter()
+        html = to_xml(component)
+        seconds += time.perf_counter() - start
+        self.put(key, Fragment(html, seconds))
+        with self._stats_lock:
+            stats = self._stats.setdefault(name, FragmentStats())
+            stats.misses += 1
+            stats.build_seconds += seconds
+        return NotStr(html)
+
+    def stats(self) -> dict:
+        """
+        Returns a copy of the counters, keyed by component class name.
+        """
+        with self._stats_lock:
+            return {name: FragmentStats(**vars(stats)) for name, stats in self._stats.items()}
+
+    def clear(self):
+        super().clear()
+        with self._stats_lock:
+            self._stats.clear()
+
+
+class FragmentCaching:
+    """
+    Opt-in fragment caching for components.
+
+    A component caches its rendered HTML by listing what its output
+    depends on in `fragment_key`:
+
+        'model'         the model's name, e.g. 'employee' or 'team'
+        'entity_id'     the selected employee or team id
+        'data_version'  the database's data version, so cached
+                        fragments are not reused after the data changes
+
+    Components with `fragment_key = None` are always built.
+
+    Attributes:
+        fragment_cache: The FragmentCache shared by every component.
+        fragment_key: The key dimensions, or None to opt out.
+    """
+
+    fragment_cache = None
+    fragment_key = None
+
+    def fragment_cache_key(self, entity_id, model):
+        """
+        Key identifying this component's output, or None if it is not cached.
+        """
+        if self.fragment_cache is None or self.fragment_key is None:
+            return None
+
+        values = []
+        for dimension in self.fragment_key:
+            if dimension == 'model':
+                values.append(getattr(model, 'name', ''))
+            elif dimension == 'entity_id':
+                values.append(str(entity_id))
+            elif dimension == 'data_version':
+                values.append(getattr(model, 'data_version', lambda: None)())
+            else:
+                raise ValueError(f"Unknown fragment key dimension: {dimension!r}")
+
+        # The instance is part of the key, since two instances
+        # of a class can be configured differently
+        return (type(self).__qualname__, id(self), *values)
+
+    def cached_fragment(self, entity_id, model, build):
+        """
+        Return `build(entity_id, model)`, from the fragment cache when the
+        component opted in.
+        """
+        key = self.fragment_cache_key(entity_id, model)
+        if key is None:
+            return build(entity_id, model)
+
+        name = type(self).__qualname__
+        fragment = self.fragment_cache.lookup(key, name)
+        if fragment is None:
+            start = time.perf_counter()
+            component = build(entity_id, model)
+            fragment = self.fragment_cache.store(key, name, component, time.perf_counter() - start)
+        return fragment
+
+    async def acached_fragment(self, entity_id, model, build):
+        """
+        Async `cached_fragment`, for a coroutine function `build`.
+        """
+        key = self.fragment_cache_key(entity_id, model)
+        if key is None:
+            return await build(entity_id, model)
+
+        name = type(self).__qualname__
+        fragment = self.fragment_cache.lookup(key, name)
+        if fragment is None:
+            start = time.perf_counter()
+            component = await build(entity_id, model)
+            fragment = self.fragment_cache.store(key, name, component, time.perf_counter() - start)
+        return fragment
@@ -1,9 +1,12 @@
 from .base_component import BaseComponent
+from .chart_cache import RenderedChart
+from .theme import THEME
+from .figure_pool import figures
+from . import charts
 
-import matplotlib.pyplot
-from fasthtml.common import Img
-import matplotlib.pylab as plt
+from fasthtml.common import Img, NotStr
 import matplotlib
+import matplotlib.style
 import io
 import base64
 
@@ -12,80 +15,255 @@ import base64
 matplotlib.use('Agg')
 
 # Set dark style for professional look
-plt.style.use('dark_background')
+matplotlib.style.use('dark_background')
 
 # Configure save settings
 matplotlib.rcParams['savefig.format'] = 'png'
-matplotlib.rcParams['savefig.facecolor'] = '#1a1a2e'
-matplotlib.rcParams['savefig.edgecolor'] = '#1a1a2e'
-matplotlib.rcParams['figure.facecolor'] = '#1a1a2e'
-matplotlib.rcParams['axes.facecolor'] = '#16213e'
-matplotlib.rcParams['axes.edgecolor'] = '#e94560'
-matplotlib.rcParams['axes.labelcolor'] = '#ffffff'
-matplotlib.rcParams['text.color'] = '#ffffff'
-matplotlib.rcParams['xtick.color'] = '#ffffff'
-matplotlib.rcParams['ytick.color'] = '#ffffff'
-matplotlib.rcParams['grid.color'] = '#0f3460'
-matplotlib.rcParams['legend.facecolor'] = '#16213e'
-matplotlib.rcParams['legend.edgecolor'] = '#e94560'
-
-
-def matplotlib2fasthtml(func):
-    '''
-    Copy of https://github.com/koaning/fh-matplotlib, which is currently hardcoding the 
-    image format as jpg. png or svg is needed here.
-    '''
-    def wrapper(*args, **kwargs):
-        # Reset the figure to prevent accumulation. Maybe we need a setting for this?
-        fig = plt.figure()
-
-        # Run function as normal
-        func(*args, **kwargs)
-
-        # Store it as base64 and put it into an image.
-        my_stringIObytes = io.BytesIO()
-        plt.savefig(my_stringIObytes, bbox_inches='tight', dpi=150)
-        my_stringIObytes.seek(0)
-        my_base64_jpgData = base64.b64encode(my_stringIObytes.read()).decode()
-
-        # Close the figure to prevent memory leaks
-        plt.close(fig)
-        plt.close('all')
-        return Img(src=f'data:image/png;base64, {my_base64_jpgData}')
-    return wrapper
+matplotlib.rcParams['savefig.facecolor'] = THEME['figure']
+matplotlib.rcParams['savefig.edgecolor'] = THEME['figure']
+matplotlib.rcParams['figure.facecolor'] = THEME['figure']
+matplotlib.rcParams['axes.facecolor'] = THEME['axes']
+matplotlib.rcParams['axes.edgecolor'] = THEME['border']
+matplotlib.rcParams['axes.labelcolor'] = THEME['text']
+matplotlib.rcParams['text.color'] = THEME['text']
+matplotlib.rcParams['xtick.color'] = THEME['text']
+matplotlib.rcParams['ytick.color'] = THEME['text']
+matplotlib.rcParams['grid.color'] = THEME['grid']
+matplotlib.rcParams['legend.facecolor'] = THEME['legend']
+matplotlib.rcParams['legend.edgecolor'] = THEME['border']
+
+
+def figure_to_png(fig, dpi=150):
+    """Encode a figure as PNG bytes."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, bbox_inches='tight', dpi=dpi)
+    return buffer.getvalue()
+
+
+def png2fasthtml(data):
+    """Wrap PNG bytes in an inline fasthtml Img."""
+    return Img(src=f'data:image/png;base64, {base64.b64encode(data).decode()}')
+
+
+def draw_png(draw, options, figsize=(8, 4), dpi=150):
+    """
+    Call `draw(ax, **options)` on a pooled figure and encode it as
+    PNG bytes. This is the function run in the render pool's workers,
+    so `draw` is a function from `charts` rather than a chart class.
+    """
+    with figures.figure(figsize) as (fig, ax):
+        draw(ax, **options)
+        return figure_to_png(fig, dpi)
 
 
 class MatplotlibViz(BaseComponent):
 
-    @matplotlib2fasthtml
+    # Resolution of the rendered PNG
+    dpi = 150
+
+    # Set to a ChartCache to reuse rendered images across requests
+    chart_cache = None
+
+    # Embed the image in the page as a data URI. When False the page only
+    # references `chart_url`, and the image is served by its own route
+    inline = True
+
+    # Path prefix of the route serving chart images
+    chart_route = '/charts'
+
+    # Size in inches of the figure `draw` is given
+    figsize = (8, 4)
+
+    # 'matplotlib' rasterizes the figure from `draw`. 'svg' uses
+    # the chart's `svg_visualization` instead, where the subclass has one
+    renderer = 'matplotlib'
+
+    # Set to a RenderPool to draw charts in worker processes
+    render_pool = None
+
+    # Set to a SingleFlight so concurrent requests for
+    # the same chart wait on one render instead of each drawing it
+    flights = None
+
     def build_component(self, entity_id, model):
-        return self.visualization(entity_id, model)
+        if not self.inline:
+            return Img(src=self.chart_url(entity_id, model), alt=self.chart_name())
+        return self.chart_component(self.render(entity_id, model))
+
+    def chart_component(self, chart):
+        """Embed a RenderedChart in the page."""
+        if chart.media_type == 'image/svg+xml':
+            return NotStr(chart.data.decode())
+        return png2fasthtml(chart.data)
+
+    def submit(self, entity_id, model):
+        """
+        Start rendering the chart and return a function that waits
+        for it and returns the component. Containers call `submit`
+        on every child first, so sibling charts render in parallel.
+        """
+        if not self.inline:
+            return lambda: self(entity_id, model)
+        pending = self.submit_render(entity_id, model)
+        return lambda: self.outer_div(self.chart_component(pending()))
+
+    @classmethod
+    def chart_name(cls):
+        """Name of the chart in its image URL."""
+        return cls.__name__.lower()
+
+    def chart_url(self, entity_id, model):
+        """URL of the image route for this chart and entity."""
+        return f"{self.chart_route}/{self.chart_name()}/{getattr(model, 'name', '')}/{entity_id}"
+
+    def cache_key(self, entity_id, model):
+        """
+        Key identifying one rendered chart. Anything the image
+        depends on besides the entity must be part of the key.
+        """
+        data_version = getattr(model, 'data_version', lambda: None)()
+        return (
+            type(self).__qualname__,
+            getattr(model, 'name', ''),
+            str(entity_id),
+            data_version,
+            self.renderer,
+            self.dpi,
+            )
+
+    def render(self, entity_id, model):
+        """
+        Return the chart as a RenderedChart, from the
+        chart cache when one is configured.
+        """
+        if self.flights is None:
+            return self.submit_render(entity_id, model)()
+        return self.flights.do(
+            self.cache_key(entity_id, model),
+            lambda: self.submit_render(entity_id, model)(),
+            )
+
+    def submit_render(self, entity_id, model):
+        """
+        Start rendering the chart, in the render pool when one is
+        configured, and return a function that waits for the
+        RenderedChart. Cached charts are returned without rendering.
+        """
+        key = None
+        if self.chart_cache is not None:
+            key = self.cache_key(entity_id, model)
+            chart = self.chart_cache.get(key)
+            if chart is not None:
+                return lambda: chart
+
+        pooled = self.pooled()
+        future = data = None
+        if pooled:
+            # Fetched once, for the worker and the fallback alike
+            data = self.chart_data(entity_id, model)
+            future = self.submit_to_pool(data)
+
+        def result():
+            png = None if future is None else self.render_pool.result(future)
+            if png is not None:
+                chart = RenderedChart.from_bytes(png)
+            elif pooled:
+                # A full queue, a timeout or a chart without a spec:
+                # draw the data already fetched here
+                chart = RenderedChart.from_bytes(self.draw_png(data))
+            else:
+                chart = self.render_chart(entity_id, model)
+            if key is not None:
+                self.chart_cache.put(key, chart)
+            return chart
+        return result
+
+    def pooled(self):
+        """Whether the chart is drawn from its `chart_data` in the render pool."""
+        return (self.render_pool is not None
+                and self.renderer == 'matplotlib'
+                and type(self).visualization is MatplotlibViz.visualization)
+
+    def submit_to_pool(self, data):
+        """
+        Queue the chart for `data` in the render pool. Only the
+        `chart_spec` drawing function and its options are sent.
+
+        Returns:
+            Future: The pending PNG bytes, or None if the chart
+            has no spec or the pool is full.
+        """
+        spec = self.chart_spec(data)
+        if spec is None:
+            return None
+        draw, options = spec
+        return self.render_pool.submit(draw_png, draw, options, self.figsize, self.dpi)
+
+    def render_chart(self, entity_id, model):
+        """Render the chart with the configured renderer."""
+        if self.renderer == 'svg':
+            svg = self.svg_visualization(entity_id, model)
+            # Charts without an SVG version fall back to matplotlib
+            if svg is not None:
+                return RenderedChart.from_bytes(svg.encode(), 'image/svg+xml')
+        return RenderedChart.from_bytes(self.render_png(entity_id, model))
+
+    def render_png(self, entity_id, model):
+        """Draw the visualization and encode it as PNG bytes."""
+        if type(self).visualization is not MatplotlibViz.visualization:
+            # Subclasses drawing through pyplot in `visualization`.
+            # Only they load pyplot; the other charts never touch it
+            import matplotlib.pyplot as plt
+            try:
+                fig = self.visualization(entity_id, model) or plt.gcf()
+                return figure_to_png(fig, self.dpi)
+            finally:
+                # Close the figures to prevent memory leaks
+                plt.close('all')
+        return self.draw_png(self.chart_data(entity_id, model))
+
+    def draw_png(self, data):
+        """Draw `data` on a pooled figure and encode it as PNG bytes."""
+        with figures.figure(self.figsize) as (fig, ax):
+            self.draw(data, ax)
+            return figure_to_png(fig, self.dpi)
     
     
     def visualization(self, entity_id, model):
         pass
 
+    def chart_data(self, entity_id, model):
+        """Return everything `draw` needs to draw the chart."""
+        return None
+
+    def chart_spec(self, data):
+        """
+        Return how to draw `chart_data`'s output as a `(draw, options)`
+        pair, where `draw(ax, **options)` is a function from `charts`
+        and the options are plain values. Charts with a spec are drawn
+        in the render pool; others return None and draw in `draw`.
+        """
+        return None
+
+    def draw(self, data, ax):
+        """
+        Draw the chart for `chart_data`'s output on `ax`. The axes
+        belong to a pooled figure, so draw through `ax` and
+        `ax.figure` only, never through pyplot.
+        """
+        spec = self.chart_spec(data)
+        if spec is not None:
+            draw, options = spec
+            draw(ax, **options)
+
+    def svg_visualization(self, entity_id, model):
+        """Return the chart as an SVG string, or None if it has no SVG version."""
+        return None
+
+    def draw_message(self, ax, message):
+        """Draw `message` on empty axes in place of a chart."""
+        charts.message_chart(ax, message)
+
     def set_axis_styling(self, ax):
         """Apply professional styling to chart axes."""
-        
-        # Set colors
-        fontcolor = '#ffffff'
-        bordercolor = '#e94560'
-        
-        # Title and labels
-        ax.title.set_color(fontcolor)
-        ax.title.set_fontweight('bold')
-        ax.xaxis.label.set_color(fontcolor)
-        ax.yaxis.label.set_color(fontcolor)
-
-        # Tick styling
-        ax.tick_params(axis='both', colors=fontcolor, labelsize=10)
-        
-        # Spine styling
-        for spine in ax.spines.values():
-            spine.set_edgecolor(bordercolor)
-            spine.set_linewidth(1.5)
-
-        # Keep solid lines (don't change to dashdot)
-        for line in ax.get_lines():
-            line.set_linewidth(2.5)
+        charts.set_axis_styling(ax)
@@ -0,0 +1,119 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker():
+    # Import matplotlib, the Agg backend and the dashboard
+    # theme once per worker instead of once per chart
+    from . import matplotlib_viz  # noqa: F401
+
+
+def _ping():
+    return os.getpid()
+
+
+class RenderPool:
+    """
+    A pool of worker processes that render matplotlib charts.
+
+    Matplotlib holds the GIL while it draws, so charts drawn in the
+    request threads serialize every request behind each other. The
+    pool moves that work to other cores.
+
+    The number of charts waiting for a worker is bounded. When the
+    pool is full, times out or breaks, or the call raises in the
+    worker, `submit` and `result` return None and the caller renders
+    the chart itself.
+
+    Attributes:
+        max_workers: Number of worker processes.
+        max_pending: Most charts queued or rendering at once.
+        timeout: Seconds to wait for a chart before giving up on it.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, timeout=30.0, start_method="spawn"):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.max_workers
+        self.timeout = timeout
+        # Workers are spawned rather than forked: forking a
+        # process that is running server threads is unsafe
+        self.context = multiprocessing.get_context(start_method)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def executor(self) -> ProcessPoolExecutor:
+        """Return the process pool, creating it on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=self.context,
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def start(self):
+        """Start every worker now so the first requests find them warm."""
+        executor = self.executor()
+        for future in [executor.submit(_ping) for _ in range(self.max_workers)]:
+            future.result()
+
+    def submit(self, fn, *args):
+        """
+        Queue `fn(*args)` in a worker process.
+
+        Returns:
+            Future: The pending call, or None if the queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            future = self.executor().submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self._slots.release()
+            self._reset()
+            return None
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def result(self, future):
+        """
+        Wait for a submitted call.
+
+        Returns:
+            The call's result, or None if it timed out, raised or the pool broke.
+        """
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            return None
+        except BrokenProcessPool:
+            self._reset()
+            return None
+        except Exception:
+            # Drawn again in the caller, which handles the error
+            # as it would for a chart that was never pooled
+            logger.exception("Render worker call failed")
+            return None
+
+    def _reset(self):
+        # Drop a broken pool; the next submit starts a new one
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,174 @@
+"""
+Minimal SVG chart primitives for the dashboard's charts.
+
+These draw the same charts as the matplotlib renderer, in the same
+dark theme, as compact SVG strings without creating any figures.
+"""
+import math
+from html import escape
+
+from .theme import THEME
+
+FONT = "font-family='DejaVu Sans, Arial, sans-serif'"
+
+
+def _num(value):
+    # Two decimals are plenty at screen resolution
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+
+def nice_ticks(upper, count=5):
+    """Return evenly spaced round tick values from 0 to at least `upper`."""
+    if upper <= 0:
+        return [0, 1]
+    raw = upper / count
+    magnitude = 10 ** math.floor(math.log10(raw))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw)
+    return [i * step for i in range(math.ceil(upper / step) + 1)]
+
+
+def _text(x, y, text, size=10, anchor='middle', weight='normal', color=None, extra=''):
+    extra = f" {extra}" if extra else ""
+    return (
+        f"<text x='{_num(x)}' y='{_num(y)}' font-size='{size}' text-anchor='{anchor}' "
+        f"font-weight='{weight}' fill='{color or THEME['text']}'{extra}>{escape(str(text))}</text>"
+    )
+
+
+def _frame(width, height, body):
+    return (
+        f"<svg xmlns='http://www.w3.org/2000/svg' width='{width}' height='{height}' "
+        f"viewBox='0 0 {width} {height}' {FONT}>"
+        f"<rect width='100%' height='100%' fill='{THEME['figure']}'/>"
+        f"{''.join(body)}</svg>"
+    )
+
+
+def _axes(left, top, width, height):
+    return (
+        f"<rect x='{_num(left)}' y='{_num(top)}' width='{_num(width)}' height='{_num(height)}' "
+        f"fill='{THEME['axes']}' stroke='{THEME['border']}' stroke-width='1.5'/>"
+    )
+
+
+def message_svg(message, width=800, height=400):
+    """Return an empty themed chart showing `message`."""
+    body = [
+        _axes(20, 20, width - 40, height - 40),
+        _text(width / 2, height / 2, message, size=14),
+    ]
+    return _frame(width, height, body)
+
+
+def line_chart_svg(labels, series, title='', xlabel='', ylabel='',
+                   width=800, height=400, max_xticks=6):
+    """
+    Return an SVG line chart over categorical x labels.
+
+    Args:
+        labels (list[str]): The x axis categories, e.g. dates.
+        series (list[tuple]): (name, values, color) for each line.
+        title, xlabel, ylabel (str): Chart and axis titles.
+        max_xticks (int): Roughly how many x labels to show.
+    """
+    left, right, top, bottom = 75, 55, 50, 105
+    plot_w, plot_h = width - left - right, height - top - bottom
+
+    values = [v for _, ys, _ in series for v in ys]
+    ticks = nice_ticks(max(values, default=0))
+    y_max = ticks[-1]
+    n = len(labels)
+
+    def x(i):
+        return left + (plot_w * i / (n - 1) if n > 1 else plot_w / 2)
+
+    def y(v):
+        return top + plot_h - plot_h * v / y_max
+
+    body = [_axes(left, top, plot_w, plot_h)]
+
+    # Horizontal grid lines and y tick labels
+    for tick in ticks:
+        body.append(
+            f"<line x1='{left}' x2='{left + plot_w}' y1='{_num(y(tick))}' y2='{_num(y(tick))}' "
+            f"stroke='{THEME['grid']}' stroke-dasharray='4 3'/>"
+        )
+        body.append(_text(left - 6, y(tick) + 3.5, f"{tick:g}", anchor='end'))
+
+    # A subset of x labels, rotated like the matplotlib version
+    for i in range(0, n, max(1, n // max_xticks)):
+        body.append(
+            f"<line x1='{_num(x(i))}' x2='{_num(x(i))}' y1='{top}' y2='{top + plot_h}' "
+            f"stroke='{THEME['grid']}' stroke-dasharray='4 3'/>"
+        )
+        body.append(_text(
+            x(i), top + plot_h + 14, labels[i], anchor='end',
+            extra=f"transform='rotate(-45 {_num(x(i))} {top + plot_h + 14})'",
+        ))
+
+    # Lines with their final value labelled at the right end
+    for name, ys, color in series:
+        points = ' '.join(f"{_num(x(i))},{_num(y(v))}" for i, v in enumerate(ys))
+        body.append(
+            f"<polyline points='{points}' fill='none' stroke='{color}' "
+            f"stroke-width='2.5' stroke-opacity='0.9' stroke-linejoin='round'/>"
+        )
+        if ys:
+            body.append(_text(x(n - 1) + 5, y(ys[-1]) + 4, int(ys[-1]), size=11,
+                              anchor='start', weight='bold', color=color))
+
+    # Legend in the upper left corner of the axes
+    legend_h = 8 + 18 * len(series)
+    body.append(
+        f"<rect x='{left + 10}' y='{top + 10}' width='150' height='{legend_h}' rx='3' "
+        f"fill='{THEME['legend']}' fill-opacity='0.95' stroke='{THEME['border']}' stroke-width='1.5'/>"
+    )
+    for i, (name, _, color) in enumerate(series):
+        row = top + 23 + 18 * i
+        body.append(f"<line x1='{left + 18}' x2='{left + 42}' y1='{row}' y2='{row}' "
+                    f"stroke='{color}' stroke-width='2.5'/>")
+        body.append(_text(left + 48, row + 4, name, size=11, anchor='start'))
+
+    body.append(_text(width / 2, 30, title, size=18, weight='bold'))
+    body.append(_text(left + plot_w / 2, height - 8, xlabel, size=13, weight='bold'))
+    body.append(_text(16, top + plot_h / 2, ylabel, size=13, weight='bold',
+                      extra=f"transform='rotate(-90 16 {_num(top + plot_h / 2)})'"))
+    return _frame(width, height, body)
+
+
+def hbar_svg(value, color, label='', title='', caption='', xlabel='',
+             width=800, height=250):
+    """
+    Return an SVG with one horizontal bar on a 0-100% axis.
+
+    Args:
+        value (float): The bar length as a fraction between 0 and 1.
+        color (str): The bar fill color.
+        label (str): The bar's category label on the y axis.
+        title, caption, xlabel (str): Chart title, a note under the axis and the x axis title.
+    """
+    left, right, top, bottom = 140, 30, 45, 80
+    plot_w, plot_h = width - left - right, height - top - bottom
+    bar_h = plot_h * 0.5
+    bar_w = plot_w * min(max(value, 0), 1)
+
+    body = [_axes(left, top, plot_w, plot_h)]
+
+    for tick in (0, 0.25, 0.5, 0.75, 1.0):
+        x = left + plot_w * tick
+        body.append(f"<line x1='{_num(x)}' x2='{_num(x)}' y1='{top}' y2='{top + plot_h}' "
+                    f"stroke='{THEME['text']}' stroke-opacity='0.3' stroke-dasharray='4 3'/>")
+        body.append(_text(x, top + plot_h + 15, f"{tick:.0%}"))
+
+    body.append(
+        f"<rect x='{left}' y='{_num(top + (plot_h - bar_h) / 2)}' width='{_num(bar_w)}' "
+        f"height='{_num(bar_h)}' fill='{color}' stroke='{THEME['text']}' stroke-width='2'/>"
+    )
+    body.append(_text(left + bar_w + plot_w * 0.02, top + plot_h / 2 + 5, f"{value * 100:.1f}%",
+                      size=14, anchor='start', weight='bold'))
+    body.append(_text(left - 8, top + plot_h / 2 + 4, label, anchor='end'))
+
+    body.append(_text(width / 2, 28, title, size=16, weight='bold'))
+    body.append(_text(left + plot_w / 2, top + plot_h + 36, xlabel, size=12))
+    body.append(_text(left + plot_w / 2, height - 8, caption, size=11, extra="font-style='italic'"))
+    return _frame(width, height, body)
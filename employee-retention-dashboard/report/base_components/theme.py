@@ -0,0 +1,27 @@
+# Dark dashboard theme shared by the matplotlib rcParams
+# and the native SVG renderer
+THEME = {
+    'figure': '#1a1a2e',
+    'axes': '#16213e',
+    'border': '#e94560',
+    'text': '#ffffff',
+    'grid': '#0f3460',
+    'legend': '#16213e',
+}
+
+# Cumulative line colors: cyan for positive, coral for negative
+SERIES_COLORS = ['#00d9ff', '#ff6b6b']
+
+# Recruitment risk bands as (upper bound, color, label)
+RISK_LEVELS = [
+    (0.3, '#4CAF50', 'Low Risk'),
+    (0.6, '#FF9800', 'Medium Risk'),
+    (float('inf'), '#F44336', 'High Risk'),
+]
+
+
+def risk_level(pred):
+    """Return the (color, label) of the risk band `pred` falls in."""
+    for upper, color, label in RISK_LEVELS:
+        if pred < upper:
+            return color, label
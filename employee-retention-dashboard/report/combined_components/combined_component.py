@@ -1,11 +1,20 @@
+import asyncio
+
 from fastcore.xml import FT
 from fasthtml.common import Div
 
-class CombinedComponent:
+from base_components.fragment_cache import FragmentCaching
+
+class CombinedComponent(FragmentCaching):
 
     outer_div_type = Div(cls='container')
     
     def __call__(self, userid, model):
+
+       # Served from the fragment cache when the subclass sets `fragment_key`
+       return self.cached_fragment(userid, model, self.call_component)
+
+    def call_component(self, userid, model):
        
        called_children = self.call_children(userid, model)
        div_args = self.div_args(userid, model)
@@ -14,24 +23,62 @@ class CombinedComponent:
     
     def call_children(self, userid, model):
 
-        called = []
+        # Children with a `submit` method (the charts) are all
+        # started before any is waited on, so sibling charts
+        # render in parallel when a render pool is configured
+        pending = []
         for child in self.children:
             if isinstance(child, FT):
-                called.append(child())
-                
+                pending.append(child)
+
+            elif hasattr(child, 'submit'):
+                pending.append(child.submit(userid, model))
+
             else:
-                called.append(child(userid, model))
+                pending.append(lambda child=child: child(userid, model))
+
+        called = [child() for child in pending]
         
         return called
+
+    async def acall(self, userid, model):
+
+        return await self.acached_fragment(userid, model, self.acall_component)
+
+    async def acall_component(self, userid, model):
+
+        called_children = await self.acall_children(userid, model)
+        div_args = self.div_args(userid, model)
+
+        return self.outer_div(called_children, div_args)
+
+    async def acall_children(self, userid, model):
+
+        # Evaluate every child concurrently. The page takes as long
+        # as its slowest child, and gather keeps the children in order
+        async def call(child):
+            if isinstance(child, FT):
+                return child()
+            if hasattr(child, 'acall'):
+                return await child.acall(userid, model)
+            return await asyncio.to_thread(child, userid, model)
+
+        called = await asyncio.gather(*(call(child) for child in self.children))
+
+        return list(called)
     
     def div_args(self, userid, model):
         return {}
     
     def outer_div(self, children, div_args):
 
-        self.outer_div_type.children = ()
+        # `outer_div_type` is a template shared by every request.
+        # Copy its tag and attributes into a new element per call,
+        # since calling an FT adds the children to it in place
+        template = self.outer_div_type
+        outer = FT(template.tag, (), dict(template.attrs), void_=template.void_)
 
-        return self.outer_div_type(
+        return outer(
             *children,
             **div_args
         )
@@ -1,14 +1,22 @@
 from fasthtml.common import *
 from starlette.staticfiles import StaticFiles
-import matplotlib.pyplot as plt
+import asyncio
 
 # Import QueryBase, Employee, Team from employee_events
 from employee_events.query_base import QueryBase
 from employee_events.employee import Employee
 from employee_events.team import Team
+from employee_events.cache import enable_result_cache
+from employee_events.directory import directory
+from employee_events.singleflight import SingleFlight, query_flights
 
-# import the load_model function from the utils.py file
-from utils import load_model
+# Import the conditional GET helper for the chart image route
+from http_cache import conditional_response
+from page_cache import PageCache
+from static_export import StaticExport
+
+# import the lazy model loader from the utils.py file
+from utils import load_predictor, model_version, code_version
 
 """
 Below, we import the parent classes
@@ -19,11 +27,114 @@ from base_components import (
     BaseComponent,
     Radio,
     MatplotlibViz,
-    DataTable
+    DataTable,
+    ChartCache,
+    RenderPool,
+    FragmentCache,
+    FragmentCaching,
     )
+from base_components.theme import SERIES_COLORS, risk_level
+from base_components.svg import line_chart_svg, hbar_svg, message_svg
+from base_components.charts import line_chart, hbar_chart, message_chart
 
 from combined_components import FormGroup, CombinedComponent
 
+# Memoize query results across requests. The cache
+# empties itself whenever employee_events.db changes
+enable_result_cache(max_entries=1024)
+
+# Reuse the HTML of components that declare a `fragment_key`.
+# The key includes the data version where the output depends on the data
+FragmentCaching.fragment_cache = FragmentCache(max_bytes=16 * 1024 * 1024)
+
+# Reuse rendered chart images across requests. Set CHART_CACHE_DIR
+# to also keep them on disk between restarts, up to
+# CHART_CACHE_DISK_BYTES, after which the oldest files are removed
+import os
+MatplotlibViz.chart_cache = ChartCache(
+    max_bytes=64 * 1024 * 1024,
+    directory=os.environ.get("CHART_CACHE_DIR"),
+    max_disk_bytes=int(os.environ.get("CHART_CACHE_DISK_BYTES", 256 * 1024 * 1024)),
+    )
+
+# Reference charts as <img src="/charts/..."> so the page returns before
+# they render and browsers can cache them. INLINE_CHARTS=1 embeds them
+MatplotlibViz.inline = os.environ.get("INLINE_CHARTS") == "1"
+
+# CHART_RENDERER=svg draws the charts as native SVG instead of
+# matplotlib PNGs. Set `renderer` on a chart class to choose per chart
+MatplotlibViz.renderer = os.environ.get("CHART_RENDERER", "matplotlib")
+
+# Requests arriving together for the same chart share one render
+MatplotlibViz.flights = SingleFlight()
+
+# RENDER_WORKERS=N draws matplotlib charts in N worker processes, so
+# concurrent requests and sibling charts render on separate cores
+render_workers = int(os.environ.get("RENDER_WORKERS", "0"))
+if render_workers:
+    MatplotlibViz.render_pool = RenderPool(
+        max_workers=render_workers,
+        timeout=float(os.environ.get("RENDER_TIMEOUT", "30")),
+        )
+
+
+# Organizations with more entities than this get a
+# typeahead search box instead of one option per entity
+dropdown_max_options = int(os.environ.get("DROPDOWN_MAX_OPTIONS", "200"))
+
+
+# Serve repeat page views from memory, and answer browsers that
+# already hold the current page with a `304 Not Modified`. The
+# code and the settings that change the page's HTML salt its ETag,
+# so a deploy that changes the markup invalidates the browsers' copies
+page_cache = PageCache(
+    max_bytes=int(os.environ.get("PAGE_CACHE_BYTES", 32 * 1024 * 1024)),
+    salt=(code_version(), MatplotlibViz.renderer, MatplotlibViz.inline, dropdown_max_options),
+    )
+
+
+# BASE_URL, e.g. https://dashboard.example.com, is the origin of the
+# pages' canonical links. Without it the request's host is used, but
+# only if it is in ALLOWED_HOSTS: any other Host header would put a
+# made-up origin in the link and a new entry in the page cache
+base_url = os.environ.get("BASE_URL", "").rstrip("/")
+allowed_hosts = {
+    host.strip()
+    for host in os.environ.get(
+        "ALLOWED_HOSTS",
+        "localhost,127.0.0.1,localhost:{port},127.0.0.1:{port}".format(port=os.environ.get("PORT", 5001)),
+        ).split(",")
+    if host.strip()
+    }
+
+
+def page_origin(req):
+    """
+    Return the origin of the requested page, or None if
+    BASE_URL is unset and the request's host is not allowed.
+    """
+    if base_url:
+        return base_url
+    if req.url.netloc in allowed_hosts:
+        return f'https://{req.url.netloc}'
+    return None
+
+
+def content_version():
+    """
+    Return the versions of the data and the model, as the lists
+    export.py records in its manifest.
+    """
+    return [list(Employee().data_version()), list(model_version())]
+
+
+# STATIC_EXPORT_DIR serves the pages and charts prebuilt by
+# export.py instead of rendering them, while the data and model
+# are the ones they were rendered from. See export.py
+static_export = None
+if os.environ.get("STATIC_EXPORT_DIR"):
+    static_export = StaticExport(os.environ["STATIC_EXPORT_DIR"], version=content_version)
+
 
 # Create a subclass of base_components/dropdown
 class ReportDropdown(Dropdown):
@@ -31,25 +142,27 @@ class ReportDropdown(Dropdown):
     A dropdown component for selecting an entity.
 
     Methods:
-        build_component(entity_id, model):
-            Builds the dropdown HTML based on the provided entity and model.
+        component_label(entity_id, model):
+            Labels the dropdown with the model's name.
         component_data(entity_id, model):
             Fetches the data required to populate the dropdown options.
+        component_search(text, model):
+            Finds the typeahead matches in the entity directory's prefix index.
     """
+
+    # The options come from the data, and the selected one from the entity
+    fragment_key = ('model', 'entity_id', 'data_version')
     
-    def build_component(self, entity_id, model: QueryBase):
+    def component_label(self, entity_id, model: QueryBase):
         """
-        Build the HTML for the dropdown selector.
+        Return the label shown above the dropdown selector.
         
         Returns:
-            str: The HTML string for the dropdown selector.
+            str: The `name` attribute of the model.
         """
-        #  Set the `label` attribute so it is set
-        #  to the `name` attribute for the model
-        self.label = getattr(model, "name", "selector")
-        # Return the output from the
-        # parent class's build_component method
-        return super().build_component(entity_id, model)
+        # The label is returned per call instead of being set on
+        # `self.label`, because one instance serves every request
+        return getattr(model, "name", "selector")
     
     def component_data(self, entity_id, model: QueryBase):
         """
@@ -57,11 +170,24 @@ class ReportDropdown(Dropdown):
         """
         # Using the model argument, call the employee_events method
         # that returns the user-type's
-        # names and ids
+        # names and ids, served from the entity directory
         # (Employee.names() → [(full_name, id), ...]
         #  Team.names()     → [(team_name, id), ...])
         return model.names()
 
+    def selected_option(self, entity_id, model: QueryBase, data):
+        """
+        Look the selected entity's name up by id instead of scanning the options.
+        """
+        name = directory.name(model.name, entity_id)
+        return None if name is None else (name, int(entity_id))
+
+    def component_search(self, text, model: QueryBase):
+        """
+        Return the entities whose names match what the user typed.
+        """
+        return model.search(text, limit=self.search_limit)
+
 
 # Create a subclass of base_components/BaseComponent
 class Header(BaseComponent):
@@ -72,11 +198,15 @@ class Header(BaseComponent):
         build_component(entity_id, model):
             Builds the header HTML for the report.
     """
+
+    # The title only depends on whether it's an employee or team page
+    fragment_key = ('model',)
+
     def build_component(self, entity_id, model: QueryBase):
         # Using the model argument for this method, return a fasthtml H1 object
         # containing the model's name attribute
         title = getattr(model, "name", "report").title()
-        return H1(f"{title} Dashboard")
+        return H1(f"{title} Dashboard", id="report-header")
 
 # Create a subclass of base_components/MatplotlibViz
 class LineChart(MatplotlibViz):
@@ -84,35 +214,30 @@ class LineChart(MatplotlibViz):
     A class for generating line charts visualizing cumulative events over time.
 
     Methods:
-        visualization(model, entity_id):
-            Prepares and saves a line chart based on the provided model and entity ID.
+        chart_data(asset_id, model):
+            Returns the cumulative positive and negative event counts.
+        chart_spec(df_cum):
+            Returns the line chart's drawing function and options.
+        svg_visualization(asset_id, model):
+            Draws the same chart as a native SVG.
     """
-    
-    def visualization(self, asset_id, model: QueryBase):
-        """
-        Generate and save a line chart for cumulative events over time.
 
-        Args:
-            model (object): The model (Employee or Team) providing event data.
-            asset_id (int): The ID of the entity whose events are visualized.
+    title = "Cumulative Events Over Time"
+    empty_message = 'No data available for this selection'
 
-        Returns:
-            str: Relative file path to the saved chart, or a message indicating no data is available.
+    def chart_data(self, asset_id, model: QueryBase):
         """
-        # Pass the `asset_id` argument tothe model's `event_counts` method to
-        # receive the x (Day) and y (event count)
-        df = model.event_counts(asset_id)
-        
+        Return the cumulative counts indexed by date, with the columns
+        ['Positive Events', 'Negative Events'], or None if there are none.
+        """
+        # Pass the `asset_id` argument to the model's `cumulative_event_counts`
+        # method to receive the x (Day) and y (running event count).
+        # The running totals come precomputed from the rollup tables
+        df = model.cumulative_event_counts(asset_id)
+
         # Check if data is empty
         if df.empty:
-            fig, ax = plt.subplots(figsize=(8, 4))
-            ax.text(0.5, 0.5, 'No data available for this selection', 
-                   transform=ax.transAxes, ha='center', va='center', 
-                   fontsize=14, color='white')
-            ax.set_facecolor('#16213e')
-            ax.set_xticks([])
-            ax.set_yticks([])
-            return fig
+            return None
 
         # Use the pandas .fillna method to fill nulls with 0
         df = df.fillna(0)
@@ -123,77 +248,64 @@ class LineChart(MatplotlibViz):
         # Sort the index
         df = df.sort_index()
 
-        # Use the .cumsum method to change the data in the dataframe to cumulative counts
+        # Keep the cumulative count columns
         cols = [c for c in df.columns if "positive_events" in c or "negative_events" in c]
-        df_cum = df[cols].cumsum()
+        df_cum = df[cols]
 
         try:
             # Set the dataframe columns to the list ['Positive', 'Negative']
             pos_col = [c for c in df_cum.columns if "positive_events" in c][0]
             neg_col = [c for c in df_cum.columns if "negative_events" in c][0]
-            df_cum = df_cum[[pos_col, neg_col]]
-            df_cum.columns = ["Positive Events", "Negative Events"]
+        except IndexError:
+            return None
+        df_cum = df_cum[[pos_col, neg_col]]
+        df_cum.columns = ["Positive Events", "Negative Events"]
 
-            # Check if dataframe is empty after processing
-            if df_cum.empty or len(df_cum.index) == 0:
-                raise ValueError("No data to display")
+        # Check if dataframe is empty after processing
+        if df_cum.empty or len(df_cum.index) == 0:
+            return None
+        return df_cum
 
-            # Initialize a pandas subplot with smaller figure size
-            fig, ax = plt.subplots(figsize=(8, 4))
-
-            # Custom colors for better visibility
-            colors = ['#00d9ff', '#ff6b6b']  # Cyan for positive, coral for negative
-            
-            # Plot with custom styling
-            for i, col in enumerate(df_cum.columns):
-                ax.plot(df_cum.index, df_cum[col], color=colors[i], linewidth=2.5, 
-                       label=col, marker='', alpha=0.9)
-                
-                # Add end point annotation (only if data exists)
-                if len(df_cum) > 0:
-                    last_val = df_cum[col].iloc[-1]
-                    ax.annotate(f'{int(last_val)}', 
-                               xy=(df_cum.index[-1], last_val),
-                               xytext=(5, 0), textcoords='offset points',
-                               fontsize=11, fontweight='bold', color=colors[i])
-
-            # Apply axis styling
-            self.set_axis_styling(ax)
-
-            # Set title and labels with improved styling
-            ax.set_title("Cumulative Events Over Time", fontsize=18, fontweight='bold', pad=20)
-            ax.set_xlabel("Date", fontsize=13, fontweight='bold', labelpad=12)
-            ax.set_ylabel("Cumulative Event Count", fontsize=13, fontweight='bold', labelpad=12)
-            
-            # Format x-axis to show fewer date labels
-            if len(df_cum.index) > 0:
-                tick_positions = list(range(0, len(df_cum.index), max(1, len(df_cum.index) // 6)))
-                ax.set_xticks([df_cum.index[i] for i in tick_positions])
-                ax.set_xticklabels([df_cum.index[i] for i in tick_positions], rotation=45, ha='right')
-            
-            # Add grid for better readability
-            ax.grid(True, linestyle='--', alpha=0.4)
-            
-            # Improve legend - positioned in upper left with styled box
-            legend = ax.legend(loc='upper left', fontsize=11, framealpha=0.95)
-            legend.get_frame().set_linewidth(1.5)
-            
-            # Tight layout to prevent label cutoff
-            plt.tight_layout()
-
-            return fig
-            
-        except Exception:
-            # Return error figure if any exception occurs
-            fig, ax = plt.subplots(figsize=(8, 4))
-            ax.text(0.5, 0.5, 'No data available for this selection', 
-                   transform=ax.transAxes, ha='center', va='center', 
-                   fontsize=14, color='white')
-            ax.set_facecolor('#16213e')
-            ax.set_xticks([])
-            ax.set_yticks([])
-            plt.tight_layout()
-            return fig
+    def chart_spec(self, df_cum):
+        """
+        Return the line chart for the `chart_data` output as a
+        drawing function and its options, drawn in the render pool
+        when one is configured.
+        """
+        if df_cum is None:
+            return message_chart, {'message': self.empty_message}
+
+        return line_chart, {
+            'labels': list(df_cum.index),
+            'series': [
+                (col, df_cum[col].tolist(), color)
+                for col, color in zip(df_cum.columns, SERIES_COLORS)
+                ],
+            'title': self.title,
+            'xlabel': "Date",
+            'ylabel': "Cumulative Event Count",
+            # Drawn if the data cannot be plotted
+            'error_message': self.empty_message,
+            }
+
+    def svg_visualization(self, asset_id, model: QueryBase):
+        """
+        Draw the line chart as SVG, skipping matplotlib entirely.
+        """
+        df_cum = self.chart_data(asset_id, model)
+        if df_cum is None:
+            return message_svg(self.empty_message, width=800, height=400)
+
+        return line_chart_svg(
+            labels=[str(date) for date in df_cum.index],
+            series=[
+                (col, df_cum[col].tolist(), color)
+                for col, color in zip(df_cum.columns, SERIES_COLORS)
+                ],
+            title=self.title,
+            xlabel="Date",
+            ylabel="Cumulative Event Count",
+            )
 
 
 class BarChart(MatplotlibViz):
@@ -204,46 +316,54 @@ class BarChart(MatplotlibViz):
         predictor: The trained model used to predict probabilities for the bar chart.
 
     Methods:
-        visualization(model, entity_id):
-            Prepares and saves a bar chart based on the provided model and entity ID.
+        chart_data(asset_id, model):
+            Returns the predicted risk, or a message when there is none.
+        chart_spec(data):
+            Returns the bar chart's drawing function and options.
+        svg_visualization(asset_id, model):
+            Draws the same chart as a native SVG.
     """
 
-    # Create a `predictor` class attribute
-    # assign the attribute to the output
-    # of the `load_model` utils function
-    predictor = load_model()
+    # The model is loaded on the first prediction rather than at
+    # import, and reloaded whenever model.pkl is replaced
+    @property
+    def predictor(self):
+        return load_predictor()
 
-    # Overwrite the parent class `visualization` method
-    # Use the same parameters as the parent
-    def visualization(self, asset_id, model: QueryBase):
+    title = 'Predicted Recruitment Risk'
 
+    # A shorter figure than the line chart
+    figsize = (8, 2.5)
+
+    def cache_key(self, asset_id, model):
+        # The bar depends on the trained model as well as the data
+        return (*super().cache_key(asset_id, model), model_version())
+
+    def chart_data(self, asset_id, model: QueryBase):
+        """
+        Return {'pred': <risk probability>}, or {'message': <reason>}
+        when there is nothing to predict.
+        """
         # Using the model and asset_id arguments
         # pass the `asset_id` to the `.model_data` method
         # to receive the data that can be passed to the machine
         # learning model
         df = model.model_data(asset_id)
-        
+
         # Check if data is empty
         if df.empty or df.isnull().all().all():
-            fig, ax = plt.subplots(figsize=(8, 2.5))
-            ax.text(0.5, 0.5, 'No data available for prediction', 
-                   transform=ax.transAxes, ha='center', va='center', 
-                   fontsize=14, color='white')
-            ax.set_facecolor('#16213e')
-            ax.set_xticks([])
-            ax.set_yticks([])
-            return fig
-        
+            return {'message': 'No data available for prediction'}
+
         try:
             # Using the predictor class attribute
             # pass the data to the `predict_proba` method
             proba = self.predictor.predict_proba(df)
-            
+
             # Index the second column of predict_proba output
             # The shape should be (<number of records>, 1)
             probs = proba[:, 1]
-            
-            
+
+
             # Below, create a `pred` variable set to
             # the number we want to visualize
             #
@@ -251,65 +371,54 @@ class BarChart(MatplotlibViz):
             # We want to visualize the mean of the predict_proba output
             if getattr(model, "name", "") == "team":
                 pred = float(probs.mean())
-                
+
             # Otherwise set `pred` to the first value
             # of the predict_proba output
             else:
                 pred = float(probs[0])
         except Exception:
-            fig, ax = plt.subplots(figsize=(8, 2.5))
-            ax.text(0.5, 0.5, 'Unable to calculate prediction', 
-                   transform=ax.transAxes, ha='center', va='center', 
-                   fontsize=14, color='white')
-            ax.set_facecolor('#16213e')
-            ax.set_xticks([])
-            ax.set_yticks([])
-            return fig
-        
-        # Initialize a matplotlib subplot with smaller size
-        fig, ax = plt.subplots(figsize=(8, 2.5))
-        
-        # Determine color based on risk level
-        if pred < 0.3:
-            bar_color = '#4CAF50'  # Green - Low risk
-            risk_level = 'Low Risk'
-        elif pred < 0.6:
-            bar_color = '#FF9800'  # Orange - Medium risk
-            risk_level = 'Medium Risk'
-        else:
-            bar_color = '#F44336'  # Red - High risk
-            risk_level = 'High Risk'
-        
-        # Create horizontal bar with custom styling
-        bars = ax.barh(['Recruitment Risk'], [pred], color=bar_color, height=0.5, edgecolor='white', linewidth=2)
-        
-        # Add percentage text on the bar
-        ax.text(pred + 0.02, 0, f'{pred*100:.1f}%', va='center', fontsize=14, fontweight='bold', color='white')
-        
-        # Add risk level indicator
-        ax.text(0.5, -0.4, f'Risk Level: {risk_level}', transform=ax.transAxes, 
-                ha='center', fontsize=11, color='white', style='italic')
-        
-        ax.set_xlim(0, 1)
-        ax.set_title('Predicted Recruitment Risk', fontsize=16, fontweight='bold', pad=15, color='white')
-        
-        # Add x-axis labels as percentages
-        ax.set_xticks([0, 0.25, 0.5, 0.75, 1.0])
-        ax.set_xticklabels(['0%', '25%', '50%', '75%', '100%'])
-        ax.set_xlabel('Probability', fontsize=12, labelpad=10)
-        
-        # Add vertical grid lines
-        ax.grid(True, axis='x', linestyle='--', alpha=0.3, color='white')
-        
-        # pass the axis variable
-        # to the `.set_axis_styling`
-        # method
-        self.set_axis_styling(ax)
-        
-        # Tight layout
-        plt.tight_layout()
+            return {'message': 'Unable to calculate prediction'}
 
-        return fig
+        return {'pred': pred}
+
+    # Overwrite the parent class `chart_spec` method
+    # Use the same parameters as the parent
+    def chart_spec(self, data):
+
+        if 'message' in data:
+            return message_chart, {'message': data['message']}
+        pred = data['pred']
+
+        # Determine color based on risk level
+        bar_color, level = risk_level(pred)
+
+        # A horizontal bar with the risk level under the axis
+        return hbar_chart, {
+            'value': pred,
+            'color': bar_color,
+            'label': 'Recruitment Risk',
+            'title': self.title,
+            'caption': f'Risk Level: {level}',
+            'xlabel': 'Probability',
+            }
+
+    def svg_visualization(self, asset_id, model: QueryBase):
+        """
+        Draw the risk bar as SVG, skipping matplotlib entirely.
+        """
+        data = self.chart_data(asset_id, model)
+        if 'message' in data:
+            return message_svg(data['message'], width=800, height=250)
+
+        bar_color, level = risk_level(data['pred'])
+        return hbar_svg(
+            data['pred'],
+            bar_color,
+            label='Recruitment Risk',
+            title=self.title,
+            caption=f'Risk Level: {level}',
+            xlabel='Probability',
+            )
 
 # Create a subclass of combined_components/CombinedComponent
 class Visualizations(CombinedComponent):
@@ -325,10 +434,16 @@ class Visualizations(CombinedComponent):
 
     # Leave this line unchanged
     outer_div_type = Div(cls='grid')
+
+    def div_args(self, userid, model):
+        # The id the filter form swaps new charts into
+        return {'id': 'visualizations'}
             
 # Create a subclass of base_components/DataTable
 class NotesTable(DataTable):
 
+    fragment_key = ('model', 'entity_id', 'data_version')
+
     # Overwrite the `component_data` method
     # using the same parameters as the parent class
     def component_data(self, entity_id, model: QueryBase):
@@ -337,6 +452,11 @@ class NotesTable(DataTable):
         # pass the entity_id to the model's .notes 
         # method. Return the output
         return model.notes(entity_id)
+
+    def build_component(self, entity_id, model: QueryBase):
+        # The id the filter form swaps new notes into
+        table = super().build_component(entity_id, model)
+        return None if table is None else table(id="notes")
     
 
 class DashboardFilters(FormGroup):
@@ -345,6 +465,22 @@ class DashboardFilters(FormGroup):
     action = "/update_data"
     method="POST"
 
+    fragment_key = ('model', 'entity_id', 'data_version')
+
+    def div_args(self, userid, model: QueryBase):
+        # With htmx, submitting swaps in the new charts, notes and
+        # header instead of following `/update_data`'s redirect to a
+        # whole new page. The filters keep their own htmx settings
+        return {
+            **super().div_args(userid, model),
+            'hx_post': '/update_report',
+            'hx_target': '#visualizations',
+            'hx_select': '#visualizations',
+            'hx_select_oob': '#report-header,#notes',
+            'hx_swap': 'outerHTML',
+            'hx_disinherit': '*',
+            }
+
     children = [
         Radio(
             values=["Employee", "Team"],
@@ -354,7 +490,9 @@ class DashboardFilters(FormGroup):
             ),
         ReportDropdown(
             id="selector",
-            name="user-selection")
+            name="user-selection",
+            max_options=dropdown_max_options,
+            search_url="/search")
         ]
     
 # Create a subclass of CombinedComponents
@@ -372,28 +510,95 @@ class Report(CombinedComponent):
         NotesTable(),
     ]
 
+    # When a link is shared, many identical requests arrive at once.
+    # They wait on the first one's render instead of each rendering
+    flights = SingleFlight()
+
+    def flight_key(self, userid, model: QueryBase):
+        return (model.name, userid, model.data_version())
+
+    def __call__(self, userid, model: QueryBase):
+        key = self.flight_key(userid, model)
+        return self.flights.do(key, super().__call__, userid, model)
+
+    async def acall(self, userid, model: QueryBase):
+        key = self.flight_key(userid, model)
+        return await self.flights.ado(key, super().acall, userid, model)
+
+
+# The parts of the report that change with the selected entity,
+# returned when the filter form is submitted with htmx. They are
+# the report's own instances, so they share its cached fragments
+class ReportUpdate(CombinedComponent):
+
+    children = [
+        Report.children[0],
+        Report.children[2],
+        Report.children[3],
+    ]
+
 # Initialize a fasthtml app with custom CSS
 from pathlib import Path
 css_path = Path(__file__).parent.parent / 'assets' / 'report.css'
 app = FastHTML(hdrs=[Link(rel='stylesheet', href='/static/report.css')])
 
+# Start the render workers with the server rather than on the first chart
+if MatplotlibViz.render_pool is not None:
+    app.router.on_startup.append(MatplotlibViz.render_pool.start)
+    app.router.on_shutdown.append(MatplotlibViz.render_pool.shutdown)
+
 # Mount static files
 app.mount('/static', StaticFiles(directory=str(css_path.parent)), name='static')
 
 # Initialize the `Report` class
 report = Report()
+report_update = ReportUpdate()
+
+
+async def report_page(req, entity_id, model: QueryBase, component=report):
+
+    # htmx requests get the report without the surrounding document
+    fragment = is_full_page(req, ())
+
+    if static_export is not None and not fragment:
+        prebuilt = static_export.respond(req)
+        if prebuilt is not None:
+            return prebuilt
+
+    # The page is a function of the entity, the data and the model.
+    # The document links to its origin and path as canonical, but
+    # never to the query string, which stays out of the key
+    origin = page_origin(req)
+
+    async def render():
+        page = await component.acall(entity_id, model)
+        if fragment:
+            return to_xml((page,))
+        # The same document fasthtml builds around a returned component
+        heads = [Title(req.app.title)]
+        if req.app.canonical and origin is not None:
+            heads.append(Link(rel='canonical', href=origin + req.url.path))
+        return to_xml(respond(req, heads, (page,)))
+
+    # Other hosts get the page without a canonical link, and
+    # rendered each time rather than cached under their name
+    if origin is None:
+        return HTMLResponse(await render())
+
+    key = (origin, req.url.path, model.name, entity_id, model.data_version(), model_version(), fragment)
+    return await page_cache.respond(req, key, render)
 
 
 # Create a route for a get request
 # Set the route's path to the root
 @app.get('/')
-def index():
+async def index(req):
 
     # Call the initialized report
     # pass the integer 1 and an instance
     # of the Employee class as arguments
     # Return the result
-    return report(1, Employee())
+    return await report_page(req, 1, Employee())
 
 # Create a route for a get request
 # Set the route's path to receive a request
@@ -403,23 +608,19 @@ def index():
 # parameterize the employee ID 
 # to a string datatype
 @app.get('/employee/{emp_id}')
-def employee(emp_id: str):
+async def employee(req, emp_id: str):
     from fasthtml.common import RedirectResponse
     
-    # Validate employee ID exists (1-25)
-    try:
-        emp_id_int = int(emp_id)
-        valid_ids = [e[1] for e in Employee().names()]
-        if emp_id_int not in valid_ids:
-            return RedirectResponse("/", status_code=303)
-    except ValueError:
+    # Validate employee ID exists with an in-memory lookup
+    if not directory.exists(Employee.name, emp_id):
         return RedirectResponse("/", status_code=303)
+    emp_id_int = int(emp_id)
     
     # Call the initialized report
     # pass the ID and an instance
     # of the Employee SQL class as arguments
     # Return the result
-    return report(emp_id_int, Employee())
+    return await report_page(req, emp_id_int, Employee())
 
 # Create a route for a get request
 # Set the route's path to receive a request
@@ -429,23 +630,123 @@ def employee(emp_id: str):
 # parameterize the team ID 
 # to a string datatype
 @app.get('/team/{team_id}')
-def team(team_id: str):
+async def team(req, team_id: str):
     from fasthtml.common import RedirectResponse
     
-    # Validate team ID exists (1-5)
-    try:
-        team_id_int = int(team_id)
-        valid_ids = [t[1] for t in Team().names()]
-        if team_id_int not in valid_ids:
-            return RedirectResponse("/", status_code=303)
-    except ValueError:
+    # Validate team ID exists with an in-memory lookup
+    if not directory.exists(Team.name, team_id):
         return RedirectResponse("/", status_code=303)
+    team_id_int = int(team_id)
     
     # Call the initialized report
     # pass the id and an instance
     # of the Team SQL class as arguments
     # Return the result
-    return report(team_id_int, Team())
+    return await report_page(req, team_id_int, Team())
+
+
+# Chart components and query classes addressable from the chart route
+charts = {chart.chart_name(): chart for chart in Visualizations.children}
+models = {model.name: model for model in (Employee, Team)}
+
+
+# Serve a chart image with ETag and Last-Modified validators
+# so browsers can revalidate it with a `304 Not Modified`
+@app.get('/charts/{chart_name}/{entity_type}/{entity_id}')
+async def chart(req, chart_name: str, entity_type: str, entity_id: str):
+
+    chart = charts.get(chart_name)
+    model_class = models.get(entity_type)
+    if chart is None or model_class is None:
+        return Response(status_code=404)
+
+    if not directory.exists(entity_type, entity_id):
+        return Response(status_code=404)
+
+    if static_export is not None:
+        prebuilt = static_export.respond(req)
+        if prebuilt is not None:
+            return prebuilt
+
+    model = model_class()
+    entity_id_int = int(entity_id)
+
+    # Render off the event loop so other requests keep being served
+    rendered = await asyncio.to_thread(chart.render, entity_id_int, model)
+    return conditional_response(
+        req,
+        rendered.data,
+        media_type=rendered.media_type,
+        etag=rendered.etag,
+        last_modified=rendered.created,
+        )
+
+
+# Swap the selected entity's charts, notes and header into the page.
+# Without htmx the form posts to `/update_data` and is redirected
+@app.post('/update_report')
+async def update_report(req):
+    data = await req.form()
+    model_class = models.get(str(data.get('profile_type', '')).lower())
+    entity_id = data.get('user-selection')
+
+    # Nothing to swap in, e.g. the typeahead found no matches
+    if model_class is None or not directory.exists(model_class.name, entity_id):
+        return Response(status_code=204)
+
+    model = model_class()
+    url = f"/{model.name}/{int(entity_id)}"
+
+    # Without htmx the form posts as a plain page load, so
+    # send the browser to the full page, as /update_data does
+    if not req.headers.get('HX-Request'):
+        return RedirectResponse(url, status_code=303)
+
+    response = await report_page(req, int(entity_id), model, component=report_update)
+    # Keep the address bar, history and bookmarks on the entity's page
+    response.headers['HX-Push-Url'] = url
+    return response
+
+
+# Page cache counters, for monitoring
+@app.get('/stats/pages')
+def page_stats():
+    return page_cache.stats()._asdict()
+
+
+# Request coalescing counters. `coalesced` counts the
+# requests that waited on an identical in-flight one
+@app.get('/stats/flights')
+def flight_stats():
+    return {
+        'reports': Report.flights.stats()._asdict(),
+        'charts': MatplotlibViz.flights.stats()._asdict(),
+        'queries': query_flights.stats()._asdict(),
+        }
+
+
+# Fragment cache counters per component class: hits, misses,
+# the time spent building and the build time the hits saved
+@app.get('/stats/fragments')
+def fragment_stats():
+    from dataclasses import asdict
+    return {
+        name: {**asdict(stats), 'hit_rate': stats.hit_rate}
+        for name, stats in FragmentCaching.fragment_cache.stats().items()
+        }
+
+
+# Return the typeahead matches for what the user typed,
+# as <option>s that htmx swaps into the dropdown
+@app.get('/search')
+def search(entity: str, q: str = ""):
+
+    model_class = models.get(entity)
+    if model_class is None:
+        return Response(status_code=404)
+
+    dropdown = DashboardFilters.children[1]
+    return dropdown.search_results(q, model_class())
 
 
 # Keep the below code unchanged!
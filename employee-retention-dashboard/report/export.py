@@ -0,0 +1,242 @@
+"""
+Pre-render every employee and team report, and its chart images,
+into a directory of static files.
+
+The data only changes when src/build_project_assets.py rebuilds the
+database and the model, so the pages can be rendered once afterwards.
+Pages are rendered in parallel worker processes. A page is skipped
+when nothing it is rendered from changed since the last export.
+
+Usage, from the report directory:
+
+    python export.py ../static --workers 4
+
+Then either publish the directory as a static site, or run the
+dashboard with STATIC_EXPORT_DIR=../static to serve the prebuilt
+pages and charts from it. The dashboard serves them only while the
+database and model are unchanged, and picks up a new export on its
+next request.
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from static_export import ExportedFile, export_path, read_manifest, write_manifest
+
+# Set in each worker by `_init_worker`
+_client = None
+_out = None
+
+
+def _init_worker(out_dir, base_url):
+    global _client, _out
+
+    # Render live, one chart at a time per worker process
+    os.environ.pop('STATIC_EXPORT_DIR', None)
+    os.environ['RENDER_WORKERS'] = '0'
+
+    import dashboard
+    from starlette.testclient import TestClient
+
+    # The pages link to where the export is served as canonical
+    dashboard.base_url = base_url.rstrip('/')
+    _client = TestClient(dashboard.app, base_url=base_url)
+    _out = Path(out_dir)
+
+
+def page_inputs(model, entity_id, shared):
+    """
+    Hash everything an entity's page and charts are rendered from.
+
+    Args:
+        model: Employee or Team.
+        entity_id (int): The entity's id.
+        shared (str): Hash of the inputs every page of the type shares.
+
+    Returns:
+        str: A hex digest that changes when the page would.
+    """
+    digest = hashlib.sha256(shared.encode())
+    for frame in (
+        model.cumulative_event_counts(entity_id),
+        model.notes(entity_id),
+        model.model_data(entity_id),
+    ):
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def shared_inputs(dashboard, model, base_url):
+    """
+    Hash the inputs every page of one entity type shares: the code
+    and stylesheet, the settings that change the markup, the URL the
+    pages link to, the trained model and the names in the dropdown.
+    """
+    from utils import code_version, model_path
+
+    digest = hashlib.sha256(repr((
+        code_version(),
+        dashboard.MatplotlibViz.renderer,
+        dashboard.MatplotlibViz.inline,
+        dashboard.dropdown_max_options,
+        base_url.rstrip('/'),
+        model().names(),
+    )).encode())
+    digest.update(dashboard.css_path.read_bytes())
+    digest.update(model_path.read_bytes())
+    return digest.hexdigest()
+
+
+def _write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + '.tmp')
+    temporary.write_bytes(content)
+    os.replace(temporary, path)
+
+
+def page_urls(dashboard, path, entity_id, model):
+    """
+    Return the URL paths of a page and of the chart images it references.
+    """
+    if dashboard.MatplotlibViz.inline:
+        return [path]
+    return [path] + [chart.chart_url(entity_id, model) for chart in dashboard.charts.values()]
+
+
+def export_page(task):
+    """
+    Render one page and its charts into the export directory.
+
+    Args:
+        task (tuple): (URL paths of the page and its charts, inputs hash).
+
+    Returns:
+        dict: The {url path: ExportedFile} entries written.
+    """
+    urls, inputs = task
+    entries = {}
+    for url in urls:
+        response = _client.get(url)
+        response.raise_for_status()
+        media_type = response.headers['content-type']
+        file_path = export_path(url, media_type)
+        _write(_out / file_path, response.content)
+        entries[url] = ExportedFile(
+            file_path, media_type, hashlib.sha256(response.content).hexdigest(), inputs,
+            )
+    return entries
+
+
+def export(out_dir, workers=None, base_url='http://localhost', force=False):
+    """
+    Export every report page and its charts.
+
+    Args:
+        out_dir (str | Path): Directory to write the files to.
+        workers (int): Worker processes, 0 to render in this process,
+            or None for one per core.
+        base_url (str): Where the export will be served, for the
+            pages' canonical links.
+        force (bool): Render every page, even unchanged ones.
+
+    Returns:
+        tuple: (pages rendered, pages skipped, seconds taken).
+    """
+    os.environ.pop('STATIC_EXPORT_DIR', None)
+    import dashboard
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    # The previous manifest lists the files to prune even when forced
+    previous = read_manifest(out)
+    reusable = {} if force else previous
+    # Taken before rendering, so a change during the export
+    # leaves the dashboard rendering live rather than stale
+    version = dashboard.content_version()
+    shared = {model.name: shared_inputs(dashboard, model, base_url) for model in dashboard.models.values()}
+
+    # '/' shows the first employee
+    pages = [('/', 'employee', 1)] + [
+        (f'/{entity_type}/{entity_id}', entity_type, entity_id)
+        for entity_type, model in dashboard.models.items()
+        for _, entity_id in model().names()
+    ]
+
+    start = time.perf_counter()
+
+    # Hashing a page's inputs takes a few cached queries, so
+    # unchanged pages are skipped without starting any workers
+    files, tasks = {}, []
+    for path, entity_type, entity_id in pages:
+        model = dashboard.models[entity_type]()
+        urls = page_urls(dashboard, path, entity_id, model)
+        inputs = page_inputs(model, entity_id, shared[entity_type])
+        unchanged = all(
+            url in reusable
+            and reusable[url].inputs == inputs
+            and (out / reusable[url].path).exists()
+            for url in urls
+        )
+        if unchanged:
+            files.update((url, previous[url]) for url in urls)
+        else:
+            tasks.append((urls, inputs))
+
+    if not tasks:
+        results = []
+    elif workers == 0:
+        _init_worker(out, base_url)
+        results = list(map(export_page, tasks))
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(out, base_url)) as executor:
+            results = list(executor.map(export_page, tasks, chunksize=4))
+    seconds = time.perf_counter() - start
+
+    for entries in results:
+        files.update(entries)
+
+    # Remove the files of entities that no longer exist
+    for url, entry in previous.items():
+        if url not in files and (out / entry.path).exists():
+            (out / entry.path).unlink()
+
+    static = out / 'static'
+    static.mkdir(exist_ok=True)
+    shutil.copy(dashboard.css_path, static / dashboard.css_path.name)
+    write_manifest(out, files, {
+        'renderer': dashboard.MatplotlibViz.renderer,
+        'inline': dashboard.MatplotlibViz.inline,
+        'base_url': base_url,
+        }, version)
+
+    return len(tasks), len(pages) - len(tasks), seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('out_dir', help='directory to write the static site to')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: one per core, 0: none)')
+    parser.add_argument('--base-url', default='http://localhost',
+                        help='URL the export will be served from')
+    parser.add_argument('--force', action='store_true',
+                        help='render every page, even unchanged ones')
+    args = parser.parse_args(argv)
+
+    rendered, skipped, seconds = export(args.out_dir, args.workers, args.base_url, args.force)
+    rate = rendered / seconds if seconds else 0.0
+    print(f"Rendered {rendered} pages, skipped {skipped} unchanged "
+          f"in {seconds:.2f}s ({rate:.1f} pages/sec)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+from email.utils import formatdate, parsedate_to_datetime
+from starlette.responses import Response
+
+
+def etag_matches(request, etag):
+    """
+    Return True if the request's If-None-Match header lists `etag`.
+
+    Args:
+        request: The incoming Starlette request.
+        etag (str): The quoted entity tag of the current representation.
+    """
+    header = request.headers.get('if-none-match')
+    if header is None:
+        return False
+    if header.strip() == '*':
+        return True
+    # Weak comparison: W/"x" matches "x"
+    tags = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return etag in tags
+
+
+def not_modified_since(request, last_modified):
+    """
+    Return True if the request's If-Modified-Since is no older than `last_modified`.
+    """
+    header = request.headers.get('if-modified-since')
+    if header is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one-second resolution
+    return int(last_modified) <= since
+
+
+def conditional_response(request, body, media_type, etag, last_modified=None,
+                         cache_control='no-cache'):
+    """
+    Build a response carrying ETag and Last-Modified validators,
+    answering with `304 Not Modified` when the client's copy is current.
+
+    Args:
+        request: The incoming Starlette request.
+        body (bytes | str): The representation to send.
+        media_type (str): The response Content-Type.
+        etag (str): Unquoted entity tag identifying `body`.
+        last_modified (float): Unix timestamp of the last change.
+        cache_control (str): Cache-Control header value.
+
+    Returns:
+        Response: A 200 response with `body`, or an empty 304.
+    """
+    etag = f'"{etag}"'
+    headers = {'ETag': etag, 'Cache-Control': cache_control}
+    if last_modified is not None:
+        headers['Last-Modified'] = formatdate(last_modified, usegmt=True)
+
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+    if 'if-none-match' in request.headers:
+        fresh = etag_matches(request, etag)
+    else:
+        fresh = not_modified_since(request, last_modified)
+
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=media_type, headers=headers)
@@ -0,0 +1,120 @@
+import hashlib
+import threading
+import time
+from typing import NamedTuple
+
+from employee_events.cache import LRUCache
+
+from http_cache import conditional_response, etag_matches
+
+
+class Page(NamedTuple):
+    """
+    A rendered report page.
+
+    Attributes:
+        html: The serialized HTML document or htmx fragment.
+        etag: Unquoted strong entity tag of `html`.
+        created: Unix timestamp of the render.
+    """
+    html: str
+    etag: str
+    created: float
+
+
+class PageStats(NamedTuple):
+    """
+    Counters reported by `PageCache.stats()`.
+
+    Attributes:
+        hits: Pages served from the cache.
+        misses: Pages rendered.
+        not_modified: Requests answered with `304 Not Modified`
+            without rendering or looking the page up.
+        evictions: Pages dropped to stay within the memory bound.
+        entries: Pages currently cached.
+        nbytes: Size of the cached HTML.
+    """
+    hits: int
+    misses: int
+    not_modified: int
+    evictions: int
+    entries: int
+    nbytes: int
+
+
+class PageCache(LRUCache):
+    """
+    A memory-bounded LRU cache of whole report pages.
+
+    A page is keyed by everything its HTML depends on, e.g. the
+    entity type and id, the data version and the model version.
+    Its strong ETag is a hash of that key, so a client whose copy
+    is current gets a `304` before anything is rendered, and the
+    ETag stays valid across restarts of the same code.
+
+    Attributes:
+        max_bytes: Memory bound for the cached HTML.
+        salt: The code version and the settings that change the HTML
+            without being part of the key, e.g. the chart renderer.
+            Mixed into every ETag.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_entries=None, salt=()):
+        super().__init__(max_entries, max_bytes, sizeof=lambda page: len(page.html))
+        self.salt = salt
+        self._not_modified = 0
+        self._not_modified_lock = threading.Lock()
+
+    def page_etag(self, key):
+        """
+        Return the unquoted entity tag of the page stored under `key`.
+        """
+        return hashlib.sha1(repr((self.salt, key)).encode()).hexdigest()
+
+    async def respond(self, request, key, render):
+        """
+        Answer a page request from the cache.
+
+        Args:
+            request: The incoming Starlette request.
+            key (tuple): Everything the page depends on.
+            render: Coroutine function returning the page's HTML,
+                awaited only when the page is not cached.
+
+        Returns:
+            Response: The page with its ETag, or an empty 304.
+        """
+        etag = self.page_etag(key)
+        if etag_matches(request, f'"{etag}"'):
+            with self._not_modified_lock:
+                self._not_modified += 1
+            response = conditional_response(request, b'', 'text/html', etag)
+        else:
+            page = self.get(key)
+            # A page stored under an older salt is stale too
+            if page is None or page.etag != etag:
+                page = Page(await render(), etag, time.time())
+                self.put(key, page)
+
+            response = conditional_response(
+                request,
+                page.html,
+                media_type='text/html; charset=utf-8',
+                etag=page.etag,
+                last_modified=page.created,
+                )
+
+        # htmx requests get a fragment rather than the whole document
+        response.headers['Vary'] = 'HX-Request, HX-History-Restore-Request'
+        return response
+
+    def stats(self) -> PageStats:
+        """
+        Returns the hit, miss, 304 and eviction counts and the current size.
+        """
+        info = self.info()
+        return PageStats(
+            info.hits, info.misses, self._not_modified,
+            info.evictions, info.entries, info.nbytes,
+        )
@@ -0,0 +1,126 @@
+import json
+import mimetypes
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+from http_cache import conditional_response, etag_matches
+
+# Written next to the exported files by export.py
+MANIFEST = 'manifest.json'
+
+
+class ExportedFile(NamedTuple):
+    """
+    A page or chart written by the static export.
+
+    Attributes:
+        path: File path relative to the export directory.
+        media_type: The Content-Type to serve it with.
+        sha256: Hash of the file's content, used as its ETag.
+        inputs: Hash of everything the page was rendered from, so a
+            later export can skip pages whose inputs did not change.
+    """
+    path: str
+    media_type: str
+    sha256: str
+    inputs: str
+
+
+def export_path(url_path, media_type):
+    """
+    Return the file a URL is exported to, e.g. '/team/2' -> 'team/2/index.html'
+    and '/charts/barchart/team/2' -> 'charts/barchart/team/2.png'.
+    """
+    name = url_path.strip('/')
+    if media_type.startswith('text/html'):
+        return f'{name}/index.html' if name else 'index.html'
+    return name + (mimetypes.guess_extension(media_type.split(';')[0]) or '')
+
+
+def load_manifest(directory):
+    """
+    Return an export's files and the version of the data and model
+    they were rendered from, or ({}, None) if there is no export.
+    """
+    manifest = Path(directory) / MANIFEST
+    if not manifest.exists():
+        return {}, None
+    content = json.loads(manifest.read_text())
+    files = {url: ExportedFile(**entry) for url, entry in content['files'].items()}
+    return files, content.get('version')
+
+
+def read_manifest(directory):
+    """
+    Return the {url path: ExportedFile} map of an export, or {} if there is none.
+    """
+    return load_manifest(directory)[0]
+
+
+def write_manifest(directory, files, settings, version=None):
+    """
+    Atomically replace the export's manifest.
+    """
+    manifest = Path(directory) / MANIFEST
+    temporary = manifest.with_suffix('.tmp')
+    temporary.write_text(json.dumps({
+        'settings': settings,
+        'version': version,
+        'files': {url: entry._asdict() for url, entry in sorted(files.items())},
+        }, indent=2))
+    os.replace(temporary, manifest)
+
+
+class StaticExport:
+    """
+    Serves the pages and charts prebuilt by export.py.
+
+    The files are only served while the data and model are the ones
+    they were rendered from. Once `version()` differs from the version
+    in the manifest, e.g. after an ingest or a retrain, every page is
+    rendered live until the next export. A new export is picked up
+    without a restart.
+
+    Attributes:
+        directory: The export directory.
+        version: Returns the current data and model version, in the
+            form export.py writes to the manifest.
+        files: Its manifest, mapping URL paths to ExportedFiles.
+    """
+
+    def __init__(self, directory, version=lambda: None):
+        self.directory = Path(directory)
+        self.version = version
+        self._manifest_id = None
+        self.files, self.files_version = {}, None
+        self._reload()
+
+    def _reload(self):
+        # Reread the manifest when export.py has replaced it, which
+        # gives it a new inode as well as a new modification time
+        try:
+            stat = (self.directory / MANIFEST).stat()
+            manifest_id = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            manifest_id = None
+        if manifest_id != self._manifest_id:
+            self.files, self.files_version = load_manifest(self.directory)
+            self._manifest_id = manifest_id
+
+    def respond(self, request, url_path=None):
+        """
+        Return the exported file for the request's path as a
+        response with its content hash as ETag, or None if the
+        path was not exported or the export is out of date.
+        """
+        self._reload()
+        entry = self.files.get(request.url.path if url_path is None else url_path)
+        if entry is None or self.files_version != self.version():
+            return None
+        # A current client copy needs no disk read
+        if etag_matches(request, f'"{entry.sha256}"'):
+            body = b''
+        else:
+            body = (self.directory / entry.path).read_bytes()
+        return conditional_response(request, body, entry.media_type, entry.sha256)
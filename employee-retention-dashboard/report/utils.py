@@ -1,13 +1,21 @@
+import hashlib
+import os
 import pickle
+import threading
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
+
 project_root = Path(__file__).resolve().parents[1]
 model_path = project_root / "assets" / "model.pkl"
+# The compiled scorer, written next to the model when it is trained
+scorer_path = model_path.with_suffix(".npz")
 
 def load_model():
     """
     Load a machine learning model from the model.pkl file.
-    
+
     Returns:
         object: The loaded machine learning model.
     """
@@ -15,4 +23,206 @@ def load_model():
     with model_path.open('rb') as file:
         model = pickle.load(file)
 
-    return model
\ No newline at end of file
+    return model
+
+
+def model_version():
+    """
+    Return a token that changes whenever model.pkl is replaced.
+
+    Returns:
+        tuple: The model file's size and modification time.
+    """
+    stat = model_path.stat()
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """
+    Return a hash of the report's source code, which changes with
+    any deploy that changes the markup it renders.
+
+    Returns:
+        str: A hex digest of every .py file under report/.
+    """
+    digest = hashlib.sha256()
+    report = Path(__file__).resolve().parent
+    for path in sorted(report.rglob("*.py")):
+        digest.update(path.relative_to(report).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class LinearScorer:
+    """
+    A fitted logistic model reduced to its weights, scored with
+    one dot product and a sigmoid instead of scikit-learn.
+
+    Attributes:
+        coef (numpy.ndarray): One weight per feature.
+        intercept (float): The bias term.
+        features (list): The feature names, in weight order, or None.
+    """
+
+    def __init__(self, coef, intercept, features=None):
+        self.coef = np.asarray(coef, dtype=float).ravel()
+        self.intercept = float(intercept)
+        self.features = None if features is None else list(features)
+
+    @classmethod
+    def from_model(cls, model):
+        """
+        Compile a fitted binary LogisticRegression, or a linear
+        classifier with log loss, optionally behind a StandardScaler
+        in a Pipeline. The scaler is folded into the weights.
+
+        Raises:
+            TypeError: If the model cannot be compiled.
+        """
+        steps = [step for _, step in getattr(model, "steps", [("model", model)])]
+        *scalers, classifier = steps
+        if not hasattr(classifier, "predict_proba") or getattr(classifier, "coef_", None) is None:
+            raise TypeError(f"Cannot compile {type(classifier).__name__}: not a linear classifier")
+        if classifier.coef_.shape[0] != 1:
+            raise TypeError("Only binary classifiers can be compiled")
+
+        coef = classifier.coef_[0].astype(float)
+        intercept = float(classifier.intercept_[0])
+        features = getattr(classifier, "feature_names_in_", None)
+
+        if scalers:
+            if len(scalers) > 1 or type(scalers[0]).__name__ != "StandardScaler":
+                raise TypeError("Only a single StandardScaler step can be compiled")
+            scaler = scalers[0]
+            # w . (x - mean) / scale + b = (w / scale) . x + b - w . mean / scale
+            if scaler.scale_ is not None:
+                coef = coef / scaler.scale_
+            if scaler.mean_ is not None and scaler.with_mean:
+                intercept -= float(coef @ scaler.mean_)
+            features = getattr(scaler, "feature_names_in_", None)
+
+        return cls(coef, intercept, features)
+
+    def predict_proba(self, X):
+        """
+        Return the class probabilities, shaped like scikit-learn's:
+        one row per record, the second column the positive class.
+        """
+        # Selecting columns costs more than scoring, so it is
+        # skipped when they are already in the model's order
+        if self.features is not None and hasattr(X, "columns") and list(X.columns) != self.features:
+            X = X[self.features]
+        z = np.asarray(X, dtype=float) @ self.coef + self.intercept
+        # 1 / (1 + e^-z), without overflow for large |z|
+        positive = np.exp(-np.logaddexp(0, -z))
+        return np.column_stack([1 - positive, positive])
+
+    def save(self, path, source=""):
+        """
+        Write the scorer to an .npz file, with a hash of the model
+        file it was compiled from.
+        """
+        path = Path(path)
+        temporary = path.with_name(path.name + ".tmp")
+        with temporary.open("wb") as file:
+            np.savez(
+                file,
+                coef=self.coef,
+                intercept=self.intercept,
+                features=np.array(self.features or [], dtype=str),
+                source=source,
+                )
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a scorer written by `save`.
+
+        Returns:
+            tuple: The scorer and the hash of its source model file.
+        """
+        with np.load(path) as data:
+            features = [str(name) for name in data["features"]] or None
+            scorer = cls(data["coef"], data["intercept"], features)
+            return scorer, str(data["source"])
+
+
+def model_hash(path=model_path):
+    """
+    Return the SHA-256 of a model file, which identifies it across copies.
+    """
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def compile_model(model_file=model_path, model=None):
+    """
+    Compile a model file into a LinearScorer and write it next to
+    the file as .npz. Training calls this after writing the model.
+
+    Args:
+        model_file (str | Path): The pickled model.
+        model: The unpickled model, if already loaded.
+
+    Returns:
+        LinearScorer: The compiled scorer.
+
+    Raises:
+        TypeError: If the model cannot be compiled.
+    """
+    model_file = Path(model_file)
+    if model is None:
+        with model_file.open('rb') as file:
+            model = pickle.load(file)
+    scorer = LinearScorer.from_model(model)
+    scorer.save(model_file.with_suffix(".npz"), source=model_hash(model_file))
+    return scorer
+
+
+_predictor = None
+_predictor_version = None
+_predictor_lock = threading.Lock()
+
+
+def _build_predictor():
+    if os.environ.get("MODEL_SCORER", "numpy") == "sklearn":
+        return load_model()
+
+    # A scorer compiled from this exact model file loads without scikit-learn
+    if scorer_path.exists():
+        scorer, source = LinearScorer.load(scorer_path)
+        if source == model_hash(model_path):
+            return scorer
+
+    # Without a current .npz, e.g. for a model trained elsewhere, the
+    # model is compiled in memory; the request path never writes files
+    model = load_model()
+    try:
+        return LinearScorer.from_model(model)
+    except TypeError:
+        # Models that are not linear are scored by scikit-learn
+        return model
+
+
+def load_predictor():
+    """
+    Return the model used for predictions, loaded on first use and
+    again whenever model.pkl is replaced.
+
+    This is the compiled LinearScorer when the model is linear, and
+    the unpickled scikit-learn model otherwise or when the MODEL_SCORER
+    environment variable is "sklearn". Both offer `predict_proba`.
+
+    Returns:
+        object: The predictor.
+    """
+    global _predictor, _predictor_version
+
+    version = model_version()
+    if _predictor_version != version:
+        with _predictor_lock:
+            if _predictor_version != version:
+                _predictor = _build_predictor()
+                _predictor_version = version
+    return _predictor
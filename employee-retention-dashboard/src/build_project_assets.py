@@ -1,175 +1,207 @@
 import pandas as pd
-from pathlib import Path
 import numpy as np
-import random, pickle, json
+import argparse, multiprocessing, json, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from sqlite3 import connect
 from datetime import timedelta, date
-from sklearn.linear_model import LogisticRegression
-from scipy.stats import norm, expon, uniform, skewnorm
-
-
-cwd = Path('.').resolve()
-
-def left_skew(a, loc, size=500):
-    r = skewnorm.rvs(a = a , loc=loc, size=size) 
-    r = r - min(r)     
-    r= r / max(r) 
-    r = r * loc  
-    r = r.astype(int)       
-    return random.choice(r)
-
-
-profiles = {
-    'good': {
-        'positive': lambda: norm.rvs(loc=norm.rvs(4), scale=1).astype(int),
-        'negative': lambda: expon.rvs(loc=0, scale=np.random.choice([.5, 1])).astype(int),
-        'chance': .5
-    },
-    'normal': {
-        'positive': lambda: norm.rvs(loc=norm.rvs(3), scale=1).astype(int),
-        'negative': lambda: norm.rvs(loc=2, scale=np.random.choice([.5, 1,2,3])).astype(int),
-        'chance': .15
-    },
-    'poor': {
-        'positive': lambda: expon.rvs(loc=0, scale=.5).astype(int),
-        'negative': lambda: norm.rvs(loc=.5).astype(int),
-        'chance': .1
-    },
-    'chaotic_good': {
-        'positive': lambda: left_skew(-1000, 5).astype(int),
-        'negative': lambda: np.random.choice([0, np.random.choice([50, 200])], p=[.98, .02]),
-        'chance': .2
-    },
-    'chotic_bad': {
-        'positive': lambda: expon.rvs(loc=0, scale=5).astype(int),
-        'negative': lambda: left_skew(-1000, 10).astype(int),
-        'chance': .2
-    }
-}
-
-employees = {}
-is_recruited = lambda x: np.random.choice([0, 1], p=[1-x, x])
-
-for employee_id in range(1, 26):
-
-
-    employee_type = random.choice(list(profiles.keys()))
-    event_distribution = profiles[employee_type]
-    team_id = random.choice(range(1, 6))
-    recruited = is_recruited(event_distribution['chance'])
-
-    employees[employee_id] = dict(
-        employee_type=employee_type,
-        event_distribution=event_distribution,
-        team_id=team_id,
-        recruited=recruited
-    )
-    
-
-today = date.today()
-last_year = today - timedelta(days=365)
-daterange = pd.date_range(last_year, today)
-data = []
-
-for day in daterange:
-
-    if day.weekday() < 5:
-
-        for employee, config in employees.items():
-            config['events'] = config.get('events', {})
-            employee_type = config['employee_type']
-            positive = profiles[employee_type]['positive']() 
-            negative = profiles[employee_type]['negative']()
-            data.append([
-                employee,
-                config['team_id'],
-                day.strftime('%Y-%m-%d'),
-                positive,
-                negative,
-                config['recruited'],
-                ]
-                
-                )
-
-
-df = pd.DataFrame(data, columns=['employee_id', 'team_id', 'event_date', 'positive_events', 'negative_events', 'recruited'])
-
-data_path = cwd / 'generated_data'
-employees_path = data_path / 'employees.json'
-managers_path = data_path / 'managers.json'
-shifts_path = data_path / 'shifts.json'
-teams_path = data_path / 'team_names.json'
-
-with employees_path.open('r') as file:
-    employee = json.load(file)
-
-with managers_path.open('r') as file:
-    managers = json.load(file)   
-
-with shifts_path.open('r') as file:
-    shift = json.load(file)
-
-with teams_path.open('r') as file:
-    team_names = json.load(file)
-
-_ = []
-for idx, e in enumerate(employee, start=1):
-
-    for note in e['notes']:
-        _.append([idx, e['name'], note])
-
-notes = pd.DataFrame(_, columns=['employee_id', 'employee_name', 'note']).assign(
-            event_date=np.random.choice(df.event_date, size=len(_), replace=True)
-)
-
-
-df = df.merge(notes[['employee_id', 'event_date', 'note']], on=['employee_id', 'event_date'], how='left').merge(notes[['employee_id', 'employee_name']].drop_duplicates(), on=['employee_id'])
-
-df = df.assign(shift=df.team_id.apply(lambda x: shift[x-1]))
-
-team_map = {}
-for team in df.team_id.unique():
-    team_map[team] = random.choice(managers)
-
-df['manager_name'] = df.team_id.map(team_map)
-df['team_name'] = df.team_id.apply(lambda x: team_names[x-1])
-
-
-employee = df.drop_duplicates('employee_id').assign(
-    first_name = lambda x: x.employee_name.str.split().str[0],
-    last_name = lambda x: x.employee_name.str.split().str[1],
-)[['employee_id', 'first_name', 'last_name', 'team_id']]
-
-events = df[['event_date', 'employee_id', 'team_id', 'positive_events', 'negative_events']]
-
-team = df.drop_duplicates('team_id')[['team_id', 'team_name', 'shift', 'manager_name']]
-
-notes = df.dropna()[['employee_id', 'team_id', 'note', 'event_date']].rename(columns={'event_date':'note_date'})
-
-model = LogisticRegression(penalty=None)
-
-X = events.groupby('employee_id')[['positive_events', 'negative_events']].sum()
-y = X.join(df.drop_duplicates('employee_id').set_index('employee_id')[['recruited']]).recruited
-
-model.fit(X, y)
-
-X.assign(true=y, pred=model.predict_proba(X)[:,1])
-
-
-model_path = cwd.parent / 'assets' / 'model.pkl'
-
-with model_path.open('wb') as file:
-
-    pickle.dump(model, file)
-
-
-db_path = cwd.parent / 'python-package' / 'employee_events' / 'employee_events.db'
-
-connection = connect(db_path)
-
-employee.to_sql('employee', connection, if_exists='replace')
-team.to_sql('team', connection, if_exists='replace')
-notes.to_sql('notes', connection, if_exists='replace')
-events.to_sql('employee_events', connection, if_exists='replace')
-
-connection.close()
\ No newline at end of file
+from employee_events.schema import build_database
+
+# The block generators live in a module of their own, which
+# spares the worker processes the training imports; see `stream`
+from synthetic_events import generate_events, generate_notes, profiles
+from utils import project_root, package_path, event_color, complete_color, color_end
+
+
+data_path = project_root / 'src' / 'generated_data'
+model_path = project_root / 'assets' / 'model.pkl'
+db_path = package_path / 'employee_events.db'
+
+
+def load_generated_data():
+    """
+    Read the employee names and notes, managers, shifts and team names.
+    """
+    loaded = {}
+    for name in ('employees', 'managers', 'shifts', 'team_names'):
+        with (data_path / f'{name}.json').open('r') as file:
+            loaded[name] = json.load(file)
+    return loaded
+
+
+def assign_employees(rng, n_employees, n_teams=5):
+    """
+    Give each employee a random profile, team and recruitment outcome.
+
+    Returns:
+        pandas.DataFrame: `employee_type`, `team_id` and `recruited`,
+            indexed by `employee_id` from 1.
+    """
+    names = list(profiles)
+    chances = np.array([profiles[name]['chance'] for name in names])
+    employee_type = rng.integers(0, len(names), n_employees)
+    return pd.DataFrame({
+        'employee_type': np.array(names)[employee_type],
+        'team_id': rng.integers(1, n_teams + 1, n_employees),
+        'recruited': (rng.random(n_employees) < chances[employee_type]).astype(int),
+    }, index=pd.RangeIndex(1, n_employees + 1, name='employee_id'))
+
+
+def build_tables(rng, employees, generated):
+    """
+    Build the employee and team tables.
+
+    The first employees are named as in employees.json. Any
+    others get a random pairing of its first and last names.
+    """
+    people = generated['employees']
+    listed = [person['name'].split() for person in people][:len(employees)]
+    extra = len(employees) - len(listed)
+    first_name = [name[0] for name in listed] + list(rng.choice([name[0] for name in listed], extra))
+    last_name = [name[1] for name in listed] + list(rng.choice([name[1] for name in listed], extra))
+
+    employee = pd.DataFrame({
+        'employee_id': employees.index,
+        'first_name': first_name,
+        'last_name': last_name,
+        'team_id': employees.team_id.to_numpy(),
+    })
+
+    # Every team with employees, its shift and a random manager.
+    # Past the named teams, names repeat with a number: "Alpha Team 2"
+    team_ids = np.sort(employees.team_id.unique())
+    names, shifts = generated['team_names'], generated['shifts']
+    team = pd.DataFrame({
+        'team_id': team_ids,
+        'team_name': [
+            names[(i - 1) % len(names)] + (f' {(i - 1) // len(names) + 1}' if i > len(names) else '')
+            for i in team_ids
+        ],
+        'shift': [shifts[(i - 1) % len(shifts)] for i in team_ids],
+        'manager_name': rng.choice(generated['managers'], len(team_ids)),
+    })
+
+    return employee, team
+
+
+# Starting a worker takes about a second and a block of 1000
+# employees about a tenth of one, so smaller builds are generated
+# in this process however many workers are asked for
+PARALLEL_MIN_EMPLOYEES = 50_000
+
+
+def stream(function, tasks, executor=None, ahead=2):
+    """
+    Yield `function(*task)` for each task, in order.
+
+    With an executor the tasks run in its worker processes, at most
+    `ahead` of them ahead of the consumer, so the results waiting to
+    be written stay bounded however many tasks there are.
+    """
+    if executor is None:
+        for task in tasks:
+            yield function(*task)
+        return
+
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(function, *task))
+        if len(pending) > ahead:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def build(n_employees=None, n_teams=None, days=365, seed=None, workers=1,
+          chunk_size=1000, db=db_path, model_file=model_path, today=None):
+    """
+    Generate the synthetic data, stream it into the database,
+    then train the model from the database and write the model file.
+
+    The employees are generated in blocks of `chunk_size`, each from
+    its own random stream spawned from `seed`, so the output for a
+    seed is the same however many worker processes generate it.
+    Builds under `PARALLEL_MIN_EMPLOYEES` employees use no workers.
+    """
+    # Imported here rather than at the top: the spawned workers import
+    # this script as their main module and do not need scikit-learn
+    from train_model import train
+
+    start = time.perf_counter()
+    generated = load_generated_data()
+    n_employees = n_employees or len(generated['employees'])
+    n_teams = n_teams or len(generated['team_names'])
+
+    today = today or date.today()
+    daterange = pd.date_range(today - timedelta(days=days), today)
+    weekdays = daterange[daterange.weekday < 5].strftime('%Y-%m-%d').to_numpy()
+
+    root = np.random.SeedSequence(seed)
+    rng = np.random.default_rng(root.spawn(1)[0])
+    employees = assign_employees(rng, n_employees, n_teams)
+    employee, team = build_tables(rng, employees, generated)
+
+    blocks = [employees.iloc[i:i + chunk_size] for i in range(0, n_employees, chunk_size)]
+    event_seeds = root.spawn(len(blocks))
+    note_seeds = root.spawn(len(blocks))
+
+    workers = min(workers, len(blocks)) if n_employees >= PARALLEL_MIN_EMPLOYEES else 1
+    # One pool generates both the events and the notes
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+
+    events = stream(generate_events, zip(event_seeds, blocks, [weekdays] * len(blocks)), executor, 2 * workers)
+    notes = stream(
+        generate_notes,
+        zip(note_seeds, blocks, [weekdays] * len(blocks), [generated['employees']] * len(blocks)),
+        executor,
+        2 * workers,
+        )
+
+    # The labels are stored with the data so the model can be retrained from the database alone
+    labels = employees.recruited.reset_index()
+
+    connection = connect(db)
+    try:
+        # Write the tables with primary keys, covering indexes and planner statistics
+        build_database(connection, employee=employee, team=team, notes=notes, events=events, labels=labels)
+    finally:
+        connection.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    seconds = time.perf_counter() - start
+    n_events = n_employees * len(weekdays)
+    print(f"{event_color}Wrote {n_events} events for {n_employees} employees in "
+          f"{seconds:.1f}s ({n_events / seconds:,.0f} rows/sec){color_end}")
+
+    # The features are summed by the database, a chunk of employees at a time
+    train(db, model_file, seed=seed)
+    print(f"{complete_color}Built {Path(db).name} and {Path(model_file).name} "
+          f"in {time.perf_counter() - start:.1f}s{color_end}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate the synthetic employee events database and model.')
+    parser.add_argument('--employees', type=int, default=None,
+                        help='number of employees (default: one per employees.json entry)')
+    parser.add_argument('--teams', type=int, default=None,
+                        help='number of teams (default: one per team_names.json entry)')
+    parser.add_argument('--days', type=int, default=365, help='days of event history')
+    parser.add_argument('--seed', type=int, default=None, help='seed for a reproducible dataset')
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f'processes generating the data, from {PARALLEL_MIN_EMPLOYEES} employees')
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help='employees generated and committed per chunk')
+    parser.add_argument('--db', type=Path, default=db_path, help='database to write')
+    parser.add_argument('--model', type=Path, default=model_path, help='model file to write')
+    args = parser.parse_args(argv)
+
+    build(args.employees, args.teams, args.days, args.seed, args.workers,
+          args.chunk_size, args.db, args.model)
+
+
+if __name__ == '__main__':
+    main()
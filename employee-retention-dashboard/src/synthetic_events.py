@@ -0,0 +1,127 @@
+"""
+Generators for the synthetic event and note blocks.
+
+The build's worker processes import this module to generate their
+blocks, so it imports only numpy, pandas and scipy.special; training
+and scikit-learn stay in the parent process.
+"""
+import numpy as np
+import pandas as pd
+from scipy.special import ndtri
+from employee_events.schema import NOTE_KEY
+
+
+def left_skew(rng, scale, size, n=500):
+    """
+    Draw `size` values from 0 to `scale`, skewed towards `scale`.
+
+    Each value is one of `n` draws of a strongly left-skewed normal
+    (skewnorm with a=-1000, i.e. loc - |Z|), min-max scaled over the
+    `n` draws to [0, scale] and truncated to an int. Rather than
+    drawing all `n` per value, the largest and smallest of the `n`
+    draws and the one picked are sampled directly as order statistics,
+    which gives the same distribution at the cost of three draws.
+    """
+    u_max, u_min, u_mid, pick = rng.random((4, *np.atleast_1d(size)))
+
+    # Quantiles of the largest of n draws, of the smallest of the
+    # other n-1 (which lie below it), and of a draw between them
+    q_max = u_max ** (1 / n)
+    q_min = q_max * (1 - u_min ** (1 / (n - 1)))
+    q_pick = q_min + (q_max - q_min) * u_mid
+
+    # The picked draw is the largest or the smallest with chance 1/n each
+    q_pick = np.where(pick < 1 / n, q_max, np.where(pick < 2 / n, q_min, q_pick))
+
+    # |Z| is largest where loc - |Z| is smallest, so it scales to 0.
+    # The half-normal quantile function, without importing scipy.stats
+    largest, smallest, picked = ndtri((1 + np.array([q_max, q_min, q_pick])) / 2)
+    return ((largest - picked) / (largest - smallest) * scale).astype(int)
+
+
+# Each profile draws a whole (days, employees) matrix of daily event counts
+profiles = {
+    'good': {
+        'positive': lambda rng, size: rng.normal(rng.normal(4, 1, size), 1).astype(int),
+        'negative': lambda rng, size: rng.exponential(rng.choice([.5, 1], size)).astype(int),
+        'chance': .5
+    },
+    'normal': {
+        'positive': lambda rng, size: rng.normal(rng.normal(3, 1, size), 1).astype(int),
+        'negative': lambda rng, size: rng.normal(2, rng.choice([.5, 1, 2, 3], size)).astype(int),
+        'chance': .15
+    },
+    'poor': {
+        'positive': lambda rng, size: rng.exponential(.5, size).astype(int),
+        'negative': lambda rng, size: rng.normal(.5, 1, size).astype(int),
+        'chance': .1
+    },
+    'chaotic_good': {
+        'positive': lambda rng, size: left_skew(rng, 5, size),
+        'negative': lambda rng, size: np.where(rng.random(size) < .02, rng.choice([50, 200], size), 0),
+        'chance': .2
+    },
+    'chotic_bad': {
+        'positive': lambda rng, size: rng.exponential(5, size).astype(int),
+        'negative': lambda rng, size: left_skew(rng, 10, size),
+        'chance': .2
+    }
+}
+
+
+def generate_events(seed, employees, days):
+    """
+    Draw the weekday positive and negative event counts of a block
+    of employees from the block's own random stream.
+
+    Returns:
+        pandas.DataFrame: One row per (employee, weekday), employee by
+            employee, which is the order of the events table's key.
+    """
+    rng = np.random.default_rng(seed)
+    n_days, n_employees = len(days), len(employees)
+    positive = np.empty((n_days, n_employees), dtype=np.int64)
+    negative = np.empty((n_days, n_employees), dtype=np.int64)
+
+    # One draw per profile for all of its employees and days
+    for employee_type, columns in employees.groupby('employee_type').indices.items():
+        profile = profiles[employee_type]
+        positive[:, columns] = profile['positive'](rng, (n_days, len(columns)))
+        negative[:, columns] = profile['negative'](rng, (n_days, len(columns)))
+
+    return pd.DataFrame({
+        'event_date': np.tile(days, n_employees),
+        'employee_id': np.repeat(employees.index.to_numpy(), n_days),
+        'team_id': np.repeat(employees.team_id.to_numpy(), n_days),
+        'positive_events': positive.T.ravel(),
+        'negative_events': negative.T.ravel(),
+    })
+
+
+def generate_notes(seed, employees, days, people, notes_per_employee=5):
+    """
+    Date the notes of a block of employees on random weekdays.
+
+    Employees listed in employees.json keep their own notes. The
+    others get `notes_per_employee` notes drawn from all of them.
+    """
+    rng = np.random.default_rng(seed)
+    ids = employees.index.to_numpy()
+    listed, other = ids[ids <= len(people)], ids[ids > len(people)]
+
+    pool = [note for person in people for note in person['notes']]
+    employee_id = np.concatenate([
+        np.repeat(listed, [len(people[i - 1]['notes']) for i in listed]),
+        np.repeat(other, notes_per_employee),
+    ]).astype(np.int64)
+    note = [note for i in listed for note in people[i - 1]['notes']]
+    note += list(rng.choice(pool, len(other) * notes_per_employee))
+
+    notes = pd.DataFrame({
+        'employee_id': employee_id,
+        'team_id': employees.team_id.loc[employee_id].to_numpy(),
+        'note': note,
+        'note_date': rng.choice(days, len(employee_id)),
+    }).sort_values(['employee_id', 'note_date'], kind='stable', ignore_index=True)
+    # A note drawn twice for the same day would repeat the notes table's key
+    return notes.drop_duplicates(NOTE_KEY, ignore_index=True)
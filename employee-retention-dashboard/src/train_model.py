@@ -0,0 +1,212 @@
+import argparse, hashlib, importlib.util, json, os, pickle, time
+from datetime import datetime, timezone
+from pathlib import Path
+from sqlite3 import connect, OperationalError
+
+import pandas as pd
+import sklearn
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from employee_events.rollups import rollup_watermark
+
+from utils import project_root, package_path, event_color, complete_color, color_end
+
+
+model_path = project_root / 'assets' / 'model.pkl'
+db_path = package_path / 'employee_events.db'
+
+
+def load_report_utils():
+    """
+    Import report/utils.py, which compiles the model for the dashboard.
+    It is loaded from its path since src/utils.py shares its name.
+    """
+    spec = importlib.util.spec_from_file_location('report_utils', project_root / 'report' / 'utils.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# The model's inputs, in the order the dashboard passes them
+FEATURES = ['positive_events', 'negative_events']
+
+# Each employee's lifetime event totals and label, one row per employee.
+# Both sources are keyed on employee_id first, so SQLite groups the
+# rows as it scans them and hands each one out as soon as it is summed.
+FEATURES_SQL = """
+    SELECT f.employee_id,
+        SUM(f.positive_events) AS positive_events,
+        SUM(f.negative_events) AS negative_events,
+        l.recruited
+    FROM {source} f
+    JOIN employee_labels l ON l.employee_id = f.employee_id
+    GROUP BY f.employee_id
+    ORDER BY f.employee_id
+    """
+
+
+def feature_source(connection):
+    """
+    Return the table to sum the features from: the rolled-up totals,
+    a row per employee and team, or the raw events without rollups.
+    """
+    return 'employee_totals' if rollup_watermark(connection) is not None else 'employee_events'
+
+
+def feature_chunks(connection, chunk_size=10000):
+    """
+    Yield the features and labels as DataFrames of up to `chunk_size`
+    employees, fetched from the grouped query a chunk at a time.
+    """
+    sql = FEATURES_SQL.format(source=feature_source(connection))
+    yield from pd.read_sql_query(sql, connection, chunksize=chunk_size)
+
+
+def data_hash(connection, chunk_size=10000):
+    """
+    Return a SHA-256 of the training rows: each employee's totals and
+    label, in employee order. Unlike the database file's stat, it is
+    the same for the same data on any machine or copy.
+    """
+    digest = hashlib.sha256()
+    for chunk in feature_chunks(connection, chunk_size):
+        rows = chunk[['employee_id', *FEATURES, 'recruited']].to_numpy()
+        digest.update(rows.astype('<i8').tobytes())
+    return digest.hexdigest()
+
+
+def fit_batch(connection, chunk_size=10000):
+    """
+    Fit a logistic regression on every employee's features at once.
+
+    Only the per-employee totals are held in memory, never the events.
+
+    Returns:
+        tuple: The fitted model and the number of training rows.
+    """
+    features = pd.concat(feature_chunks(connection, chunk_size), ignore_index=True)
+    # An infinite C fits without regularization
+    model = LogisticRegression(C=float('inf'))
+    model.fit(features[FEATURES], features.recruited)
+    return model, len(features)
+
+
+def fit_incremental(connection, chunk_size=10000, epochs=5, seed=None):
+    """
+    Fit a scaled logistic model with `partial_fit`, one chunk at a time.
+
+    One pass over the query fits the scaler, then each epoch makes
+    another, so memory is bounded by `chunk_size` however many
+    employees there are.
+
+    Returns:
+        tuple: The fitted pipeline and the number of training rows.
+    """
+    scaler = StandardScaler()
+    rows = 0
+    for chunk in feature_chunks(connection, chunk_size):
+        scaler.partial_fit(chunk[FEATURES])
+        rows += len(chunk)
+
+    # The default 'optimal' schedule takes steps far too large for
+    # standardized features; a small constant step converges to the
+    # batch fit within a few epochs
+    classifier = SGDClassifier(loss='log_loss', learning_rate='constant', eta0=0.01, random_state=seed)
+    for _ in range(epochs):
+        for chunk in feature_chunks(connection, chunk_size):
+            classifier.partial_fit(scaler.transform(chunk[FEATURES]), chunk.recruited, classes=[0, 1])
+
+    return Pipeline([('scaler', scaler), ('classifier', classifier)]), rows
+
+
+def _write(path, content):
+    temporary = path.with_name(path.name + '.tmp')
+    temporary.write_bytes(content)
+    os.replace(temporary, path)
+
+
+def train(db=db_path, model_file=model_path, chunk_size=10000, method='auto',
+          max_batch_rows=1_000_000, epochs=5, seed=None):
+    """
+    Train the recruitment risk model from the database and write it
+    to `model_file`, with its metadata next to it as a .json file and
+    its compiled scorer as a .npz file.
+
+    `method` is 'batch', 'incremental', or 'auto' to fit in one batch
+    unless there are more than `max_batch_rows` employees.
+
+    Returns:
+        dict: The metadata written.
+    """
+    db, model_file = Path(db), Path(model_file)
+    # Read-only, so a missing database is an error rather than a new file
+    connection = connect(f'{db.resolve().as_uri()}?mode=ro', uri=True)
+    try:
+        try:
+            n_labels = connection.execute('SELECT COUNT(*) FROM employee_labels').fetchone()[0]
+        except OperationalError:
+            n_labels = 0
+        if not n_labels:
+            raise ValueError(f'{db.name} has no training labels; rebuild it with build_project_assets.py')
+        if method == 'auto':
+            method = 'batch' if n_labels <= max_batch_rows else 'incremental'
+
+        start = time.perf_counter()
+        if method == 'batch':
+            model, rows = fit_batch(connection, chunk_size)
+        elif method == 'incremental':
+            model, rows = fit_incremental(connection, chunk_size, epochs, seed)
+        else:
+            raise ValueError(f'Unknown training method: {method!r}')
+        fit_seconds = time.perf_counter() - start
+
+        source = feature_source(connection)
+        watermark = rollup_watermark(connection)
+        training_data = data_hash(connection, chunk_size)
+    finally:
+        connection.close()
+
+    estimator = model.steps[-1][1] if isinstance(model, Pipeline) else model
+    metadata = {
+        'estimator': type(estimator).__name__,
+        'method': method,
+        'features': FEATURES,
+        'training_rows': rows,
+        'source': source,
+        # The rows the model was trained on and their last event date
+        'data_hash': training_data,
+        'watermark': watermark,
+        'fit_seconds': round(fit_seconds, 3),
+        'trained_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'sklearn_version': sklearn.__version__,
+    }
+
+    _write(model_file, pickle.dumps(model))
+    _write(model_file.with_suffix('.json'), json.dumps(metadata, indent=2).encode())
+
+    # The dashboard scores with the compiled .npz and never imports
+    # scikit-learn while it is current
+    load_report_utils().compile_model(model_file, model)
+    return metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train the recruitment risk model from the employee events database.')
+    parser.add_argument('--db', type=Path, default=db_path, help='database to train on')
+    parser.add_argument('--model', type=Path, default=model_path, help='model file to write')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='employees fetched per chunk')
+    parser.add_argument('--method', choices=['auto', 'batch', 'incremental'], default='auto',
+                        help='fit in one batch, chunk by chunk with partial_fit, or pick by size')
+    parser.add_argument('--epochs', type=int, default=5, help='passes over the data when incremental')
+    parser.add_argument('--seed', type=int, default=None, help='seed for the incremental fit')
+    args = parser.parse_args(argv)
+
+    metadata = train(args.db, args.model, args.chunk_size, args.method, epochs=args.epochs, seed=args.seed)
+    print(f"{event_color}Fit {metadata['estimator']} on {metadata['training_rows']} employees "
+          f"in {metadata['fit_seconds']:.2f}s{color_end}")
+    print(f"{complete_color}Wrote {args.model.name}, {args.model.with_suffix('.json').name} "
+          f"and {args.model.with_suffix('.npz').name}{color_end}")
+
+
+if __name__ == '__main__':
+    main()
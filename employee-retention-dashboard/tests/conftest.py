@@ -0,0 +1,43 @@
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def import_src(monkeypatch):
+    """
+    Fixture that returns a function importing a script from src/.
+
+    src/utils.py shares its name with report/utils.py, so src/ is put
+    first on the path, and the scripts and their utils are dropped
+    from sys.modules afterwards, restoring the report's utils.
+    """
+    names = ("utils", "train_model", "build_project_assets", "synthetic_events")
+    monkeypatch.syspath_prepend(str(project_root / "src"))
+    for name in names:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    yield importlib.import_module
+    for name in names:
+        sys.modules.pop(name, None)
+
+
+@pytest.fixture
+def make_request():
+    """
+    Fixture that returns a function building a Starlette
+    GET request with the given headers.
+    """
+    from starlette.requests import Request
+
+    def make_request(headers):
+        return Request({
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        })
+    return make_request
@@ -0,0 +1,123 @@
+import random
+import sqlite3
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import chi2_contingency, expon, norm, skewnorm
+
+
+@pytest.fixture
+def build_project_assets(import_src):
+    """
+    Fixture that imports src/build_project_assets.py.
+    """
+    return import_src("build_project_assets")
+
+
+@pytest.fixture
+def synthetic_events(import_src):
+    """
+    Fixture that imports src/synthetic_events.py.
+    """
+    return import_src("synthetic_events")
+
+
+def reference_left_skew(a, loc, size=500):
+    """
+    The original per-value sampler: one of `size` skewnorm
+    draws, min-max scaled to [0, loc] and truncated.
+    """
+    r = skewnorm.rvs(a=a, loc=loc, size=size)
+    r = r - min(r)
+    r = r / max(r)
+    r = r * loc
+    return random.choice(r.astype(int))
+
+
+# The original scalar samplers, one value per call
+REFERENCE = {
+    ("good", "positive"): lambda: norm.rvs(loc=norm.rvs(4), scale=1).astype(int),
+    ("good", "negative"): lambda: expon.rvs(loc=0, scale=np.random.choice([.5, 1])).astype(int),
+    ("normal", "positive"): lambda: norm.rvs(loc=norm.rvs(3), scale=1).astype(int),
+    ("normal", "negative"): lambda: norm.rvs(loc=2, scale=np.random.choice([.5, 1, 2, 3])).astype(int),
+    ("poor", "positive"): lambda: expon.rvs(loc=0, scale=.5).astype(int),
+    ("poor", "negative"): lambda: norm.rvs(loc=.5).astype(int),
+    ("chaotic_good", "positive"): lambda: reference_left_skew(-1000, 5),
+    ("chaotic_good", "negative"): lambda: np.random.choice([0, np.random.choice([50, 200])], p=[.98, .02]),
+    ("chotic_bad", "positive"): lambda: expon.rvs(loc=0, scale=5).astype(int),
+    ("chotic_bad", "negative"): lambda: reference_left_skew(-1000, 10),
+}
+
+
+def frequency_pvalue(reference, sample):
+    """
+    Chi-square test that two integer samples have the same value
+    frequencies. Values seen fewer than 20 times are pooled.
+    """
+    values, counts = np.unique(np.concatenate([reference, sample]), return_counts=True)
+    common = values[counts >= 20]
+    table = np.array([
+        [np.isin(draws, common, invert=True).sum()] + [(draws == value).sum() for value in common]
+        for draws in (reference, sample)
+    ])
+    return chi2_contingency(table[:, table.sum(axis=0) > 0]).pvalue
+
+
+@pytest.mark.parametrize("profile, kind", list(REFERENCE))
+def test_profile_samplers_match_the_original(synthetic_events, profile, kind):
+    """
+    Test that each vectorized sampler draws the same distribution
+    as the original scalar one, seeded so the test is repeatable.
+    """
+    n = 3000
+    np.random.seed(0)
+    random.seed(0)
+    reference = np.array([REFERENCE[profile, kind]() for _ in range(n)])
+
+    rng = np.random.default_rng(0)
+    sample = np.asarray(synthetic_events.profiles[profile][kind](rng, (n,))).ravel()
+
+    assert sample.shape == (n,)
+    assert frequency_pvalue(reference, sample) > 0.001
+
+
+def test_left_skew_matches_the_original(synthetic_events):
+    """
+    Test the order-statistic `left_skew` against the original
+    draw-500-and-pick sampler at both scales the profiles use.
+    """
+    np.random.seed(1)
+    random.seed(1)
+    rng = np.random.default_rng(1)
+    for scale in (5, 10):
+        reference = np.array([reference_left_skew(-1000, scale) for _ in range(5000)])
+        sample = synthetic_events.left_skew(rng, scale, 5000)
+
+        assert sample.min() >= 0 and sample.max() <= scale
+        assert frequency_pvalue(reference, sample) > 0.001
+
+
+def test_a_seed_builds_the_same_database_with_any_worker_count(build_project_assets, tmp_path, monkeypatch):
+    """
+    Test that a seeded build writes the same tables whether its
+    blocks are generated in this process or in two workers.
+    """
+    # Small enough to be quick, in several blocks, with the pool forced on
+    monkeypatch.setattr(build_project_assets, "PARALLEL_MIN_EMPLOYEES", 0)
+    for workers in (1, 2):
+        build_project_assets.build(
+            n_employees=40, days=30, seed=3, workers=workers, chunk_size=10,
+            db=tmp_path / f"{workers}.db", model_file=tmp_path / f"{workers}.pkl",
+            today=date(2024, 10, 21),
+            )
+
+    serial, parallel = sqlite3.connect(tmp_path / "1.db"), sqlite3.connect(tmp_path / "2.db")
+    for table in ("team", "employee", "employee_events", "notes", "employee_labels"):
+        query = f"SELECT * FROM {table} ORDER BY 1, 2"
+        pd.testing.assert_frame_equal(pd.read_sql_query(query, serial), pd.read_sql_query(query, parallel))
+    # Every employee has an event row for each of the 21 weekdays
+    assert pd.read_sql_query("SELECT COUNT(*) AS n FROM employee_events", serial).n[0] == 40 * 21
+    serial.close()
+    parallel.close()
@@ -0,0 +1,77 @@
+import pytest
+
+from employee_events import Employee, QueryBase
+from employee_events.cache import LRUCache, ResultCache
+
+
+class FakeVersions:
+    """
+    Stand-in for the connection manager with a data version set by the test.
+    """
+    version = 1
+
+    def data_version(self):
+        return self.version
+
+
+@pytest.fixture
+def result_cache():
+    """
+    Fixture that installs a result cache on the query classes for one test.
+    """
+    cache = ResultCache(max_entries=8, versions=FakeVersions())
+    QueryBase.result_cache = cache
+    yield cache
+    del QueryBase.result_cache
+
+
+def test_lru_evicts_least_recently_used():
+    """
+    Test that the entry bound evicts the least recently used key.
+    """
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.info().evictions == 1
+
+
+def test_lru_respects_byte_bound():
+    """
+    Test that the byte bound keeps the total size under the limit.
+    """
+    cache = LRUCache(max_entries=None, max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.put("c", b"12345")
+
+    assert cache.info().nbytes <= 10
+    assert "a" not in cache
+
+
+def test_repeat_queries_are_served_from_cache(result_cache):
+    """
+    Test that a repeated query returns the cached DataFrame.
+    """
+    employee = Employee()
+    first = employee.event_counts(1)
+    second = employee.event_counts(1)
+
+    assert first is second
+    assert result_cache.info().hits == 1
+    assert result_cache.info().hit_rate == 0.5
+
+
+def test_data_version_change_invalidates(result_cache):
+    """
+    Test that a new data version empties the cache.
+    """
+    employee = Employee()
+    first = employee.notes(1)
+    result_cache.versions.version = 2
+
+    assert employee.notes(1) is not first
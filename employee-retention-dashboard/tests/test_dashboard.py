@@ -0,0 +1,134 @@
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+# The dashboard is run from the report directory, so its
+# modules are imported as top-level modules
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root / "report"))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """
+    Fixture that returns a test client for the dashboard app,
+    whose default host is allowed.
+    """
+    import dashboard
+    from starlette.testclient import TestClient
+
+    monkeypatch.setattr(dashboard, "allowed_hosts", dashboard.allowed_hosts | {"testserver"})
+    return TestClient(dashboard.app)
+
+
+def canonical(response):
+    return re.search(r'rel="canonical" href="([^"]*)"', response.text).group(1)
+
+
+def test_cached_pages_link_their_own_host_as_canonical(client, monkeypatch):
+    """
+    Test that a request's Host header and query string do not leak
+    into the canonical link served to other hosts from the page cache.
+    """
+    import dashboard
+
+    monkeypatch.setattr(dashboard, "allowed_hosts", dashboard.allowed_hosts | {"other.example"})
+    other = client.get("/team/3?utm_source=mail", headers={"Host": "other.example"})
+    response = client.get("/team/3")
+
+    assert canonical(other) == "https://other.example/team/3"
+    assert canonical(response) == "https://testserver/team/3"
+
+
+def test_pages_for_unknown_hosts_are_not_cached(client, monkeypatch):
+    """
+    Test that a Host header outside the allowed hosts gets the page
+    without a canonical link, and without a page cache entry of its
+    own, unless BASE_URL names the origin.
+    """
+    import dashboard
+
+    client.get("/team/3")
+    entries = len(dashboard.page_cache)
+    for n in range(3):
+        junk = client.get("/team/3", headers={"Host": f"junk{n}.example"})
+        assert junk.status_code == 200
+        assert 'rel="canonical"' not in junk.text
+        assert "etag" not in junk.headers
+    assert len(dashboard.page_cache) == entries
+
+    monkeypatch.setattr(dashboard, "base_url", "https://dashboard.example.com")
+    assert canonical(client.get("/team/3", headers={"Host": "junk.example"})) == "https://dashboard.example.com/team/3"
+
+
+def test_charts_are_drawn_in_workers_from_plain_specs():
+    """
+    Test that the dashboard's charts reach the render pool as a
+    drawing function and plain options, which a worker draws without
+    importing the dashboard, into the same image as the app does.
+    """
+    import pickle
+    import dashboard
+    from base_components import RenderPool
+    from base_components.matplotlib_viz import draw_png
+    from employee_events.employee import Employee
+
+    pool = RenderPool(max_workers=1, timeout=60)
+    try:
+        for chart in (dashboard.LineChart(), dashboard.BarChart()):
+            draw, options = chart.chart_spec(chart.chart_data(4, Employee()))
+
+            assert b"dashboard" not in pickle.dumps((draw, options))
+            future = pool.submit(draw_png, draw, options, chart.figsize, chart.dpi)
+            assert pool.result(future) == chart.render_png(4, Employee())
+    finally:
+        pool.shutdown()
+
+
+def test_page_etags_change_with_the_code(client, monkeypatch):
+    """
+    Test that a browser's copy of a page is not revalidated
+    once a deploy changes the code that renders it.
+    """
+    import dashboard
+    from utils import code_version
+
+    etag = client.get("/team/1").headers["etag"]
+    assert client.get("/team/1", headers={"If-None-Match": etag}).status_code == 304
+
+    assert dashboard.page_cache.salt[0] == code_version()
+    monkeypatch.setattr(dashboard.page_cache, "salt", ("new code", *dashboard.page_cache.salt[1:]))
+    assert client.get("/team/1", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_fragment_stats_report_each_cached_component(client):
+    """
+    Test that /stats/fragments reports the hit, miss and
+    time-saved counters of the components rendered so far.
+    """
+    client.get("/employee/4")
+    stats = client.get("/stats/fragments").json()
+
+    assert stats
+    for counters in stats.values():
+        assert set(counters) == {"hits", "misses", "build_seconds", "saved_seconds", "hit_rate"}
+        assert counters["hits"] + counters["misses"] > 0
+
+
+def test_update_report_swaps_in_place_with_htmx_and_redirects_without(client):
+    """
+    Test that htmx gets the swapped parts of the report, and that a
+    plain form post is redirected to the entity's full page.
+    """
+    form = {"profile_type": "Team", "user-selection": "2"}
+
+    swapped = client.post("/update_report", data=form, headers={"HX-Request": "true"})
+    assert swapped.status_code == 200
+    assert swapped.headers["HX-Push-Url"] == "/team/2"
+    assert 'id="visualizations"' in swapped.text and "<html" not in swapped.text
+
+    plain = client.post("/update_report", data=form, follow_redirects=False)
+    assert plain.status_code == 303
+    assert plain.headers["location"] == "/team/2"
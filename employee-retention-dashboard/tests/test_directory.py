@@ -0,0 +1,128 @@
+import shutil
+import sys
+import pytest
+
+from employee_events import Employee, Team
+from employee_events.directory import EntityDirectory, directory
+from employee_events.ingest import ingest
+from employee_events.sql_execution import ConnectionManager, db_path
+
+
+@pytest.fixture
+def db_copy(tmp_path):
+    """
+    Fixture that returns the path to a writable copy of the database.
+    """
+    path = tmp_path / "employee_events.db"
+    shutil.copy(db_path, path)
+    return path
+
+
+def test_directory_matches_the_database():
+    """
+    Test that the directory's options, names and id checks agree with SQL.
+    """
+    for model in (Employee, Team):
+        options = directory.options(model.name)
+        assert options == directory.versions.execute(model.names_sql.sql()).fetchall()
+        for name, entity_id in options:
+            assert directory.exists(model.name, entity_id)
+            assert directory.name(model.name, str(entity_id)) == name
+
+
+def test_directory_rejects_unknown_ids():
+    """
+    Test that missing, malformed and unknown-type ids are not found.
+    """
+    assert not directory.exists("employee", 10**9)
+    assert not directory.exists("employee", "abc")
+    assert not directory.exists("employee", None)
+    assert not directory.exists("manager", 1)
+    assert directory.options("manager") == []
+
+
+def test_directory_reloads_when_the_data_changes(db_copy):
+    """
+    Test that names are reloaded after an ingest and only then.
+    """
+    manager = ConnectionManager(db_copy)
+    entities = EntityDirectory(manager)
+    try:
+        assert not entities.exists("team", 999)
+        loaded = entities.options("team")
+        assert entities.options("team") is loaded
+
+        ingest(teams=[(999, "Zulu Team", "Night", "Pat Lee")], path=db_copy)
+
+        assert entities.name("team", 999) == "Zulu Team"
+        assert entities.options("team")[-1] == ("Zulu Team", 999)
+    finally:
+        manager.close_all()
+
+
+def test_query_classes_read_names_from_the_directory():
+    """
+    Test that `names` and the name lookups are served by the directory.
+    """
+    assert Employee().names() is directory.options("employee")
+    team_name, team_id = Team().names()[0]
+    assert Team().username(team_id) == [(team_name,)]
+    assert Team().username(10**9) == []
+
+
+def test_directory_search_matches_word_prefixes():
+    """
+    Test that search matches the start of any word, ignoring case,
+    and that every typed word must match.
+    """
+    options = directory.options("employee")
+    name, entity_id = options[0]
+    first, last = name.split()[0], name.split()[-1]
+
+    assert (name, entity_id) in directory.search("employee", first[:2].upper(), limit=len(options))
+    assert (name, entity_id) in directory.search("employee", f"{last[:3]} {first[:1]}", limit=len(options))
+
+    expected = [
+        option for option in options
+        if any(word.lower().startswith(last[:2].lower()) for word in option[0].split())
+    ]
+    assert sorted(directory.search("employee", last[:2], limit=len(options))) == sorted(expected)
+
+
+def test_directory_search_limits_and_defaults():
+    """
+    Test the limit, empty queries and unknown entity types.
+    """
+    assert len(directory.search("employee", "", limit=3)) == 3
+    assert directory.search("employee", "", limit=3) == directory.options("employee")[:3]
+    assert directory.search("employee", "zzzzqq") == []
+    assert directory.search("manager", "a") == []
+
+
+def test_directory_search_scans_the_least_common_word(db_copy, monkeypatch):
+    """
+    Test that a search whose first word is a common prefix scans
+    only the names matching its least common word.
+    """
+    # The package's `directory` attribute is the directory instance
+    directory_module = sys.modules["employee_events.directory"]
+
+    employees = [(10_000 + i, "Alex", f"Smith{i}", 1) for i in range(2000)]
+    employees.append((20_000, "Alex", "Zed", 1))
+    ingest(employees=employees, path=db_copy)
+
+    manager = ConnectionManager(db_copy)
+    entities = EntityDirectory(manager)
+    try:
+        # The first read opens the WAL files, so the names load twice
+        entities.options("employee")
+        starting_with_ze = entities.search("employee", "ze", limit=len(employees))
+        checked = []
+        name_words = directory_module.name_words
+        monkeypatch.setattr(directory_module, "name_words", lambda name: checked.append(name) or name_words(name))
+
+        assert entities.search("employee", "a ze") == [("Alex Zed", 20_000)]
+        # The query's words, then only the names starting with "ze"
+        assert len(checked) <= 1 + len(starting_with_ze)
+    finally:
+        manager.close_all()
@@ -59,3 +59,27 @@ def test_employee_events_table_exists(table_names):
     # Assert that the string 'employee_events' is in the table_names list
     assert 'employee_events' in table_names, "'employee_events' table does not exist in the database"
 
+
+@pytest.fixture
+def index_names(db_conn):
+    """
+    Fixture that returns a list of index names from the database.
+    """
+    name_tuples = db_conn.execute("SELECT name FROM sqlite_master WHERE type='index';").fetchall()
+    return [x[0] for x in name_tuples]
+
+def test_lookup_indexes_exist(index_names):
+    """
+    Test that the per-team and per-note lookup indexes exist.
+    """
+    for index in ['ix_employee_events_team_date', 'ix_notes_employee_date', 'ix_notes_team_date']:
+        assert index in index_names, f"'{index}' index does not exist in the database"
+
+def test_event_lookups_use_an_index(db_conn):
+    """
+    Test that filtering events by team does not scan the whole table.
+    """
+    plan = db_conn.execute(
+        "EXPLAIN QUERY PLAN SELECT event_date FROM employee_events WHERE team_id = 1"
+    ).fetchall()
+    assert not any(step[-1].startswith('SCAN') for step in plan), plan
@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+
+# The dashboard is run from the report directory, so its
+# modules are imported as top-level modules
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root / "report"))
+
+
+def test_export_skips_rerenders_and_prunes(tmp_path, monkeypatch):
+    """
+    Test that a second export skips unchanged pages, re-renders the
+    pages whose inputs changed, and removes the files of entities
+    that no longer exist, also when forced.
+    """
+    import dashboard
+    import export
+    from static_export import ExportedFile, load_manifest, read_manifest, write_manifest
+
+    # Rendered in this process, as SVG to keep the test quick
+    monkeypatch.setenv("RENDER_WORKERS", "0")
+    monkeypatch.setattr(dashboard.MatplotlibViz, "renderer", "svg")
+    # Each export points the app at its base URL
+    monkeypatch.setattr(dashboard, "base_url", dashboard.base_url)
+
+    rendered, skipped, _ = export.export(tmp_path, workers=0)
+    assert rendered > 0 and skipped == 0
+    # The dashboard serves the files while the data and model match
+    assert load_manifest(tmp_path)[1] == dashboard.content_version()
+    assert export.export(tmp_path, workers=0)[:2] == (0, rendered)
+
+    # A change to one team's data re-renders only that page
+    page_inputs = export.page_inputs
+    monkeypatch.setattr(
+        export, "page_inputs",
+        lambda model, entity_id, shared: page_inputs(model, entity_id, shared) + (
+            "changed" if (model.name, entity_id) == ("team", 2) else ""),
+        )
+    assert export.export(tmp_path, workers=0)[:2] == (1, rendered - 1)
+
+    # A new base URL changes every page's canonical link
+    assert export.export(tmp_path, workers=0, base_url="https://example.com")[:2] == (rendered, 0)
+    assert 'href="https://example.com/team/2"' in (tmp_path / "team/2/index.html").read_text()
+
+    # Files of an entity missing from the data are pruned, also when forced
+    stale = tmp_path / "team/99/index.html"
+    stale.parent.mkdir()
+    stale.write_text("gone")
+    files = read_manifest(tmp_path)
+    files["/team/99"] = ExportedFile("team/99/index.html", "text/html; charset=utf-8", "abc", "inputs")
+    write_manifest(tmp_path, files, {})
+
+    export.export(tmp_path, workers=0, base_url="https://example.com", force=True)
+    assert not stale.exists()
+    assert "/team/99" not in read_manifest(tmp_path)
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+# The dashboard is run from the report directory, so its
+# modules are imported as top-level modules
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root / "report"))
+
+
+def test_conditional_response_answers_304_for_matching_etag(make_request):
+    """
+    Test that a matching If-None-Match returns an empty 304.
+    """
+    from http_cache import conditional_response
+
+    response = conditional_response(make_request({"If-None-Match": '"abc"'}), b"img", "image/png", "abc")
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == '"abc"'
+
+
+def test_conditional_response_sends_body_for_stale_etag(make_request):
+    """
+    Test that a different ETag returns the full representation.
+    """
+    from http_cache import conditional_response
+
+    response = conditional_response(
+        make_request({"If-None-Match": '"old"'}), b"img", "image/png", "abc", last_modified=0
+    )
+
+    assert response.status_code == 200
+    assert response.body == b"img"
+    assert "last-modified" in response.headers
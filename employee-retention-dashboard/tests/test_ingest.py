@@ -0,0 +1,110 @@
+import shutil
+import pandas as pd
+import pytest
+
+from employee_events.ingest import ingest
+from employee_events.sql_execution import ConnectionManager, db_path
+
+
+@pytest.fixture
+def db_copy(tmp_path):
+    """
+    Fixture that returns the path to a writable copy of the database.
+    """
+    path = tmp_path / "employee_events.db"
+    shutil.copy(db_path, path)
+    return path
+
+
+@pytest.fixture
+def reader(db_copy):
+    """
+    Fixture that returns a read-only connection manager for the copy.
+    """
+    manager = ConnectionManager(db_copy)
+    yield manager
+    manager.close_all()
+
+
+def test_ingest_appends_new_days(db_copy, reader):
+    """
+    Test that a batch of new events is visible to readers with rolled-up totals.
+    """
+    last_date = reader.execute("SELECT MAX(event_date) FROM employee_events").fetchone()[0]
+    before = reader.execute(
+        "SELECT cumulative_positive_events FROM employee_daily_events WHERE employee_id = 1 AND event_date = ?",
+        (last_date,),
+    ).fetchone()[0]
+    version = reader.data_version()
+
+    events = pd.DataFrame({
+        "event_date": ["2099-01-01", "2099-01-02"],
+        "employee_id": [1, 1],
+        "team_id": reader.execute("SELECT team_id FROM employee WHERE employee_id = 1").fetchone() * 2,
+        "positive_events": [3, 4],
+        "negative_events": [1, 0],
+    })
+    report = ingest(events=events, path=db_copy)
+
+    assert report.events == 2
+    assert report.rows_per_second > 0
+    assert not report.full_rollup
+    assert reader.data_version() != version
+    assert reader.execute(
+        "SELECT cumulative_positive_events FROM employee_daily_events WHERE employee_id = 1 ORDER BY event_date DESC"
+    ).fetchone()[0] == before + 7
+    assert reader.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_ingest_upserts_dimensions(db_copy, reader):
+    """
+    Test that re-sending an employee row updates it in place.
+    """
+    count = reader.execute("SELECT COUNT(*) FROM employee").fetchone()[0]
+
+    ingest(employees=[(1, "Renamed", "Person", 1), (999, "New", "Hire", 2)], path=db_copy)
+
+    assert reader.execute("SELECT COUNT(*) FROM employee").fetchone()[0] == count + 1
+    assert reader.execute("SELECT first_name FROM employee WHERE employee_id = 1").fetchone()[0] == "Renamed"
+
+
+def test_late_events_rebuild_rollups(db_copy, reader):
+    """
+    Test that correcting an already rolled-up day keeps the totals exact.
+    """
+    date, team_id = reader.execute(
+        "SELECT event_date, team_id FROM employee_events WHERE employee_id = 1 ORDER BY event_date LIMIT 1"
+    ).fetchone()
+
+    report = ingest(events=[(date, 1, team_id, 1000, 0)], path=db_copy)
+
+    assert report.full_rollup
+    assert reader.execute(
+        "SELECT SUM(positive_events) FROM employee_events WHERE employee_id = 1"
+    ).fetchone() == reader.execute(
+        "SELECT positive_events FROM employee_totals WHERE employee_id = 1"
+    ).fetchone()
+
+
+def test_reingesting_a_batch_keeps_one_copy(db_copy, reader):
+    """
+    Test that running the same load twice, as after a failure,
+    leaves each note and event in the database once.
+    """
+    team_id = reader.execute("SELECT team_id FROM employee WHERE employee_id = 1").fetchone()[0]
+    notes = pd.DataFrame({
+        "employee_id": [1, 1],
+        "team_id": [team_id, team_id],
+        "note": ["Asked about the new role", "Mentored a new hire"],
+        "note_date": ["2099-01-01", "2099-01-01"],
+    })
+    events = [("2099-01-01", 1, team_id, 3, 1)]
+    count = reader.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    ingest(events=events, notes=notes, path=db_copy)
+    ingest(events=events, notes=notes, path=db_copy)
+
+    assert reader.execute("SELECT COUNT(*) FROM notes").fetchone()[0] == count + 2
+    assert reader.execute(
+        "SELECT COUNT(*) FROM employee_events WHERE event_date = '2099-01-01'"
+    ).fetchone()[0] == 1
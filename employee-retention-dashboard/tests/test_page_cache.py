@@ -0,0 +1,71 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# The dashboard is run from the report directory, so its
+# modules are imported as top-level modules
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root / "report"))
+
+
+def test_page_cache_renders_each_page_once(make_request):
+    """
+    Test that a cached page is served without rendering again,
+    and that a new key renders a page with a different ETag.
+    """
+    from page_cache import PageCache
+
+    cache = PageCache()
+    renders = []
+
+    async def render():
+        renders.append(1)
+        return f"<p>page {len(renders)}</p>"
+
+    first = asyncio.run(cache.respond(make_request({}), ("team", 1, 7), render))
+    again = asyncio.run(cache.respond(make_request({}), ("team", 1, 7), render))
+    changed = asyncio.run(cache.respond(make_request({}), ("team", 1, 8), render))
+
+    assert len(renders) == 2
+    assert first.body == again.body == b"<p>page 1</p>"
+    assert first.headers["etag"] == again.headers["etag"] != changed.headers["etag"]
+    assert cache.stats()[:2] == (1, 2)
+
+
+def test_page_cache_answers_304_without_rendering(make_request):
+    """
+    Test that a current If-None-Match gets an empty 304 even
+    when the page is not cached, e.g. after a restart.
+    """
+    from page_cache import PageCache
+
+    async def render():
+        raise AssertionError("rendered a page the client already has")
+
+    cache = PageCache(salt=("svg",))
+    etag = f'"{cache.page_etag(("employee", 3, 1))}"'
+    response = asyncio.run(cache.respond(make_request({"If-None-Match": etag}), ("employee", 3, 1), render))
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert PageCache(salt=("png",)).page_etag(("employee", 3, 1)) != etag.strip('"')
+    assert cache.stats().not_modified == 1
+
+
+def test_page_cache_evicts_least_recent_pages(make_request):
+    """
+    Test that the cache stays within its memory bound.
+    """
+    from page_cache import PageCache
+
+    cache = PageCache(max_bytes=25)
+
+    async def render():
+        return "x" * 10
+
+    for entity_id in range(3):
+        asyncio.run(cache.respond(make_request({}), ("team", entity_id), render))
+
+    stats = cache.stats()
+    assert (stats.entries, stats.nbytes, stats.evictions) == (2, 20, 1)
+    assert ("team", 0) not in cache
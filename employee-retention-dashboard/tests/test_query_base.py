@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from employee_events import Employee, Team
+
+
+@pytest.fixture(params=[Employee, Team])
+def model(request):
+    """
+    Fixture that returns an instance of each query class.
+    """
+    return request.param()
+
+
+@pytest.fixture
+def ids(model):
+    """
+    Fixture that returns every id for the query class.
+    """
+    return [id for _, id in model.names()]
+
+
+def test_event_counts_many_matches_single_queries(model, ids):
+    """
+    Test that the batched event counts equal the per-id results.
+    """
+    batched = model.event_counts_many(ids)
+    id_col = f"{model.name}_id"
+
+    for id in ids[:3]:
+        expected = model.event_counts(id)
+        actual = batched[batched[id_col] == id].drop(columns=id_col).reset_index(drop=True)
+        pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_batches_span_the_variable_limit(model, ids):
+    """
+    Test that ids split over several batches return the same rows as one batch.
+    """
+    one_batch = model.pandas_query_many(model.notes_many_sql, ids)
+    many_batches = model.pandas_query_many(model.notes_many_sql, ids, batch_size=2)
+
+    pd.testing.assert_frame_equal(one_batch, many_batches)
+
+
+def test_model_data_many_has_rows_for_each_id(model, ids):
+    """
+    Test that batched model data covers every requested id.
+    """
+    data = model.model_data_many(ids)
+
+    assert set(data[f"{model.name}_id"]) == set(ids)
+    assert list(data.columns[1:]) == ["positive_events", "negative_events"]
+
+
+def test_empty_ids_return_empty_frame(model):
+    """
+    Test that an empty id collection returns an empty frame with columns.
+    """
+    data = model.notes_many([])
+
+    assert data.empty
+    assert f"{model.name}_id" in data.columns
@@ -0,0 +1,543 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# The dashboard is run from the report directory, so its
+# component packages are imported as top-level modules
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root / "report"))
+
+import matplotlib
+
+from base_components import BaseComponent, ChartCache, MatplotlibViz, RenderedChart
+
+
+class FakeModel:
+    """
+    Stand-in for an employee_events query class.
+    """
+    name = "employee"
+
+    def data_version(self):
+        return 1
+
+
+class CountingViz(MatplotlibViz):
+    """
+    A chart that counts how often it is drawn.
+    """
+    renders = 0
+
+    def render_png(self, entity_id, model):
+        CountingViz.renders += 1
+        return f"chart {entity_id}".encode()
+
+
+def test_chart_cache_reuses_rendered_images():
+    """
+    Test that a cached chart is rendered once per entity.
+    """
+    viz = CountingViz()
+    viz.chart_cache = ChartCache()
+    CountingViz.renders = 0
+
+    first = viz.render(1, FakeModel())
+    second = viz.render(1, FakeModel())
+    viz.render(2, FakeModel())
+
+    assert first is second
+    assert CountingViz.renders == 2
+
+
+def test_chart_cache_spills_to_disk(tmp_path):
+    """
+    Test that charts written to disk survive a new cache instance.
+    """
+    chart = RenderedChart.from_bytes(b"png bytes")
+    ChartCache(directory=tmp_path).put(("key",), chart)
+
+    reloaded = ChartCache(directory=tmp_path).get(("key",))
+
+    assert reloaded.data == chart.data
+    assert reloaded.etag == chart.etag
+
+
+def test_chart_cache_prunes_the_oldest_files(tmp_path):
+    """
+    Test that the files on disk stay within `max_disk_bytes`,
+    keeping the most recently written charts.
+    """
+    import os
+
+    cache = ChartCache(directory=tmp_path, max_disk_bytes=35)
+    for version in range(5):
+        cache.put(("chart", version), RenderedChart.from_bytes(b"0123456789"))
+        # Distinct modification times, oldest first
+        path = tmp_path / f"{cache.digest(('chart', version))}.png"
+        os.utime(path, (version, version))
+
+    remaining = sorted(path.name for path in tmp_path.iterdir())
+    assert remaining == sorted(f"{cache.digest(('chart', v))}.png" for v in (2, 3, 4))
+    assert ChartCache(directory=tmp_path).get(("chart", 4)).data == b"0123456789"
+
+
+def test_chart_etag_is_a_content_hash():
+    """
+    Test that equal bytes give equal ETags and different bytes do not.
+    """
+    assert RenderedChart.from_bytes(b"a").etag == RenderedChart.from_bytes(b"a").etag
+    assert RenderedChart.from_bytes(b"a").etag != RenderedChart.from_bytes(b"b").etag
+
+
+class SvgViz(CountingViz):
+    """
+    A chart with a native SVG version.
+    """
+    def svg_visualization(self, entity_id, model):
+        from base_components.svg import line_chart_svg
+        return line_chart_svg(["2023-01-01", "2023-01-02"], [("Positive <Events>", [1, 3], "#00d9ff")])
+
+
+def test_svg_renderer_skips_matplotlib():
+    """
+    Test that the svg renderer returns well-formed, escaped SVG
+    and that charts without an SVG version fall back to PNG.
+    """
+    import xml.etree.ElementTree as ET
+
+    viz = SvgViz()
+    viz.renderer = "svg"
+    CountingViz.renders = 0
+
+    chart = viz.render(1, FakeModel())
+
+    assert chart.media_type == "image/svg+xml"
+    assert CountingViz.renders == 0
+    labels = [text.text for text in ET.fromstring(chart.data).iter("{http://www.w3.org/2000/svg}text")]
+    assert "Positive <Events>" in labels
+
+    fallback = CountingViz()
+    fallback.renderer = "svg"
+    assert fallback.render(1, FakeModel()).media_type == "image/png"
+
+
+def test_renderer_is_part_of_the_cache_key():
+    """
+    Test that switching renderers does not serve the other renderer's image.
+    """
+    png, svg = SvgViz(), SvgViz()
+    svg.renderer = "svg"
+
+    assert png.cache_key(1, FakeModel()) != svg.cache_key(1, FakeModel())
+
+
+def test_render_pool_runs_calls_in_worker_processes():
+    """
+    Test that the pool returns results computed in another process.
+    """
+    import os
+    from base_components import RenderPool
+
+    pool = RenderPool(max_workers=1, timeout=60)
+    try:
+        assert pool.result(pool.submit(pow, 2, 10)) == 1024
+        assert pool.result(pool.submit(os.getpid)) != os.getpid()
+    finally:
+        pool.shutdown()
+
+
+def test_render_pool_logs_calls_that_raise_in_a_worker(caplog):
+    """
+    Test that a call raising in a worker returns None, so the caller
+    draws the chart inline, and that the pool keeps working.
+    """
+    from base_components import RenderPool
+
+    pool = RenderPool(max_workers=1, timeout=60)
+    try:
+        assert pool.result(pool.submit(int, "not a number")) is None
+        assert "Render worker call failed" in caplog.text
+        assert pool.result(pool.submit(pow, 2, 10)) == 1024
+    finally:
+        pool.shutdown()
+
+
+class FullPool:
+    """
+    Stand-in for a RenderPool whose queue is always full.
+    """
+    timeout = 1
+
+    def submit(self, fn, *args):
+        return None
+
+
+class DrawingViz(MatplotlibViz):
+    """
+    A chart that can be drawn from its data in the render pool,
+    counting how often its data is fetched.
+    """
+    fetches = 0
+
+    def chart_data(self, entity_id, model):
+        DrawingViz.fetches += 1
+        return entity_id
+
+    def chart_spec(self, data):
+        from base_components.charts import message_chart
+        return message_chart, {"message": f"chart {data}"}
+
+
+def test_full_render_pool_falls_back_to_rendering_inline():
+    """
+    Test that a chart the pool cannot take is drawn in the caller
+    from the data already fetched for the pool.
+    """
+    viz = DrawingViz()
+    viz.render_pool = FullPool()
+    DrawingViz.fetches = 0
+
+    chart = viz.render(3, FakeModel())
+
+    assert chart.data == viz.draw_png(3)
+    assert DrawingViz.fetches == 1
+
+
+def test_combined_component_starts_every_chart_before_waiting():
+    """
+    Test that sibling children with `submit` are all started
+    before the first one is waited on.
+    """
+    from combined_components import CombinedComponent
+
+    events = []
+
+    class Pending:
+        def __init__(self, name):
+            self.name = name
+
+        def submit(self, userid, model):
+            events.append(f"start {self.name}")
+            return lambda: events.append(f"wait {self.name}") or self.name
+
+    class Charts(CombinedComponent):
+        children = [Pending("line"), Pending("bar")]
+
+    Charts().call_children(1, FakeModel())
+
+    assert events == ["start line", "start bar", "wait line", "wait bar"]
+
+
+def test_figure_pool_reuses_reset_figures():
+    """
+    Test that a returned figure is handed out again with
+    its artists cleared and its layout restored.
+    """
+    from base_components import FigurePool
+
+    pool = FigurePool()
+    with pool.figure((8, 4)) as (fig, ax):
+        ax.plot([1, 2], [3, 4])
+        ax.set_title("first")
+        fig.tight_layout()
+        first = fig
+
+    with pool.figure((8, 4)) as (fig, ax):
+        assert fig is first
+        assert ax.get_lines() == []
+        assert ax.get_title() == ""
+        assert fig.subplotpars.left == matplotlib.rcParams["figure.subplot.left"]
+
+    with pool.figure((8, 2.5)) as (fig, ax):
+        assert fig is not first
+
+    assert (pool.created, pool.reused) == (2, 1)
+
+
+def test_pooled_charts_render_identically_from_threads():
+    """
+    Test that charts drawn concurrently match charts drawn serially.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    class Bars(MatplotlibViz):
+        def chart_data(self, entity_id, model):
+            return entity_id
+
+        def draw(self, data, ax):
+            ax.barh(["value"], [data])
+            ax.set_title(f"chart {data}")
+
+    def render(entity_id):
+        return Bars().render_png(entity_id, FakeModel())
+
+    serial = [render(i) for i in range(8)]
+    with ThreadPoolExecutor(4) as executor:
+        threaded = list(executor.map(render, range(8)))
+
+    assert threaded == serial
+
+
+class Sleepy(BaseComponent):
+    """
+    A component that waits like a slow query.
+    """
+    def __init__(self, name, seconds):
+        self.name = name
+        self.seconds = seconds
+
+    def build_component(self, entity_id, model):
+        time.sleep(self.seconds)
+        return self.name
+
+
+def test_acall_builds_children_concurrently_and_in_order():
+    """
+    Test that a page takes about as long as its slowest child
+    and that the children keep their order.
+    """
+    from combined_components import CombinedComponent
+
+    class Page(CombinedComponent):
+        children = [Sleepy("header", 0.2), Sleepy("charts", 0.3), Sleepy("notes", 0.2)]
+
+        def outer_div(self, children, div_args):
+            return children
+
+    start = time.perf_counter()
+    children = asyncio.run(Page().acall(1, FakeModel()))
+
+    assert children == ["header", "charts", "notes"]
+    assert time.perf_counter() - start < 0.6
+
+
+def test_form_group_acall_appends_its_button():
+    """
+    Test that the async path keeps FormGroup's submit button.
+    """
+    from fasthtml.common import to_xml
+    from combined_components import FormGroup
+
+    class Filters(FormGroup):
+        children = [Sleepy("filter", 0)]
+
+    assert to_xml(asyncio.run(Filters().acall(1, FakeModel()))) == to_xml(Filters()(1, FakeModel()))
+
+
+class NamedModel:
+    """
+    Stand-in for Employee or Team with a few named entities.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def names(self):
+        return [(f"{self.name} {i}", i) for i in range(5)]
+
+
+def searchable_dropdown(max_options):
+    """
+    Returns a Dropdown with a search endpoint over NamedModel's entities.
+    """
+    from base_components import Dropdown
+
+    class Selector(Dropdown):
+        def component_data(self, entity_id, model):
+            return model.names()
+
+    return Selector(id="selector", name="user-selection", max_options=max_options, search_url="/search")
+
+
+def test_dropdown_renders_every_option_below_the_threshold():
+    """
+    Test that small dropdowns are a plain select with one selected option.
+    """
+    from fasthtml.common import to_xml
+
+    html = to_xml(searchable_dropdown(max_options=5)(3, NamedModel("team")))
+
+    assert html.count("<option") == 5
+    assert html.count(" selected") == 1
+    assert 'hx-get="/search"' not in html
+
+
+def test_dropdown_switches_to_typeahead_above_the_threshold():
+    """
+    Test that large dropdowns only render the selected option and a search box.
+    """
+    from fasthtml.common import to_xml
+
+    html = to_xml(searchable_dropdown(max_options=4)(3, NamedModel("team")))
+
+    assert html.count("<option") == 1
+    assert '<option value="3" selected>team 3</option>' in html
+    assert 'hx-get="/search"' in html
+    assert 'hx-target="#selector-options"' in html
+
+
+def test_dropdown_search_results():
+    """
+    Test that matches are options with the first selected, and that
+    a query without matches returns a disabled placeholder.
+    """
+    from fasthtml.common import to_xml
+
+    dropdown = searchable_dropdown(max_options=4)
+    model = NamedModel("team")
+
+    results = [to_xml(option) for option in dropdown.search_results("TEAM", model)]
+    assert len(results) == 5
+    assert " selected" in results[0]
+    assert not any(" selected" in option for option in results[1:])
+
+    empty = dropdown.search_results("nobody", model)
+    assert len(empty) == 1 and "disabled" in to_xml(empty[0])
+
+
+def test_parallel_renders_do_not_bleed_into_each_other():
+    """
+    Test that pages rendered concurrently from shared component
+    instances match the same pages rendered one at a time.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from fasthtml.common import Div, H1, to_xml
+    from base_components import Dropdown
+    from combined_components import CombinedComponent
+
+    class Title(BaseComponent):
+        def build_component(self, entity_id, model):
+            time.sleep(0.001)
+            return H1(f"{model.name} {entity_id}")
+
+    class Selector(Dropdown):
+        def component_label(self, entity_id, model):
+            return model.name
+
+        def component_data(self, entity_id, model):
+            return model.names()
+
+    class Body(CombinedComponent):
+        children = [Title(), Selector()]
+        outer_div_type = Div(cls="grid")
+
+    class Page(CombinedComponent):
+        children = [Title(), Body()]
+
+    page = Page()
+    requests = [(i % 5, NamedModel(name)) for i in range(40) for name in ("employee", "team")]
+
+    serial = [to_xml(page(entity_id, model)) for entity_id, model in requests]
+    with ThreadPoolExecutor(16) as executor:
+        threaded = list(executor.map(lambda args: to_xml(page(*args)), requests))
+
+    async def gather():
+        return await asyncio.gather(*(page.acall(*args) for args in requests))
+    gathered = [to_xml(result) for result in asyncio.run(gather())]
+
+    assert threaded == serial
+    assert gathered == serial
+    # The shared templates are never filled in
+    assert Page.outer_div_type.children == ()
+    assert Body.outer_div_type.children == ()
+
+
+class VersionedModel(NamedModel):
+    """
+    A NamedModel whose data version can be bumped.
+    """
+    version = 1
+
+    def data_version(self):
+        return self.version
+
+
+def test_fragment_cache_serves_opted_in_components():
+    """
+    Test that a component with a `fragment_key` is built once per key,
+    is rebuilt when the data changes, and reports its hits and misses.
+    """
+    from fasthtml.common import H1, to_xml
+    from base_components import FragmentCache
+
+    class Title(BaseComponent):
+        fragment_key = ("model", "entity_id", "data_version")
+        builds = 0
+
+        def build_component(self, entity_id, model):
+            Title.builds += 1
+            return H1(f"{model.name} {entity_id}")
+
+    title = Title()
+    title.fragment_cache = FragmentCache()
+    model = VersionedModel("team")
+
+    first = title(1, model)
+    assert str(title(1, model)) == str(first)
+    title(2, model)
+    assert Title.builds == 2
+
+    model.version = 2
+    title(1, model)
+    assert Title.builds == 3
+
+    stats = title.fragment_cache.stats()["test_fragment_cache_serves_opted_in_components.<locals>.Title"]
+    assert (stats.hits, stats.misses) == (1, 3)
+    assert str(first) == to_xml(H1("team 1"))
+
+
+def test_fragment_cache_skips_components_without_a_key():
+    """
+    Test that components that do not opt in are always built.
+    """
+    from base_components import FragmentCache
+
+    class Plain(Sleepy):
+        fragment_cache = FragmentCache()
+
+    plain = Plain("plain", 0)
+
+    assert plain(1, FakeModel()) == "plain"
+    assert plain.fragment_cache.stats() == {}
+
+
+def test_combined_component_acall_uses_the_fragment_cache():
+    """
+    Test that a cached container does not build its children again.
+    """
+    from base_components import FragmentCache
+    from combined_components import CombinedComponent
+
+    class Counted(Sleepy):
+        builds = 0
+
+        def build_component(self, entity_id, model):
+            Counted.builds += 1
+            return super().build_component(entity_id, model)
+
+    class Filters(CombinedComponent):
+        fragment_cache = FragmentCache()
+        fragment_key = ("model", "entity_id")
+        children = [Counted("filter", 0)]
+
+    filters = Filters()
+    first = asyncio.run(filters.acall(1, FakeModel()))
+    second = asyncio.run(filters.acall(1, FakeModel()))
+
+    assert Counted.builds == 1
+    assert str(second) == str(first)
+
+
+def test_unknown_fragment_key_dimension_is_rejected():
+    """
+    Test that a misspelled key dimension fails loudly.
+    """
+    import pytest
+    from base_components import FragmentCache
+
+    class Typo(Sleepy):
+        fragment_cache = FragmentCache()
+        fragment_key = ("entity",)
+
+    with pytest.raises(ValueError):
+        Typo("typo", 0)(1, FakeModel())
@@ -0,0 +1,91 @@
+import shutil
+import sqlite3
+import pandas as pd
+import pytest
+
+from employee_events.rollups import refresh_rollups
+from employee_events.sql_execution import db_path
+
+
+@pytest.fixture
+def db_conn(tmp_path):
+    """
+    Fixture that returns a writable connection to a copy of the database.
+    """
+    path = tmp_path / "employee_events.db"
+    shutil.copy(db_path, path)
+    connection = sqlite3.connect(path)
+    yield connection
+    connection.close()
+
+
+def rollup(connection, table):
+    return pd.read_sql_query(f"SELECT * FROM {table} ORDER BY 1, 2", connection)
+
+
+def test_cumulative_totals_match_raw_events(db_conn):
+    """
+    Test that the last cumulative total equals the sum of raw events.
+    """
+    refresh_rollups(db_conn, full=True)
+    cumulative, total = db_conn.execute("""
+        SELECT cumulative_positive_events,
+            (SELECT SUM(positive_events) FROM employee_events WHERE employee_id = 1)
+        FROM employee_daily_events
+        WHERE employee_id = 1
+        ORDER BY event_date DESC
+        LIMIT 1
+        """).fetchone()
+
+    assert cumulative == total
+
+
+def test_incremental_refresh_matches_full_rebuild(db_conn):
+    """
+    Test that refreshing after new days equals rebuilding from scratch.
+    """
+    refresh_rollups(db_conn, full=True)
+    expected = {table: rollup(db_conn, table) for table in ["team_daily_events", "employee_totals"]}
+
+    # Hold back the last ten days, roll up the rest, then add them back
+    cutoff = db_conn.execute(
+        "SELECT DISTINCT event_date FROM employee_events ORDER BY event_date DESC LIMIT 1 OFFSET 9"
+    ).fetchone()[0]
+    db_conn.execute("CREATE TEMP TABLE held AS SELECT * FROM employee_events WHERE event_date >= ?", (cutoff,))
+    db_conn.execute("DELETE FROM employee_events WHERE event_date >= ?", (cutoff,))
+    refresh_rollups(db_conn, full=True)
+
+    db_conn.execute("INSERT INTO employee_events SELECT * FROM held")
+    added = refresh_rollups(db_conn)
+
+    assert added > 0
+    for table, frame in expected.items():
+        pd.testing.assert_frame_equal(rollup(db_conn, table), frame)
+
+
+def test_migrate_keeps_training_labels(tmp_path):
+    """
+    Test that migrating adds the labels table to an older
+    database and keeps its rows on later migrations.
+    """
+    from employee_events.schema import migrate
+
+    path = tmp_path / "employee_events.db"
+    shutil.copy(db_path, path)
+    # A database built before the labels table existed
+    with sqlite3.connect(path) as connection:
+        connection.execute("DROP TABLE employee_labels")
+    connection.close()
+
+    migrate(path)
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM employee_labels").fetchone() == (0,)
+        connection.execute("INSERT INTO employee_labels VALUES (1, 1), (2, 0)")
+    connection.close()
+
+    migrate(path)
+    connection = sqlite3.connect(path)
+    labels = connection.execute("SELECT * FROM employee_labels ORDER BY 1").fetchall()
+    connection.close()
+
+    assert labels == [(1, 1), (2, 0)]
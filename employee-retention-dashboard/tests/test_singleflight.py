@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from employee_events import Employee
+from employee_events.singleflight import SingleFlight, query_flights
+
+
+def test_concurrent_calls_share_one_execution():
+    """
+    Test that calls made while the first one runs wait for its result.
+    """
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def compute():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return ["result"]
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        leader = executor.submit(flights.do, "key", compute)
+        started.wait(5)
+        followers = [executor.submit(flights.do, "key", compute) for _ in range(4)]
+        # Let every follower join the flight before it lands
+        while flights.stats().coalesced < 4:
+            time.sleep(0.001)
+        release.set()
+        results = [leader.result()] + [future.result() for future in followers]
+
+    assert len(runs) == 1
+    assert all(result is results[0] for result in results)
+    assert flights.stats() == (5, 1, 4, 0, 4)
+
+
+def test_errors_reach_every_caller_and_are_not_kept():
+    """
+    Test that an exception is raised in the waiting calls
+    and that the next call runs the function again.
+    """
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("no data")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flights.do, "key", fail)
+        started.wait(5)
+        follower = executor.submit(flights.do, "key", fail)
+        while flights.stats().coalesced < 1:
+            time.sleep(0.001)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+    assert flights.do("key", lambda: 1) == 1
+    assert flights.stats().executions == 2
+
+
+def test_async_calls_are_coalesced():
+    """
+    Test that concurrent `ado` calls await one coroutine.
+    """
+    flights = SingleFlight()
+    runs = []
+
+    async def compute(value):
+        runs.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def main():
+        return await asyncio.gather(*(flights.ado("key", compute, 21) for _ in range(10)))
+
+    assert asyncio.run(main()) == [42] * 10
+    assert runs == [21]
+    assert flights.stats().peak_waiters == 9
+
+
+def test_cancelled_waiter_leaves_the_others_waiting():
+    """
+    Test that cancelling one waiting call, e.g. when its client
+    disconnects, does not fail the leader or the other waiters.
+    """
+    flights = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "page"
+
+    async def main():
+        leader = asyncio.create_task(flights.ado("key", compute))
+        waiters = [asyncio.create_task(flights.ado("key", compute)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        waiters[0].cancel()
+        return await asyncio.gather(leader, *waiters, return_exceptions=True)
+
+    leader, cancelled, waiter = asyncio.run(main())
+    assert isinstance(cancelled, asyncio.CancelledError)
+    assert (leader, waiter) == ("page", "page")
+
+
+def test_cancelled_leader_hands_the_lead_to_a_waiter():
+    """
+    Test that the waiting calls run the function themselves
+    when the leading call is cancelled, rather than failing.
+    """
+    flights = SingleFlight()
+    runs = []
+
+    async def compute():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "page"
+
+    async def main():
+        leader = asyncio.create_task(flights.ado("key", compute))
+        waiters = [asyncio.create_task(flights.ado("key", compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(main()) == ["page"] * 3
+    assert len(runs) == 2
+    assert flights.stats().in_flight == 0
+
+
+def test_cached_queries_are_coalesced(monkeypatch):
+    """
+    Test that query methods decorated with `cached` go through the
+    shared flights, with or without a result cache. Cache hits are
+    answered before joining a flight.
+    """
+    from employee_events.cache import ResultCache
+    from employee_events.sql_execution import QueryMixin
+
+    # Importing the dashboard turns the shared result cache on
+    monkeypatch.setattr(QueryMixin, "result_cache", None)
+    before = query_flights.stats()
+    Employee().notes(1)
+    Employee().notes(1)
+    assert query_flights.stats().calls - before.calls == 2
+
+    monkeypatch.setattr(QueryMixin, "result_cache", ResultCache())
+    before = query_flights.stats()
+    Employee().notes(1)
+    Employee().notes(1)
+    assert query_flights.stats().calls - before.calls == 1
@@ -0,0 +1,164 @@
+import gc
+import sqlite3
+import threading
+import pytest
+
+from employee_events.sql_execution import ConnectionManager, db_path
+
+
+@pytest.fixture
+def manager():
+    """
+    Fixture that returns a fresh connection manager for the project database.
+    """
+    manager = ConnectionManager(db_path)
+    yield manager
+    manager.close_all()
+
+
+def test_connection_is_reused_within_a_thread(manager):
+    """
+    Test that repeated lookups on one thread return the same connection.
+    """
+    assert manager.connection() is manager.connection()
+
+
+def test_connections_are_per_thread(manager):
+    """
+    Test that each thread receives its own connection.
+    """
+    other = []
+    thread = threading.Thread(target=lambda: other.append(manager.connection()))
+    thread.start()
+    thread.join()
+
+    assert other[0] is not manager.connection()
+
+
+def test_connection_is_read_only(manager):
+    """
+    Test that the pooled connections refuse writes.
+    """
+    with pytest.raises(sqlite3.OperationalError):
+        manager.connection().execute("CREATE TABLE should_fail (x INTEGER)")
+
+
+def test_close_all_reconnects(manager):
+    """
+    Test that closed connections are replaced on the next query.
+    """
+    first = manager.connection()
+    manager.close_all()
+    second = manager.connection()
+
+    assert first is not second
+    assert second.execute("SELECT COUNT(*) FROM employee").fetchone()[0] > 0
+
+
+def test_connections_are_closed_when_their_thread_exits(manager):
+    """
+    Test that the connection of a thread that has exited is
+    closed, so short-lived worker threads do not leak them.
+    """
+    opened = []
+
+    def run():
+        opened.append(manager.connection())
+
+    for _ in range(3):
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+    gc.collect()
+
+    for con in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            con.execute("SELECT 1")
+
+
+def test_close_all_leaves_other_threads_queries_running(manager):
+    """
+    Test that `close_all` does not close a connection another
+    thread is using, which reconnects on its next query instead.
+    """
+    opened, closed = threading.Event(), threading.Event()
+    results = []
+
+    def run():
+        con = manager.connection()
+        cursor = con.execute("SELECT employee_id FROM employee")
+        opened.set()
+        closed.wait()
+        # The query started before `close_all` runs to the end
+        results.append(len(cursor.fetchall()))
+        results.append(manager.connection() is not con)
+        try:
+            con.execute("SELECT 1")
+        except sqlite3.ProgrammingError:
+            results.append("closed")
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    opened.wait()
+    manager.close_all()
+    closed.set()
+    thread.join()
+
+    assert results[0] > 0 and results[1:] == [True, "closed"]
+
+
+def test_parameterised_queries_reuse_statements():
+    """
+    Test that querying different ids reuses a single prepared statement.
+    """
+    from employee_events import Employee, connections
+
+    employee = Employee()
+    employee.event_counts(1)
+    before = connections.statement_cache_info()
+
+    employee.event_counts(2)
+    employee.event_counts(3)
+    after = connections.statement_cache_info()
+
+    assert after.hits - before.hits == 2
+    assert after.misses == before.misses
+
+
+def test_statement_counts_are_summed_over_threads(manager):
+    """
+    Test that statements tracked on several threads are all
+    counted, and that closing the connections keeps the counts.
+    """
+    sql = "SELECT COUNT(*) FROM employee WHERE employee_id = ?"
+
+    def run():
+        for employee_id in range(3):
+            manager.execute(sql, (employee_id,)).fetchall()
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # This thread's connection has its own, still empty, cache
+    manager.track(sql)
+
+    info = manager.statement_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (8, 5, 1)
+
+    manager.close_all()
+    assert manager.statement_cache_info()[:2] == (8, 5)
+    manager.statement_cache_clear()
+    assert manager.statement_cache_info()[:2] == (0, 0)
+
+
+def test_user_name_binds_id():
+    """
+    Test that `Employee.user_name` returns the name for the requested id.
+    """
+    from employee_events import Employee
+
+    names = dict((id, name) for name, id in Employee().names())
+
+    assert Employee().user_name(3) == [(names[3],)]
@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+# The dashboard is run from the report directory, so its
+# modules are imported as top-level modules
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root / "report"))
+
+
+def test_export_paths():
+    """
+    Test that pages become index files and charts get their media type's extension.
+    """
+    from static_export import export_path
+
+    assert export_path("/", "text/html; charset=utf-8") == "index.html"
+    assert export_path("/team/2", "text/html; charset=utf-8") == "team/2/index.html"
+    assert export_path("/charts/barchart/team/2", "image/png") == "charts/barchart/team/2.png"
+    assert export_path("/charts/barchart/team/2", "image/svg+xml") == "charts/barchart/team/2.svg"
+
+
+def test_static_export_serves_manifest_files(make_request, tmp_path):
+    """
+    Test that exported files are served with their content hash as
+    ETag, and that paths missing from the manifest are left to the app.
+    """
+    from static_export import ExportedFile, StaticExport, read_manifest, write_manifest
+
+    (tmp_path / "team" / "2").mkdir(parents=True)
+    (tmp_path / "team" / "2" / "index.html").write_text("<p>team 2</p>")
+    files = {"/": ExportedFile("team/2/index.html", "text/html; charset=utf-8", "abc", "inputs")}
+    write_manifest(tmp_path, files, {"renderer": "svg"})
+
+    assert read_manifest(tmp_path) == files
+    export = StaticExport(tmp_path)
+
+    response = export.respond(make_request({}))
+    assert response.body == b"<p>team 2</p>"
+    assert response.headers["etag"] == '"abc"'
+    assert export.respond(make_request({"If-None-Match": '"abc"'})).status_code == 304
+    assert export.respond(make_request({}), "/team/3") is None
+
+
+def test_static_export_follows_the_data_and_new_exports(make_request, tmp_path):
+    """
+    Test that exported files are left to the app once the data or
+    model changed, and that a new manifest is picked up without a restart.
+    """
+    from static_export import ExportedFile, StaticExport, write_manifest
+
+    (tmp_path / "index.html").write_text("<p>old</p>")
+    (tmp_path / "new.html").write_text("<p>new</p>")
+    files = {"/": ExportedFile("index.html", "text/html; charset=utf-8", "abc", "inputs")}
+    current = [[1, 2], [3, 4]]
+    write_manifest(tmp_path, files, {}, version=[[1, 2], [3, 4]])
+    export = StaticExport(tmp_path, version=lambda: current)
+
+    assert export.respond(make_request({})).body == b"<p>old</p>"
+
+    # An ingest changed the data: the page renders live, with no 304 for the old copy
+    current = [[1, 5], [3, 4]]
+    assert export.respond(make_request({})) is None
+    assert export.respond(make_request({"If-None-Match": '"abc"'})) is None
+
+    # A new export of the new data is served again
+    files = {"/": ExportedFile("new.html", "text/html; charset=utf-8", "def", "inputs")}
+    write_manifest(tmp_path, files, {}, version=current)
+    assert export.respond(make_request({})).body == b"<p>new</p>"
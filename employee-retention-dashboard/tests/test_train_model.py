@@ -0,0 +1,172 @@
+import pickle
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from employee_events.schema import build_database
+
+
+@pytest.fixture
+def train_model(import_src):
+    """
+    Fixture that imports src/train_model.py.
+    """
+    return import_src("train_model")
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    Fixture that returns the path to a small database with labels,
+    whose recruited employees have more negative than positive events.
+    """
+    rng = np.random.default_rng(0)
+    n_employees, n_days = 300, 20
+    team_id = rng.integers(1, 4, n_employees)
+    positive = rng.poisson(rng.uniform(1, 5, (n_employees, 1)), (n_employees, n_days))
+    negative = rng.poisson(rng.uniform(1, 5, (n_employees, 1)), (n_employees, n_days))
+    score = negative.sum(axis=1) - positive.sum(axis=1) + rng.normal(0, 40, n_employees)
+
+    ids = np.arange(1, n_employees + 1)
+    events = pd.DataFrame({
+        "event_date": np.tile(pd.date_range("2024-01-01", periods=n_days).strftime("%Y-%m-%d"), n_employees),
+        "employee_id": np.repeat(ids, n_days),
+        "team_id": np.repeat(team_id, n_days),
+        "positive_events": positive.ravel(),
+        "negative_events": negative.ravel(),
+    })
+    path = tmp_path / "employee_events.db"
+    connection = sqlite3.connect(path)
+    build_database(
+        connection,
+        employee=pd.DataFrame({"employee_id": ids, "first_name": "A", "last_name": "B", "team_id": team_id}),
+        team=pd.DataFrame({"team_id": [1, 2, 3], "team_name": "Team", "shift": "Day", "manager_name": "M"}),
+        notes=pd.DataFrame(columns=["employee_id", "team_id", "note", "note_date"]),
+        events=events,
+        labels=pd.DataFrame({"employee_id": ids, "recruited": (score > np.median(score)).astype(int)}),
+    )
+    connection.close()
+    return path
+
+
+def test_training_writes_the_compiled_scorer(train_model, db, tmp_path):
+    """
+    Test that training writes the scorer next to the model,
+    tagged with the model file's hash and scoring like it.
+    """
+    report_utils = train_model.load_report_utils()
+    model_file = tmp_path / "model.pkl"
+    train_model.train(db, model_file)
+
+    scorer, source = report_utils.LinearScorer.load(model_file.with_suffix(".npz"))
+    model = pickle.loads(model_file.read_bytes())
+    X = pd.DataFrame({"positive_events": [10, 60, 90], "negative_events": [80, 60, 10]})
+
+    assert source == report_utils.model_hash(model_file)
+    np.testing.assert_allclose(scorer.predict_proba(X), model.predict_proba(X))
+
+
+def read_features(train_model, db):
+    connection = sqlite3.connect(db)
+    features = pd.concat(train_model.feature_chunks(connection, chunk_size=64), ignore_index=True)
+    connection.close()
+    return features
+
+
+def test_feature_chunks_match_a_pandas_groupby(train_model, db):
+    """
+    Test that the streamed totals equal a groupby over the raw
+    events, summed from the rollups and from the events table.
+    """
+    from employee_events.rollups import drop_rollups
+
+    connection = sqlite3.connect(db)
+    events = pd.read_sql_query("SELECT * FROM employee_events", connection)
+    expected = events.groupby("employee_id")[["positive_events", "negative_events"]].sum().reset_index()
+
+    assert train_model.feature_source(connection) == "employee_totals"
+    chunks = list(train_model.feature_chunks(connection, chunk_size=64))
+    assert [len(chunk) for chunk in chunks] == [64] * 4 + [44]
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, ignore_index=True)[expected.columns], expected, check_dtype=False,
+        )
+
+    with connection:
+        drop_rollups(connection)
+    assert train_model.feature_source(connection) == "employee_events"
+    pd.testing.assert_frame_equal(
+        read_features(train_model, db)[expected.columns], expected, check_dtype=False,
+        )
+    connection.close()
+
+
+def test_batch_and_incremental_fits_agree(train_model, db, tmp_path):
+    """
+    Test that fitting chunk by chunk with `partial_fit` gives
+    probabilities close to fitting every employee at once.
+    """
+    features = read_features(train_model, db)[train_model.FEATURES]
+    probabilities = {}
+    for method in ("batch", "incremental"):
+        model_file = tmp_path / f"{method}.pkl"
+        train_model.train(db, model_file, chunk_size=64, method=method, epochs=20, seed=0)
+        probabilities[method] = pickle.loads(model_file.read_bytes()).predict_proba(features)[:, 1]
+
+    difference = np.abs(probabilities["batch"] - probabilities["incremental"])
+    assert difference.mean() < 0.02
+    assert difference.max() < 0.05
+
+
+def test_training_writes_the_documented_metadata(train_model, db, tmp_path):
+    """
+    Test that model.json records the features, training rows,
+    a hash of the training data and the fit time.
+    """
+    import json
+    import shutil
+
+    model_file = tmp_path / "model.pkl"
+    returned = train_model.train(db, model_file)
+    metadata = json.loads(model_file.with_suffix(".json").read_text())
+
+    assert metadata == returned
+    assert metadata["features"] == ["positive_events", "negative_events"]
+    assert metadata["training_rows"] == 300
+    assert metadata["estimator"] == "LogisticRegression"
+    assert metadata["method"] == "batch"
+    assert metadata["source"] == "employee_totals"
+    assert metadata["watermark"] == "2024-01-20"
+    assert metadata["fit_seconds"] >= 0
+    assert {"trained_at", "sklearn_version"} <= set(metadata)
+
+    # A copy of the database is the same training data
+    copy = tmp_path / "copy.db"
+    shutil.copy(db, copy)
+    assert train_model.train(copy, model_file)["data_hash"] == metadata["data_hash"]
+
+    connection = sqlite3.connect(copy)
+    with connection:
+        connection.execute("UPDATE employee_labels SET recruited = 1 - recruited WHERE employee_id = 1")
+    connection.close()
+    assert train_model.train(copy, model_file)["data_hash"] != metadata["data_hash"]
+
+
+def test_training_without_labels_fails(train_model, db, tmp_path):
+    """
+    Test that a database without training labels is reported
+    rather than fitted, whether the table is empty or missing.
+    """
+    connection = sqlite3.connect(db)
+    with connection:
+        connection.execute("DELETE FROM employee_labels")
+    with pytest.raises(ValueError, match="no training labels"):
+        train_model.train(db, tmp_path / "model.pkl")
+
+    with connection:
+        connection.execute("DROP TABLE employee_labels")
+    connection.close()
+    with pytest.raises(ValueError, match="no training labels"):
+        train_model.train(db, tmp_path / "model.pkl")
+    assert not (tmp_path / "model.pkl").exists()
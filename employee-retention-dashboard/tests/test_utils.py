@@ -0,0 +1,75 @@
+import sys
+from pathlib import Path
+
+# The dashboard is run from the report directory, so its
+# modules are imported as top-level modules
+project_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(project_root / "report"))
+
+
+def test_linear_scorer_matches_sklearn(tmp_path):
+    """
+    Test that the compiled scorer gives the same probabilities as
+    scikit-learn, for the shipped model and for a scaled pipeline,
+    and survives a round trip through its .npz file.
+    """
+    import numpy as np
+    import pandas as pd
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from employee_events import Team
+    from utils import LinearScorer, load_model
+
+    model = load_model()
+    data = Team().model_data(1)
+    scorer = LinearScorer.from_model(model)
+    np.testing.assert_allclose(scorer.predict_proba(data), model.predict_proba(data))
+
+    # Reordered columns are matched by name
+    np.testing.assert_allclose(scorer.predict_proba(data[data.columns[::-1]]), model.predict_proba(data))
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(500, 100, (200, 2)), columns=["positive_events", "negative_events"])
+    y = (X.positive_events - X.negative_events + rng.normal(0, 50, 200) < 0).astype(int)
+    pipeline = make_pipeline(StandardScaler(), SGDClassifier(loss="log_loss", random_state=0)).fit(X, y)
+
+    LinearScorer.from_model(pipeline).save(tmp_path / "model.npz", source="hash")
+    reloaded, source = LinearScorer.load(tmp_path / "model.npz")
+    assert source == "hash"
+    np.testing.assert_allclose(reloaded.predict_proba(X), pipeline.predict_proba(X))
+
+
+def test_load_predictor_prefers_the_compiled_scorer(monkeypatch):
+    """
+    Test that predictions use the compiled scorer, and the
+    scikit-learn model when MODEL_SCORER=sklearn.
+    """
+    import utils
+
+    assert isinstance(utils.load_predictor(), utils.LinearScorer)
+
+    # Force a reload; monkeypatch restores the loaded predictor afterwards
+    monkeypatch.setattr(utils, "_predictor", None)
+    monkeypatch.setattr(utils, "_predictor_version", None)
+    monkeypatch.setenv("MODEL_SCORER", "sklearn")
+    assert type(utils.load_predictor()).__name__ == "LogisticRegression"
+
+
+def test_load_predictor_compiles_a_stale_model_in_memory(tmp_path, monkeypatch):
+    """
+    Test that a model without a current .npz is compiled in memory,
+    and that loading it writes nothing next to the model.
+    """
+    import shutil
+    import utils
+
+    model_file = tmp_path / "model.pkl"
+    shutil.copy(utils.model_path, model_file)
+    monkeypatch.setattr(utils, "model_path", model_file)
+    monkeypatch.setattr(utils, "scorer_path", model_file.with_suffix(".npz"))
+    monkeypatch.setattr(utils, "_predictor", None)
+    monkeypatch.setattr(utils, "_predictor_version", None)
+
+    assert isinstance(utils.load_predictor(), utils.LinearScorer)
+    assert list(tmp_path.iterdir()) == [model_file]